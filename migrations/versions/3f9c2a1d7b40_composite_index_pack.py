@@ -0,0 +1,49 @@
+"""composite index pack for hot read paths
+
+Revision ID: 3f9c2a1d7b40
+Revises:
+Create Date: 2026-10-19 12:00:00
+
+The schema itself is created by ``db.create_all()``, which now also declares these
+indexes. This revision adds them to databases created before that. Every index is
+built with CREATE INDEX CONCURRENTLY outside a transaction, so writes continue while
+it builds. IF NOT EXISTS makes the revision a no-op on fresh databases.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_session_participants_user_id_session_id', 'session_participants', ['user_id', 'session_id']),
+    ('ix_quizzes_user_id_created_at', 'quizzes', ['user_id', 'created_at']),
+    ('ix_notifications_recipient_id_is_read', 'notifications', ['recipient_id', 'is_read']),
+    ('ix_notifications_recipient_id_created_at', 'notifications', ['recipient_id', 'created_at']),
+    ('ix_quiz_sessions_started_created_at', 'quiz_sessions', ['started', 'created_at']),
+    ('ix_followers_followed_id_follower_id', 'followers', ['followed_id', 'follower_id']),
+    # Foreign keys that quiz reads, edits and cascading deletes look up by
+    ('ix_questions_quiz_id', 'questions', ['quiz_id']),
+    ('ix_multiple_choice_options_question_id', 'multiple_choice_options', ['question_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # Building an index on a large table can outlast the app's statement timeout
+        op.execute('SET statement_timeout = 0')
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
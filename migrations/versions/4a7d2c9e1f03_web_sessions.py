@@ -0,0 +1,39 @@
+"""server-side web sessions
+
+Revision ID: 4a7d2c9e1f03
+Revises: 3f9c2a1d7b40
+Create Date: 2026-10-20 10:00:00
+
+Creates ``web_sessions``, the table behind the default session backend
+(SESSION_TYPE = "sql", see src/backend/session_store.py). Existing cookie or
+filesystem sessions are not carried over; users log in once more.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7d2c9e1f03'
+down_revision = '3f9c2a1d7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'web_sessions',
+        sa.Column('sid', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('sid'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_web_sessions_user_id', 'web_sessions', ['user_id'], if_not_exists=True)
+    op.create_index('ix_web_sessions_expires_at', 'web_sessions', ['expires_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table('web_sessions')
@@ -0,0 +1,59 @@
+"""quiz popularity statistics
+
+Revision ID: 5d2e8f1a9c63
+Revises: c47d9e3a1b28
+Create Date: 2026-10-19 18:00:00
+
+Creates ``quiz_stats``, ``quiz_stats_players`` and ``quiz_stats_watermark`` (see
+src/backend/quiz_stats.py). Fill them afterwards with ``flask quiz-stats rebuild``.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8f1a9c63'
+down_revision = 'c47d9e3a1b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'quiz_stats',
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('play_count', sa.Integer(), nullable=False),
+        sa.Column('unique_players', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('trending_log', sa.Float(), nullable=False),
+        sa.Column('last_played_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('quiz_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_quiz_stats_trending_log', 'quiz_stats', ['trending_log'], if_not_exists=True)
+    op.create_table(
+        'quiz_stats_players',
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('quiz_id', 'user_id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'quiz_stats_watermark',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_created_at', sa.DateTime(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('quiz_stats_watermark')
+    op.drop_table('quiz_stats_players')
+    op.drop_table('quiz_stats')
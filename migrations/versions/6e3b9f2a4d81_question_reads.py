@@ -0,0 +1,73 @@
+"""flattened question reads
+
+Revision ID: 6e3b9f2a4d81
+Revises: 4a7d2c9e1f03
+Create Date: 2026-10-20 10:30:00
+
+Creates ``question_reads`` (see src/backend/question_reads.py). Quiz documents,
+quiz lists, search and grading read from it, so it is filled from the existing
+questions here, the same way ``flask question-reads rebuild`` does.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6e3b9f2a4d81'
+down_revision = '4a7d2c9e1f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'question_reads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('question_type', sa.String(length=50), nullable=True),
+        sa.Column('question_text', sa.String(length=1000), nullable=False),
+        sa.Column('max_length', sa.Integer(), nullable=True),
+        sa.Column('correct_answer', sa.String(length=255), nullable=True),
+        sa.Column('min_value', sa.Integer(), nullable=True),
+        sa.Column('max_value', sa.Integer(), nullable=True),
+        sa.Column('step', sa.Integer(), nullable=True),
+        sa.Column('correct_value', sa.Integer(), nullable=True),
+        sa.Column('options', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('correct_option_id', sa.Integer(), nullable=True),
+        sa.Column('correct_answer_text', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['id'], ['questions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_question_reads_quiz_id_id', 'question_reads', ['quiz_id', 'id'], if_not_exists=True)
+
+    op.execute('SET LOCAL statement_timeout = 0')
+    op.execute("""
+        INSERT INTO question_reads (id, quiz_id, question_type, question_text, max_length, correct_answer,
+                                    min_value, max_value, step, correct_value, options, correct_option_id,
+                                    correct_answer_text)
+        SELECT q.id, q.quiz_id, q.question_type, q.question_text, t.max_length, t.correct_answer,
+               s.min_value, s.max_value, s.step, s.correct_value,
+               CASE WHEN q.question_type = 'multiple_choice' THEN coalesce(mc.options, '[]'::jsonb) END,
+               mc.correct_option_id, mc.correct_answer_text
+        FROM questions q
+        LEFT JOIN text_input_questions t ON t.id = q.id
+        LEFT JOIN slider_questions s ON s.id = q.id
+        LEFT JOIN (
+            SELECT o.question_id,
+                   jsonb_agg(jsonb_build_object('id', o.id, 'text', o.text, 'is_correct', o.is_correct)
+                             ORDER BY o.id) AS options,
+                   min(o.id) FILTER (WHERE o.is_correct) AS correct_option_id,
+                   (array_agg(o.text ORDER BY o.id) FILTER (WHERE o.is_correct))[1] AS correct_answer_text
+            FROM multiple_choice_options o
+            GROUP BY o.question_id
+        ) mc ON mc.question_id = q.id
+        ON CONFLICT (id) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.drop_table('question_reads')
@@ -0,0 +1,40 @@
+"""cluster ring and checkpoint epochs
+
+Revision ID: 7c1f4e9b2a36
+Revises: e3b8a5d1c742
+Create Date: 2026-10-19 23:00:00
+
+Creates ``cluster_ring``, the member list of the nodes sharing live sessions,
+and records the ring epoch on ``live_session_checkpoints`` (see
+src/backend/sharding.py). Nodes join with ``flask cluster join``.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1f4e9b2a36'
+down_revision = 'e3b8a5d1c742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cluster_ring',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('epoch', sa.Integer(), nullable=False),
+        sa.Column('nodes', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.add_column('live_session_checkpoints',
+                  sa.Column('ring_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('live_session_checkpoints', 'ring_epoch')
+    op.drop_table('cluster_ring')
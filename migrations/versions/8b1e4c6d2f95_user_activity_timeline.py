@@ -0,0 +1,63 @@
+"""user activity timeline
+
+Revision ID: 8b1e4c6d2f95
+Revises: 6e3b9f2a4d81
+Create Date: 2026-10-19 14:00:00
+
+Creates ``user_activity`` (see src/backend/activity.py) and fills it from the
+existing sessions, the same way ``flask activity rebuild`` does.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c6d2f95'
+down_revision = '6e3b9f2a4d81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_activity',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=10), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('session_code', sa.String(length=10), nullable=False),
+        sa.Column('num_teams', sa.Integer(), nullable=False),
+        sa.Column('team_number', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Float(), nullable=True),
+        sa.Column('started', sa.Boolean(), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'session_id', 'role', name='_activity_user_session_role_uc'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_user_activity_user_id_occurred_at_id', 'user_activity',
+                    ['user_id', 'occurred_at', 'id'], if_not_exists=True)
+    op.create_index('ix_user_activity_session_id', 'user_activity', ['session_id'], if_not_exists=True)
+
+    op.execute('SET LOCAL statement_timeout = 0')
+    op.execute("""
+        INSERT INTO user_activity (user_id, session_id, role, quiz_id, session_code, num_teams, team_number,
+                                   score, started, occurred_at)
+        SELECT s.host_id, s.id, 'hosted', s.quiz_id, s.code, s.num_teams, NULL, NULL,
+               COALESCE(s.started, false), COALESCE(s.created_at, now())
+        FROM quiz_sessions s
+        UNION ALL
+        SELECT p.user_id, s.id, 'played', s.quiz_id, s.code, s.num_teams, p.team_number,
+               p.score, COALESCE(s.started, false), COALESCE(s.created_at, now())
+        FROM quiz_sessions s JOIN session_participants p ON p.session_id = s.id
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade():
+    op.drop_table('user_activity')
@@ -0,0 +1,58 @@
+"""per-question answer analytics
+
+Revision ID: 9a4c7b2e5d18
+Revises: 5d2e8f1a9c63
+Create Date: 2026-10-19 19:00:00
+
+Creates ``question_stats``, ``question_answer_buckets`` and
+``question_stats_watermark`` (see src/backend/question_stats.py). Fill them
+afterwards with ``flask question-stats rebuild``.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c7b2e5d18'
+down_revision = '5d2e8f1a9c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'question_stats',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('answer_count', sa.Integer(), nullable=False),
+        sa.Column('correct_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('question_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_question_stats_quiz_id', 'question_stats', ['quiz_id'], if_not_exists=True)
+    op.create_table(
+        'question_answer_buckets',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('question_id', 'bucket'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'question_stats_watermark',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('answer_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('question_stats_watermark')
+    op.drop_table('question_answer_buckets')
+    op.drop_table('question_stats')
@@ -0,0 +1,33 @@
+"""participant join-order index
+
+Revision ID: b2d6f0c8e417
+Revises: 7c1f4e9b2a36
+Create Date: 2026-10-20 09:00:00
+
+Adds ``ix_session_participants_session_id_id`` for the sampled participant list
+of large sessions (first and newest joiners) and the paged roster. Built
+concurrently, like the composite index pack.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d6f0c8e417'
+down_revision = '7c1f4e9b2a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute('SET statement_timeout = 0')
+        op.create_index('ix_session_participants_session_id_id', 'session_participants', ['session_id', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_session_participants_session_id_id', table_name='session_participants',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,49 @@
+"""follow feed timelines
+
+Revision ID: c47d9e3a1b28
+Revises: 8b1e4c6d2f95
+Create Date: 2026-10-19 16:00:00
+
+Creates ``feed_entries`` and ``feed_pull_creators`` (see src/backend/feed.py).
+Fill them afterwards with ``flask feed rebuild``.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d9e3a1b28'
+down_revision = '8b1e4c6d2f95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'feed_entries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'quiz_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_feed_entries_user_id_created_at_quiz_id', 'feed_entries',
+                    ['user_id', 'created_at', 'quiz_id'], if_not_exists=True)
+    op.create_index('ix_feed_entries_creator_id', 'feed_entries', ['creator_id'], if_not_exists=True)
+    op.create_table(
+        'feed_pull_creators',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('feed_pull_creators')
+    op.drop_table('feed_entries')
@@ -0,0 +1,40 @@
+"""live session checkpoints
+
+Revision ID: e3b8a5d1c742
+Revises: 9a4c7b2e5d18
+Create Date: 2026-10-19 21:00:00
+
+Creates ``live_session_checkpoints``, the persisted state of host-driven
+sessions (see src/backend/live_sessions.py). Existing sessions have no row and
+keep the self-paced flow.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8a5d1c742'
+down_revision = '9a4c7b2e5d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'live_session_checkpoints',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('phase', sa.String(length=16), nullable=False),
+        sa.Column('question_index', sa.Integer(), nullable=False),
+        sa.Column('opened_at', sa.DateTime(), nullable=True),
+        sa.Column('closes_at', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('live_session_checkpoints')
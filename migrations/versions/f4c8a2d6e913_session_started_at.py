@@ -0,0 +1,36 @@
+"""session start time
+
+Revision ID: f4c8a2d6e913
+Revises: b2d6f0c8e417
+Create Date: 2026-10-20 12:00:00
+
+Adds ``quiz_sessions.started_at`` and moves the quiz stats watermark from the
+creation time to the start time of sessions (see src/backend/quiz_stats.py).
+Sessions that were already started get their creation time as start time, the
+only time known for them; the watermark keeps its value, which therefore still
+points at the same session.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a2d6e913'
+down_revision = 'b2d6f0c8e417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('quiz_sessions', sa.Column('started_at', sa.DateTime(), nullable=True))
+    op.execute('SET LOCAL statement_timeout = 0')
+    op.execute('UPDATE quiz_sessions SET started_at = created_at WHERE started')
+    op.create_index('ix_quiz_sessions_started_at_id', 'quiz_sessions', ['started_at', 'id'], if_not_exists=True)
+    op.alter_column('quiz_stats_watermark', 'session_created_at', new_column_name='session_started_at')
+
+
+def downgrade():
+    op.alter_column('quiz_stats_watermark', 'session_started_at', new_column_name='session_created_at')
+    op.drop_index('ix_quiz_sessions_started_at_id', table_name='quiz_sessions', if_exists=True)
+    op.drop_column('quiz_sessions', 'started_at')
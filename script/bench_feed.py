@@ -0,0 +1,113 @@
+"""
+Follow feed benchmark: fan-out on read vs. the precomputed timelines.
+
+Reads: for the users who follow the most people (and a few in the middle of the
+distribution), it times the first feed page built straight from ``followers`` and
+``quizzes`` against ``feed.feed_for``. It checks that both list the same quizzes
+before timing.
+
+Writes: for creators with roughly 10, 100, 1000 and 10000 followers, it times
+``feed.fan_out`` for one of their quizzes. The entries are deleted first and the
+transaction is rolled back afterwards, so the database is left as it was.
+
+Usage (from the repository root):
+    flask --app src.wsgi db upgrade
+    flask --app src.wsgi feed rebuild
+    python script/bench_feed.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select, text  # noqa: E402
+
+from src.backend import feed  # noqa: E402
+from src.backend.app import create_app, Quiz, followers  # noqa: E402
+from src.backend.config import Config  # noqa: E402
+from src.backend.init_flask import db  # noqa: E402
+
+PAGE = 20
+
+
+def pull_feed(user_id, limit=PAGE):
+    """The feed as a single join, the way it would be read without timelines."""
+    rows = db.session.execute(
+        select(Quiz.id).join(followers, followers.c.followed_id == Quiz.user_id)
+        .where(followers.c.follower_id == user_id)
+        .order_by(Quiz.created_at.desc(), Quiz.id.desc()).limit(limit)).scalars().all()
+    return rows
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000.0)
+        db.session.rollback()
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def read_targets():
+    counts = (select(followers.c.follower_id, func.count().label('n'))
+              .group_by(followers.c.follower_id).order_by(func.count().desc()))
+    rows = db.session.execute(counts).all()
+    if not rows:
+        sys.exit("No follow graph; run `flask --app src.wsgi seed` first")
+    picks = rows[:3] + [rows[len(rows) // 100], rows[len(rows) // 10], rows[len(rows) // 2]]
+    return [(row.follower_id, row.n) for row in picks]
+
+
+def write_targets(buckets):
+    counts = (select(followers.c.followed_id.label('user_id'), func.count().label('n'))
+              .where(followers.c.followed_id.in_(select(Quiz.user_id)))
+              .group_by(followers.c.followed_id).subquery())
+    targets = []
+    for bucket in buckets:
+        row = db.session.execute(select(counts.c.user_id, counts.c.n)
+                                 .order_by(func.abs(counts.c.n - bucket)).limit(1)).first()
+        if row is not None:
+            targets.append((row.user_id, row.n))
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per measurement')
+    args = parser.parse_args()
+
+    app = create_app(Config)
+    max_followers = app.config['FEED_FANOUT_MAX_FOLLOWERS']
+    with app.test_request_context():
+        print(f"{'user':>8}{'follows':>9}{'pull p50':>10}{'pull p95':>10}{'feed p50':>10}{'feed p95':>10}  (ms)")
+        for user_id, following in read_targets():
+            if pull_feed(user_id) != [item['id'] for item in feed.feed_for(user_id, PAGE)[0]]:
+                sys.exit(f"user {user_id}: feed and pull query disagree; run `flask feed rebuild`")
+            pull = timed(lambda: pull_feed(user_id), args.repeat)
+            pushed = timed(lambda: feed.feed_for(user_id, PAGE), args.repeat)
+            print(f"{user_id:>8}{following:>9}{pull[0]:>10.2f}{pull[1]:>10.2f}{pushed[0]:>10.2f}{pushed[1]:>10.2f}")
+
+        print()
+        db.session.execute(text("SET LOCAL statement_timeout = 0"))  # grouping all of followers
+        print(f"{'creator':>8}{'followers':>10}{'fan-out p50':>13}{'fan-out max':>13}  (ms)")
+        for creator_id, follower_count in write_targets([10, 100, 1000, 10000, max_followers * 2]):
+            quiz = Quiz.query.filter_by(user_id=creator_id).order_by(Quiz.created_at.desc()).first()
+            samples = []
+            for _ in range(max(1, args.repeat // 4)):
+                db.session.execute(delete(feed.FeedEntry).where(feed.FeedEntry.quiz_id == quiz.id))
+                started = time.perf_counter()
+                feed.fan_out(quiz.id, creator_id, quiz.created_at, max_followers)
+                samples.append((time.perf_counter() - started) * 1000.0)
+                db.session.rollback()
+            samples.sort()
+            label = ' (read on demand)' if follower_count > max_followers else ''
+            print(f"{creator_id:>8}{follower_count:>10}{statistics.median(samples):>13.2f}{samples[-1]:>13.2f}{label}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Login throughput benchmark for the password hashing pool.
+
+Runs concurrent POST /login requests through the Flask test client (threads stand
+in for gunicorn threads / queued requests) for several PASSWORD_HASH_WORKERS values
+and prints logins per second and logins per second per hashing core. Rejected
+requests (503 from admission control) are counted separately.
+
+Usage (from the repository root, against a database with the schema created):
+    python script/bench_login.py --threads 16 --seconds 5 --workers 0 1 2 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backend.app import create_app, User  # noqa: E402
+from src.backend.config import Config  # noqa: E402
+from src.backend.init_flask import db  # noqa: E402
+
+USERNAME = 'bench_login_user'
+PASSWORD = 'bench-password'
+
+
+def ensure_user(app):
+    with app.app_context():
+        db.create_all()
+        user = User.query.filter_by(username=USERNAME).first()
+        if user is None:
+            user = User(username=USERNAME)
+            db.session.add(user)
+        user.set_password(PASSWORD)
+        db.session.commit()
+
+
+def run(workers, threads, seconds, method, queue_limit):
+    config = type('BenchConfig', (Config,), {
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_QUEUE_LIMIT': queue_limit or max(1, workers) * 4,
+    })
+    app = create_app(config)
+    ensure_user(app)
+
+    counts = {'ok': 0, 'busy': 0, 'other': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def _client_loop():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            status = client.post('/login', json={'username': USERNAME, 'password': PASSWORD}).status_code
+            key = 'ok' if status == 200 else 'busy' if status == 503 else 'other'
+            with lock:
+                counts[key] += 1
+
+    started = time.monotonic()
+    pool = [threading.Thread(target=_client_loop) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.monotonic() - started
+    app.extensions['password_hasher'].shutdown()
+
+    rate = counts['ok'] / elapsed
+    cores = max(1, workers)
+    print(f"{workers:>8}{rate:>12.1f}{rate / cores:>14.1f}{counts['busy']:>10}{counts['other']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, os.cpu_count() or 2],
+                        help='PASSWORD_HASH_WORKERS values to compare (0 = inline hashing)')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--method', default=Config.PASSWORD_HASH_METHOD)
+    parser.add_argument('--queue-limit', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"method={args.method} threads={args.threads} seconds={args.seconds} cpus={os.cpu_count()}")
+    print(f"{'workers':>8}{'logins/s':>12}{'per core/s':>14}{'503s':>10}{'other':>8}")
+    for workers in args.workers:
+        run(workers, args.threads, args.seconds, args.method, args.queue_limit)
+
+
+if __name__ == '__main__':
+    main()
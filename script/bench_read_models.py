@@ -0,0 +1,168 @@
+"""
+ORM vs. Core read-model benchmark for the list endpoints.
+
+For every list endpoint that moved to ``read_models`` this runs the previous ORM
+implementation and the Core read model against the same data. For each it
+reports the CPU time per call (process time, so database wait is excluded), the
+wall time, and the peak Python memory allocated while building one response
+(tracemalloc). Both paths produce the same JSON-ready dicts. That is checked
+before timing.
+
+The targets are the largest cases in the database up to ``--max-rows`` rows: the
+most followed user, the user who follows the most people, the session with the
+most participants and the user with the most notifications. The cap matters
+because the old /followers path ran one extra query per follower. Load data with
+``flask seed`` first.
+
+Usage (from the repository root):
+    flask --app src.wsgi seed --users 20000 --sessions 200 --participants-per-session 300
+    python script/bench_read_models.py --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from src.backend import read_models  # noqa: E402
+from src.backend.app import create_app, User, followers, Notification, QuizSession  # noqa: E402
+from src.backend.session import SessionParticipant  # noqa: E402
+from src.backend.config import Config  # noqa: E402
+from src.backend.init_flask import db  # noqa: E402
+
+
+# --- previous ORM implementations (as the routes had them) ---
+def orm_all_users(viewer_id):
+    users_list = User.query.filter(User.id != viewer_id).order_by(User.username.asc()).all()
+    followed_ids = {row[0] for row in db.session.query(followers.c.followed_id).filter(
+        followers.c.follower_id == viewer_id)}
+    return [{"id": u.id, "username": u.username, "avatar": u.avatar, "is_following": u.id in followed_ids}
+            for u in users_list]
+
+
+def orm_followers(user_id):
+    user = db.session.get(User, user_id)
+    return [{"id": u.id, "username": u.username, "avatar": u.avatar, "is_following": user.is_following(u)}
+            for u in user.followers.all()]
+
+
+def orm_following(user_id):
+    user = db.session.get(User, user_id)
+    return [{"id": u.id, "username": u.username, "avatar": u.avatar} for u in user.followed.all()]
+
+
+def orm_participants(code):
+    quiz_session = QuizSession.query.filter_by(code=code).first()
+    rows = SessionParticipant.query.options(joinedload(SessionParticipant.user)).filter_by(
+        session_id=quiz_session.id).all()
+    return [{'user_id': p.user.id, 'username': p.user.username, 'avatar': p.user.avatar,
+             'team_number': p.team_number, 'score': p.score} for p in rows if p.user]
+
+
+def orm_notifications(user_id, limit=50):
+    rows = Notification.query.filter_by(recipient_id=user_id).options(
+        joinedload(Notification.sender),
+        joinedload(Notification.session_info).joinedload(QuizSession.quiz)
+    ).order_by(Notification.created_at.desc()).limit(limit).all()
+    return [n.to_dict() for n in rows]
+
+
+# --- read models, converted the way the routes do ---
+def core_all_users(viewer_id):
+    return [u.to_dict() for u in read_models.all_users(viewer_id)]
+
+
+def core_followers(user_id):
+    return [u.to_dict() for u in read_models.followers_of(user_id)]
+
+
+def core_following(user_id):
+    return [u.to_dict(with_following=False) for u in read_models.followed_by(user_id)]
+
+
+def core_participants(code):
+    return [p.to_dict() for p in read_models.session_participants(code)]
+
+
+def core_notifications(user_id, limit=50):
+    return [n.to_dict() for n in read_models.notifications_for(user_id, limit)]
+
+
+def pick_targets(max_rows):
+    """
+    Finds the largest case with at most ``max_rows`` rows for every endpoint.
+    """
+    def _top(column):
+        return db.session.query(column, func.count()).group_by(column).having(func.count() <= max_rows) \
+            .order_by(func.count().desc()).first()
+
+    most_followed = _top(followers.c.followed_id)
+    most_following = _top(followers.c.follower_id)
+    biggest_session = _top(SessionParticipant.session_id)
+    most_notified = _top(Notification.recipient_id)
+    if not (most_followed and biggest_session and most_notified):
+        sys.exit("Not enough data; run `flask --app src.wsgi seed` first")
+    code = db.session.get(QuizSession, biggest_session[0]).code
+    return {
+        'users/all': (most_followed[0], User.query.count() - 1),  # Not capped: it lists everyone
+        'followers': (most_followed[0], most_followed[1]),
+        'following': (most_following[0], most_following[1]),
+        'participants': (code, biggest_session[1]),
+        'notifications': (most_notified[0], min(50, most_notified[1])),
+    }
+
+
+def measure(func, arg, repeat):
+    """
+    Returns (cpu ms/call, wall ms/call, peak KiB) for one implementation.
+    """
+    db.session.remove()
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+        db.session.remove()  # every request starts with an empty session
+    cpu = (time.process_time() - cpu_started) / repeat * 1000.0
+    wall = (time.perf_counter() - wall_started) / repeat * 1000.0
+    return cpu, wall, peak / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='calls per implementation and endpoint')
+    parser.add_argument('--max-rows', type=int, default=1000, help='largest list to benchmark per endpoint')
+    args = parser.parse_args()
+
+    app = create_app(Config)
+    cases = [
+        ('users/all', orm_all_users, core_all_users),
+        ('followers', orm_followers, core_followers),
+        ('following', orm_following, core_following),
+        ('participants', orm_participants, core_participants),
+        ('notifications', orm_notifications, core_notifications),
+    ]
+    with app.test_request_context():
+        targets = pick_targets(args.max_rows)
+        print(f"{'endpoint':<14}{'rows':>7}  {'path':<5}{'cpu ms':>9}{'wall ms':>9}{'peak KiB':>10}")
+        print('-' * 54)
+        for name, orm_func, core_func in cases:
+            arg, rows = targets[name]
+            # followers/following/participants have no ORDER BY, so compare as multisets
+            if sorted(map(repr, orm_func(arg))) != sorted(map(repr, core_func(arg))):
+                sys.exit(f"{name}: ORM and read model disagree")
+            for label, func in (('orm', orm_func), ('core', core_func)):
+                cpu, wall, peak = measure(func, arg, args.repeat)
+                print(f"{name:<14}{rows:>7}  {label:<5}{cpu:>9.2f}{wall:>9.2f}{peak:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
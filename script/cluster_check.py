@@ -0,0 +1,268 @@
+"""
+Multi-node consistency check for session-affine routing (src/backend/sharding.py).
+
+Starts several gunicorn "nodes" on local ports, each with its own NODE_ID, against
+one database. It then runs host-driven live sessions through them while the ring
+changes underneath:
+
+    t=0            ring = node1, node2 (node3 runs but owns nothing)
+    --join-at      node3 joins
+    --leave-at     node1 leaves
+
+The script stands in for nginx. It routes ``/sessions/<code>/...`` to the owner
+in the ring it last read, and follows a 421 to the node named in
+``X-Session-Node``, like the generated ``error_page 421`` location. Every
+session's host advances it through all its questions while a player polls
+``/live``. At the end the script checks that:
+
+    * every successful advance returned exactly the next version (no transition
+      lost or applied twice across the handoffs),
+    * no player ever saw a version go backwards,
+    * each session's checkpoint agrees with what the host saw, and only the
+      session's current owner serves it (others answer 421).
+
+Usage (from the repository root, against a migrated database):
+    python script/cluster_check.py --sessions 30 --questions 15
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import build_quiz_payload, wait_for_port  # noqa: E402
+from src.backend import sharding  # noqa: E402
+from src.backend.app import create_app  # noqa: E402
+from src.backend.config import Config  # noqa: E402
+from src.backend.init_flask import db  # noqa: E402
+from src.backend.live_sessions import LiveSessionCheckpoint  # noqa: E402
+from src.backend.session import QuizSession  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RING_TTL = 0.5
+
+
+class Router:
+    """
+    Routes requests like the generated nginx map: session paths to their owner, the rest to the first node.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.ring = None
+        self.read_at = 0.0
+        self.misdirected = 0
+
+    def refresh(self):
+        if self.ring is None or time.monotonic() - self.read_at > RING_TTL:
+            with self.app.app_context():
+                row = db.session.get(sharding.ClusterRing, 1)
+                self.ring = sharding.HashRing(row.nodes, row.epoch, self.app.config['CLUSTER_VNODES'])
+            self.read_at = time.monotonic()
+        return self.ring
+
+    def base_url(self, code=None):
+        ring = self.refresh()
+        if code is None:
+            return f"http://{sorted(ring.nodes.values())[0]}"
+        return f"http://{ring.nodes[ring.owner(code)]}"
+
+    async def call(self, http, method, path, code=None, **kwargs):
+        """
+        Sends a request to the owner; follows one 421 and otherwise retries after a moment.
+        """
+        url = self.base_url(code) + path
+        for _ in range(20):
+            async with http.request(method, url, **kwargs) as resp:
+                body = await resp.json(content_type=None) if resp.status != 304 else None
+                if resp.status != 421:
+                    return resp.status, body
+                self.misdirected += 1
+                node = resp.headers.get('X-Session-Node')
+            if node and not url.startswith(f"http://{node}/"):
+                url = f"http://{node}{path}"
+            else:
+                await asyncio.sleep(0.1)
+                url = self.base_url(code) + path
+        raise RuntimeError(f"{method} {path} stayed misdirected")
+
+
+def start_node(node_id, port, workers, database_url):
+    env = dict(os.environ, NODE_ID=node_id, CLUSTER_RING_TTL=str(RING_TTL), EVENT_BROKER='postgres')
+    if database_url:
+        env['DATABASE_URL'] = database_url
+    cmd = [sys.executable, '-m', 'gunicorn', 'src.wsgi:app', '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port('127.0.0.1', port, 30):
+        os.killpg(proc.pid, signal.SIGTERM)
+        raise RuntimeError(f'{node_id} did not start listening within 30 seconds')
+    return proc
+
+
+async def login(router, name):
+    http = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+    credentials = {'username': name, 'password': 'cluster-check'}
+    for path in ('/signup', '/login'):
+        status, _ = await router.call(http, 'POST', path, json=credentials)
+    if status != 200:
+        raise RuntimeError(f"Could not log in {name}")
+    return http
+
+
+async def drive(router, host, code, steps, problems):
+    """
+    Advances one session to the end; every success must be exactly the next version.
+    """
+    version, advanced = 0, 0
+    for _ in range(steps):
+        await asyncio.sleep(random.uniform(0.05, 0.25))
+        status, body = await router.call(host, 'POST', f'/sessions/{code}/live/advance', code=code,
+                                         json={'duration': 3600})
+        if status != 200:
+            problems.append(f"{code}: advance answered {status} {body}")
+            continue
+        if body['version'] != version + 1:
+            problems.append(f"{code}: advance went from version {version} to {body['version']}")
+        version, advanced = body['version'], advanced + 1
+    return version, advanced
+
+
+async def watch(router, player, code, done, problems):
+    """
+    Polls a session like the frontend and records versions going backwards.
+    """
+    version, polls = 0, 0
+    while not done.is_set():
+        status, body = await router.call(player, 'GET', f'/sessions/{code}/live?version={version}', code=code)
+        polls += 1
+        if status == 200:
+            if body['version'] < version:
+                problems.append(f"{code}: player saw version {body['version']} after {version}")
+            version = max(version, body['version'])
+        await asyncio.sleep(random.uniform(0.02, 0.1))
+    return polls
+
+
+async def rebalance(app, args, addresses, log):
+    await asyncio.sleep(args.join_at)
+    with app.app_context():
+        ring, moved = sharding.join('node3', addresses['node3'])
+        db.session.commit()
+    log.append(f"t={args.join_at:.0f}s node3 joined (epoch {ring.epoch}, {moved} slots moved)")
+    await asyncio.sleep(args.leave_at - args.join_at)
+    with app.app_context():
+        ring, moved = sharding.leave('node1')
+        db.session.commit()
+    log.append(f"t={args.leave_at:.0f}s node1 left (epoch {ring.epoch}, {moved} slots moved)")
+
+
+async def run(app, args, addresses):
+    router = Router(app)
+    suffix = random.randint(0, 10 ** 6)
+    host = await login(router, f'clusterhost{suffix}')
+    status, quiz = await router.call(host, 'POST', '/quiz', json=build_quiz_payload(args.questions))
+    if status not in (200, 201):
+        raise RuntimeError(f"Could not create the quiz: {status} {quiz}")
+    quiz_id = quiz['quiz_id']
+
+    codes, players = [], []
+    for i in range(args.sessions):
+        _, body = await router.call(host, 'POST', '/sessions', json={'quiz_id': quiz_id, 'num_teams': 1})
+        player = await login(router, f'clusterplayer{suffix}_{i}')
+        status, _ = await router.call(player, 'POST', f"/sessions/{body['code']}/join", code=body['code'], json={})
+        if status != 200:
+            raise RuntimeError(f"Join failed with {status}")
+        codes.append(body['code'])
+        players.append(player)
+
+    problems, log, done = [], [], asyncio.Event()
+    steps = 2 * args.questions + 1  # Open and reveal every question, then finish
+    started = time.monotonic()
+    watchers = [asyncio.create_task(watch(router, player, code, done, problems)) for code, player in zip(codes, players)]
+    balancer = asyncio.create_task(rebalance(app, args, addresses, log))
+    results = await asyncio.gather(*(drive(router, host, code, steps, problems) for code in codes))
+    await balancer
+    done.set()
+    polls = sum(await asyncio.gather(*watchers))
+    elapsed = time.monotonic() - started
+
+    # Checkpoints must match what the hosts saw, and only the owner serves a session
+    ring = router.refresh()
+    with app.app_context():
+        ids = {row.code: row.id for row in db.session.query(QuizSession.code, QuizSession.id)
+               .filter(QuizSession.code.in_(codes))}
+        for code, (version, _) in zip(codes, results):
+            checkpoint = db.session.get(LiveSessionCheckpoint, ids[code])
+            if (checkpoint.version, checkpoint.phase) != (version, 'finished'):
+                problems.append(f"{code}: checkpoint at {checkpoint.version}/{checkpoint.phase}, host saw {version}")
+    for code in codes:
+        for node, address in ring.nodes.items():
+            async with host.get(f"http://{address}/sessions/{code}/live") as resp:
+                expected = 200 if node == ring.owner(code) else 421
+                if resp.status != expected:
+                    problems.append(f"{code}: {node} answered {resp.status}, expected {expected}")
+
+    for http in [host] + players:
+        await http.close()
+    return {'sessions': len(codes), 'advances': sum(advanced for _, advanced in results), 'polls': polls,
+            'misdirected': router.misdirected, 'seconds': elapsed, 'log': log, 'problems': problems}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sessions', type=int, default=30)
+    parser.add_argument('--questions', type=int, default=15)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers per node')
+    parser.add_argument('--base-port', type=int, default=5101)
+    parser.add_argument('--join-at', type=float, default=2.0, help='Seconds into the run when node3 joins')
+    parser.add_argument('--leave-at', type=float, default=5.0, help='Seconds into the run when node1 leaves')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    app = create_app(Config)
+    addresses = {f'node{i + 1}': f'127.0.0.1:{args.base_port + i}' for i in range(3)}
+    with app.app_context():
+        row = db.session.get(sharding.ClusterRing, 1)
+        original = dict(row.nodes) if row else {}
+        sharding._update_ring(lambda nodes: (nodes.clear(), nodes.update(node1=addresses['node1'],
+                                                                         node2=addresses['node2'])))
+        db.session.commit()
+
+    nodes = []
+    try:
+        for i, (node_id, address) in enumerate(addresses.items()):
+            nodes.append(start_node(node_id, args.base_port + i, args.workers, args.database_url))
+        report = asyncio.run(run(app, args, addresses))
+    finally:
+        for proc in nodes:
+            os.killpg(proc.pid, signal.SIGTERM)
+        with app.app_context():
+            sharding._update_ring(lambda nodes: (nodes.clear(), nodes.update(original)))
+            db.session.commit()
+
+    for line in report['log']:
+        print(line)
+    print(f"{report['sessions']} sessions, {report['advances']} advances and {report['polls']} polls "
+          f"in {report['seconds']:.1f}s; {report['misdirected']} misdirected requests followed")
+    for problem in report['problems'][:20]:
+        print(f"INCONSISTENT {problem}")
+    if report['problems']:
+        sys.exit(1)
+    print("All sessions stayed consistent through the rebalance")
+
+
+if __name__ == '__main__':
+    main()
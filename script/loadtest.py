@@ -0,0 +1,433 @@
+"""
+Scenario load generator for the Aquimemni backend.
+
+Simulates realistic quiz session lifecycles against a locally started gunicorn
+(and the Postgres database it points at) using asyncio-based HTTP clients:
+
+    setup     participants sign up and log in
+    lobby     everyone polls /sessions/<code> and /participants while
+              participants join within a short window
+    start     the host starts the session
+    play      all participants fetch /simulate/<id> at once and post scores
+    answer    while playing, each participant posts every question's answer
+              (/sessions/<code>/answers), the live-session write path
+    results   everyone fetches the results page
+
+Notification polling (/notifications/count) and search typing (/users/search,
+/quizzes/search with a growing prefix) run as background traffic during the
+lobby and play phases.
+
+For every phase the script reports throughput, latency percentiles and error
+rates, so worker counts can be sized and changes to the session hot path can be
+compared run against run.
+
+Usage (from the repository root):
+    python script/loadtest.py --participants 500 --start-server --workers 3
+    python script/loadtest.py --base-url http://127.0.0.1:5000 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import string
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed when the script runs
+    sys.exit("aiohttp is required for the load generator: pip install aiohttp")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASE_ORDER = ['setup', 'lobby', 'join', 'start', 'play', 'answer', 'results', 'notifications', 'search']
+
+
+class PhaseStats:
+    """
+    Collects latencies and outcomes for all requests tagged with one phase.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.statuses = defaultdict(int)
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, started, ended, status):
+        """
+        Records one finished request.
+
+        Args:
+            started (float): Monotonic timestamp when the request was sent.
+            ended (float): Monotonic timestamp when the response was read.
+            status (int or None): HTTP status code, or None for a transport error.
+        """
+        self.latencies.append(ended - started)
+        self.statuses[status if status is not None else 'exc'] += 1
+        if status is None or status >= 500:
+            self.errors += 1
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        if self.last_end is None or ended > self.last_end:
+            self.last_end = ended
+
+    def summary(self):
+        """
+        Computes the report row for this phase.
+
+        Returns:
+            dict: Request count, throughput, error rate and latency percentiles (ms).
+        """
+        count = len(self.latencies)
+        if not count:
+            return {'phase': self.name, 'requests': 0}
+        ordered = sorted(self.latencies)
+        elapsed = max(self.last_end - self.first_start, 1e-9)
+
+        def pct(p):
+            return ordered[min(count - 1, int(round(p / 100.0 * (count - 1))))] * 1000.0
+
+        return {
+            'phase': self.name,
+            'requests': count,
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(count / elapsed, 1),
+            'error_rate': round(self.errors / count, 4),
+            'p50_ms': round(pct(50), 2),
+            'p95_ms': round(pct(95), 2),
+            'p99_ms': round(pct(99), 2),
+            'max_ms': round(ordered[-1] * 1000.0, 2),
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+        }
+
+
+class LoadClient:
+    """
+    One simulated browser: its own cookie jar, sharing the global connector.
+    """
+
+    def __init__(self, base_url, connector, stats, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.http = aiohttp.ClientSession(
+            connector=connector, connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+        self.user_id = None
+        self.username = None
+
+    async def call(self, phase, method, path, retries=0, **kwargs):
+        """
+        Sends one request and records it under the given phase.
+
+        Args:
+            retries (int): How often to retry a 503 after its Retry-After delay.
+
+        Returns:
+            tuple: (status or None, parsed JSON body or None)
+        """
+        started = time.monotonic()
+        status, body, retry_after = None, None, None
+        try:
+            async with self.http.request(method, self.base_url + path, **kwargs) as resp:
+                status = resp.status
+                retry_after = resp.headers.get('Retry-After')
+                raw = await resp.read()
+                if raw and resp.content_type == 'application/json':
+                    body = json.loads(raw)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        self.stats[phase].record(started, time.monotonic(), status)
+        if status == 503 and retries > 0:
+            await asyncio.sleep(float(retry_after or 1) * random.uniform(1.0, 2.0))
+            return await self.call(phase, method, path, retries=retries - 1, **kwargs)
+        return status, body
+
+    async def close(self):
+        await self.http.close()
+
+
+async def register_and_login(client, username, password):
+    """
+    Creates (if needed) and logs in the account for a simulated user.
+    """
+    # Signup/login are rejected with 503 while the hashing pool is saturated; back off and retry
+    credentials = {'username': username, 'password': password}
+    await client.call('setup', 'POST', '/signup', retries=10, json=credentials)
+    status, body = await client.call('setup', 'POST', '/login', retries=10, json=credentials)
+    if status == 200 and body:
+        client.user_id = body['user']['id']
+        client.username = username
+    return status == 200
+
+
+async def poll_loop(client, paths, interval, stop_event, phase='lobby'):
+    """
+    Polls a set of endpoints every ``interval`` seconds (with jitter) until stopped.
+    """
+    await asyncio.sleep(random.uniform(0, interval))
+    while not stop_event.is_set():
+        for path in paths:
+            await client.call(phase, 'GET', path)
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval * random.uniform(0.9, 1.1))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def search_typing(client, words, stop_event, keystroke_delay):
+    """
+    Types search terms one character at a time, firing a search per keystroke.
+    """
+    while not stop_event.is_set():
+        word = random.choice(words)
+        for i in range(1, len(word) + 1):
+            if stop_event.is_set():
+                return
+            prefix = word[:i]
+            endpoint = random.choice(['/users/search', '/quizzes/search'])
+            await client.call('search', 'GET', endpoint, params={'q': prefix})
+            await asyncio.sleep(keystroke_delay * random.uniform(0.5, 1.5))
+        await asyncio.sleep(random.uniform(1.0, 3.0))
+
+
+async def participant_session(client, code, quiz_id, args, started_event, play_done):
+    """
+    The lifecycle of one participant after the lobby has opened.
+    """
+    await asyncio.sleep(random.uniform(0, args.join_window))
+    body = {'team_number': random.randint(1, args.teams)} if args.teams > 1 else {}
+    await client.call('join', 'POST', f'/sessions/{code}/join', json=body)
+
+    await started_event.wait()
+    # Clients notice the start on their next lobby poll.
+    await asyncio.sleep(random.uniform(0, args.poll_interval))
+    _, quiz = await client.call('play', 'GET', f'/simulate/{quiz_id}')
+    questions = (quiz or {}).get('questions') or [None]
+    for question in questions:
+        await asyncio.sleep(random.uniform(args.think_time * 0.5, args.think_time * 1.5) / len(questions))
+        if question is not None:
+            await client.call('answer', 'POST', f'/sessions/{code}/answers', retries=3,
+                              json={'question_id': question['id'], 'answer': random_answer(question)})
+    await client.call('play', 'POST', f'/sessions/{code}/submit-score', json={'score': round(random.uniform(0, 100), 1)})
+    play_done.release()
+
+    await client.call('results', 'GET', f'/sessions/{code}/results')
+    await client.call('results', 'GET', f'/sessions/{code}/participants')
+
+
+def random_answer(question):
+    """
+    Picks an answer for a /simulate question, right about a quarter of the time.
+    """
+    if question['type'] == 'multiple_choice':
+        return random.choice(question['options'])['id']
+    if question['type'] == 'slider':
+        return random.randint(question['min'], question['max'])
+    return random.choice(['answer', 'wrong', 'no idea', 'Answer'])
+
+
+def build_quiz_payload(num_questions):
+    """
+    Builds a quiz with a mix of all three question types.
+    """
+    questions = []
+    for i in range(num_questions):
+        kind = i % 3
+        if kind == 0:
+            questions.append({'type': 'multiple_choice', 'text': f'Load question {i}?',
+                              'options': [{'text': f'Option {j}', 'isCorrect': j == 0} for j in range(4)]})
+        elif kind == 1:
+            questions.append({'type': 'slider', 'text': f'Load slider {i}', 'min': 0, 'max': 100, 'step': 1,
+                              'correct_value': 42})
+        else:
+            questions.append({'type': 'text_input', 'text': f'Load text {i}', 'correct_answer': 'answer',
+                              'max_length': 50})
+    return {'name': f'Load quiz {random.randint(0, 10 ** 6)}', 'questions': questions}
+
+
+async def run_scenario(args):
+    """
+    Runs the full scenario and returns the per-phase statistics.
+    """
+    stats = {name: PhaseStats(name) for name in PHASE_ORDER}
+    connector = aiohttp.TCPConnector(limit=args.max_connections)
+    run_tag = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+    password = 'loadtest-pw'
+
+    host = LoadClient(args.base_url, connector, stats, args.timeout)
+    participants = [LoadClient(args.base_url, connector, stats, args.timeout) for _ in range(args.participants)]
+    all_clients = [host] + participants
+
+    try:
+        if not await register_and_login(host, f'lt{run_tag}host', password):
+            raise RuntimeError('Host could not log in; is the server reachable and the schema created?')
+
+        setup_gate = asyncio.Semaphore(args.setup_concurrency)
+
+        async def _setup(idx, client):
+            async with setup_gate:
+                await register_and_login(client, f'lt{run_tag}u{idx}', password)
+
+        await asyncio.gather(*(_setup(i, c) for i, c in enumerate(participants)))
+        participants = [c for c in participants if c.user_id is not None]
+
+        status, body = await host.call('setup', 'POST', '/quiz', json=build_quiz_payload(args.questions))
+        if status != 201:
+            raise RuntimeError(f'Could not create quiz (status {status})')
+        quiz_id = body['quiz_id']
+        status, body = await host.call('setup', 'POST', '/sessions', json={'quiz_id': quiz_id, 'num_teams': args.teams})
+        if status != 201:
+            raise RuntimeError(f'Could not create session (status {status})')
+        code = body['code']
+
+        lobby_stop = asyncio.Event()
+        background_stop = asyncio.Event()
+        started_event = asyncio.Event()
+        play_done = asyncio.Semaphore(0)
+        lobby_paths = [f'/sessions/{code}', f'/sessions/{code}/participants']
+
+        background = [asyncio.create_task(poll_loop(c, lobby_paths, args.poll_interval, lobby_stop))
+                      for c in [host] + participants]
+        background += [asyncio.create_task(poll_loop(c, ['/notifications/count'], args.notification_interval,
+                                                     background_stop, phase='notifications'))
+                       for c in participants]
+        words = [f'lt{run_tag}', 'load', 'quiz', f'lt{run_tag}u1']
+        searchers = participants[:max(1, int(len(participants) * args.search_fraction))]
+        background += [asyncio.create_task(search_typing(c, words, background_stop, args.keystroke_delay))
+                       for c in searchers]
+
+        lifecycles = [asyncio.create_task(participant_session(c, code, quiz_id, args, started_event, play_done))
+                      for c in participants]
+
+        await asyncio.sleep(max(args.lobby_seconds, args.join_window))
+        await host.call('start', 'POST', f'/sessions/{code}/start')
+        started_event.set()
+        lobby_stop.set()
+
+        await asyncio.gather(*lifecycles)
+        background_stop.set()
+        await asyncio.gather(*background)
+    finally:
+        await asyncio.gather(*(c.close() for c in all_clients))
+        await connector.close()
+    return stats
+
+
+def wait_for_port(host, port, timeout):
+    """
+    Blocks until something accepts TCP connections on host:port.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_gunicorn(args):
+    """
+    Starts a local gunicorn serving src/wsgi.py, mirroring service/webapp.service.
+    """
+    env = dict(os.environ)
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    cmd = [sys.executable, '-m', 'gunicorn', 'src.wsgi:app',
+           '--bind', f'127.0.0.1:{args.port}', '--workers', str(args.workers)]
+    cmd += args.gunicorn_arg or []
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, start_new_session=True)
+    if not wait_for_port('127.0.0.1', args.port, 30):
+        os.killpg(proc.pid, signal.SIGTERM)
+        raise RuntimeError('gunicorn did not start listening within 30 seconds')
+    return proc
+
+
+def create_tables(database_url):
+    """
+    Creates the schema in the target database (for fresh local databases).
+    """
+    sys.path.insert(0, REPO_ROOT)
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+    from src.backend.app import create_app
+    from src.backend.init_flask import db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+
+def print_report(stats):
+    header = f"{'phase':<14}{'reqs':>8}{'rps':>10}{'err%':>8}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}{'maxms':>10}"
+    print(header)
+    print('-' * len(header))
+    for name in PHASE_ORDER:
+        row = stats[name].summary()
+        if not row['requests']:
+            continue
+        print(f"{name:<14}{row['requests']:>8}{row['throughput_rps']:>10}{row['error_rate'] * 100:>8.2f}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default=None, help='Target server (default: the started gunicorn)')
+    parser.add_argument('--start-server', action='store_true', help='Start gunicorn locally for the run')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--gunicorn-arg', action='append', help='Extra argument passed to gunicorn (repeatable)')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--create-tables', action='store_true', help='Run db.create_all() before the scenario')
+    parser.add_argument('--participants', type=int, default=500)
+    parser.add_argument('--teams', type=int, default=1)
+    parser.add_argument('--questions', type=int, default=15)
+    parser.add_argument('--lobby-seconds', type=float, default=20.0)
+    parser.add_argument('--join-window', type=float, default=5.0, help='Participants join within this many seconds')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='Lobby poll interval of the frontend')
+    parser.add_argument('--notification-interval', type=float, default=10.0)
+    parser.add_argument('--think-time', type=float, default=10.0, help='Mean seconds spent answering the quiz')
+    parser.add_argument('--search-fraction', type=float, default=0.05, help='Share of participants typing searches')
+    parser.add_argument('--keystroke-delay', type=float, default=0.15)
+    parser.add_argument('--setup-concurrency', type=int, default=20)
+    parser.add_argument('--max-connections', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.base_url is None:
+        args.base_url = f'http://127.0.0.1:{args.port}'
+    if args.create_tables:
+        create_tables(args.database_url)
+
+    server = start_gunicorn(args) if args.start_server else None
+    try:
+        stats = asyncio.run(run_scenario(args))
+    finally:
+        if server is not None:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+
+    print_report(stats)
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump({'config': vars(args), 'phases': [stats[n].summary() for n in PHASE_ORDER]}, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# service/gunicorn.conf.py
+"""
+Gunicorn settings for the classic (threaded) workers.
+
+Each worker process serves ``GUNICORN_THREADS`` requests at once. Password hashes
+run in a process pool (src/backend/passwords.py), and the thread that waits for
+one does not hold up the other threads, so lobby polls keep being served during
+a burst of logins. The pool's admission limit (PASSWORD_HASH_QUEUE_LIMIT) counts
+the hashes of one worker. With the plain "sync" worker class, each worker would
+handle a single request, so the pool would free nothing and the limit would
+never be reached. Keep DB_POOL_SIZE + DB_MAX_OVERFLOW at least at the thread
+count.
+
+The app is preloaded in the master, so workers fork with the code already
+imported and start faster. Start it with:
+
+    gunicorn -c service/gunicorn.conf.py src.wsgi:app
+
+Anything the master opened during preload, such as pool connections, would be
+shared by every forked worker. ``post_fork`` therefore drops the inherited pool so
+each worker connects on its own (see src/backend/pooling.py).
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = 60
+graceful_timeout = 30
+
+preload_app = True
+
+
+def post_fork(server, worker):
+    from src.backend.pooling import dispose_engines
+    dispose_engines(server.app.wsgi())
+
+
+def worker_exit(server, worker):
+    # Write answers still buffered in this worker before it goes away (see src/backend/answer_buffer.py)
+    from src.backend.answer_buffer import shutdown_app
+    shutdown_app(server.app.wsgi())
@@ -0,0 +1,39 @@
+# service/gunicorn_gevent.conf.py
+"""
+Gunicorn settings for the cooperative (gevent) serving mode.
+
+Each worker serves requests in greenlets, so open lobby/notification connections
+cost a few KB each instead of a whole process. Start it with:
+
+    gunicorn -c service/gunicorn_gevent.conf.py src.wsgi:app
+
+See src/backend/cooperative.py for what the app adjusts in this mode.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+worker_class = "gevent"
+# Concurrent connections per worker (greenlets); 3 workers x 2000 = 6000 per node
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "2000"))
+
+# Keep idle keep-alive connections from nginx open instead of reconnecting per poll
+keepalive = 75
+timeout = 60
+graceful_timeout = 30
+
+# The app must be created after gevent has monkey-patched the worker, so it is
+# never preloaded in the (unpatched) master process.
+preload_app = False
+
+raw_env = [
+    "WORKER_MODE=gevent",
+    f"PASSWORD_HASH_WORKERS={os.environ.get('PASSWORD_HASH_WORKERS', max(1, multiprocessing.cpu_count() // workers))}",
+]
+
+
+def worker_exit(server, worker):
+    # Write answers still buffered in this worker before it goes away (see src/backend/answer_buffer.py)
+    from src.backend.answer_buffer import shutdown_app
+    shutdown_app(server.app.wsgi())
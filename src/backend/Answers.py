@@ -2,7 +2,7 @@
 Defines the database models for answers to different types of questions.
 Uses SQLAlchemy's single table inheritance pattern for different answer types (Text Input, Multiple Choice, Slider).
 """
-from .app import db
+from .init_flask import db
 from datetime import datetime
 
 class Answer(db.Model):
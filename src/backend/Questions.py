@@ -16,7 +16,7 @@ class Question(db.Model):
     """
     __tablename__ = 'questions'
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False, index=True)
     question_text = db.Column(db.String(1000), nullable=False)
     question_type = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -52,7 +52,8 @@ class MultipleChoiceQuestion(Question):
     options = db.relationship('MultipleChoiceOption',
                               backref='question', 
                               lazy='selectin',  # GEWIJZIGD
-                              cascade='all, delete-orphan')
+                              cascade='all, delete-orphan',
+                              order_by='MultipleChoiceOption.id')
 
     __mapper_args__ = {'polymorphic_identity': 'multiple_choice'}
 
@@ -107,6 +108,6 @@ class MultipleChoiceOption(db.Model):
     """
     __tablename__ = 'multiple_choice_options'
     id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('multiple_choice_questions.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('multiple_choice_questions.id', ondelete='CASCADE'), nullable=False, index=True)
     text = db.Column(db.String(255), nullable=False)
     is_correct = db.Column(db.Boolean, default=False, nullable=False)
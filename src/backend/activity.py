@@ -0,0 +1,205 @@
+# src/backend/activity.py
+"""
+Per-user activity timeline for quiz sessions.
+
+``GET /recently-played-quizzes`` used to join sessions, quizzes, users and
+participants and sort the result by session date. It then walked every
+participant of every listed session to find the user's team. ``user_activity``
+keeps one row per user and session instead, with the fields the list shows
+copied in:
+
+    role 'hosted'   written when the user creates a session
+    role 'played'   written when the user joins; team and score are updated
+                    when they switch team or submit a score
+
+Rows become visible once the session starts (``mark_started``). The routes write
+them in the same transaction as the change they record. ``recent_for`` pages
+through them with a keyset cursor on ``(occurred_at, id)``, which is one range
+read on ``ix_user_activity_user_id_occurred_at_id`` at any depth. Quiz name and
+creator are joined in by primary key, so renames and avatar changes show up
+right away.
+
+Sessions loaded outside the routes (``flask seed``) are backfilled with
+``rebuild()`` or ``flask activity rebuild``.
+"""
+from datetime import datetime, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, literal, select, tuple_, update
+
+from .init_flask import db
+from .session import QuizSession, SessionParticipant
+
+ROLE_PLAYED = 'played'
+ROLE_HOSTED = 'hosted'
+
+
+class UserActivity(db.Model):
+    """
+    One session in a user's timeline.
+
+    Attributes:
+        user_id (int): Whose timeline this is.
+        session_id (int): The session.
+        role (str): 'played' or 'hosted'.
+        occurred_at (datetime): When the session was created (the timeline's sort key).
+        started (bool): Whether the session has started; only started sessions are listed.
+        team_number (int, optional): The player's team.
+        score (float, optional): The player's score.
+    """
+    __tablename__ = 'user_activity'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('quiz_sessions.id', ondelete='CASCADE'), nullable=False)
+    role = db.Column(db.String(10), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    session_code = db.Column(db.String(10), nullable=False)
+    num_teams = db.Column(db.Integer, default=1, nullable=False)
+    team_number = db.Column(db.Integer)
+    score = db.Column(db.Float)
+    started = db.Column(db.Boolean, default=False, nullable=False)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'session_id', 'role', name='_activity_user_session_role_uc'),
+                      db.Index('ix_user_activity_user_id_occurred_at_id', 'user_id', 'occurred_at', 'id'),
+                      db.Index('ix_user_activity_session_id', 'session_id'))
+
+
+def _entry(quiz_session, user_id, role, team_number=None):
+    return UserActivity(user_id=user_id, session_id=quiz_session.id, role=role, quiz_id=quiz_session.quiz_id,
+                        session_code=quiz_session.code, num_teams=quiz_session.num_teams, team_number=team_number,
+                        started=bool(quiz_session.started),
+                        occurred_at=quiz_session.created_at or datetime.utcnow())
+
+
+def record_hosted(quiz_session):
+    """
+    Adds the host's entry for a new session (flushes to get the session id).
+    """
+    db.session.flush()
+    db.session.add(_entry(quiz_session, quiz_session.host_id, ROLE_HOSTED))
+
+
+def record_joined(quiz_session, participant):
+    """
+    Adds or updates the player's entry when they join or switch team.
+    """
+    updated = (UserActivity.query
+               .filter_by(user_id=participant.user_id, session_id=quiz_session.id, role=ROLE_PLAYED)
+               .update({'team_number': participant.team_number}, synchronize_session=False))
+    if not updated:
+        db.session.add(_entry(quiz_session, participant.user_id, ROLE_PLAYED, participant.team_number))
+
+
+def record_score(quiz_session_id, user_id, score):
+    """
+    Stores a player's submitted score in their entry.
+    """
+    db.session.execute(update(UserActivity).where(
+        UserActivity.user_id == user_id, UserActivity.session_id == quiz_session_id,
+        UserActivity.role == ROLE_PLAYED).values(score=score))
+
+
+def mark_started(quiz_session_id):
+    """
+    Makes every entry of a session visible once it starts.
+    """
+    db.session.execute(update(UserActivity).where(UserActivity.session_id == quiz_session_id).values(started=True))
+
+
+def encode_cursor(occurred_at, entry_id):
+    return f"{occurred_at.isoformat()}_{entry_id}"
+
+
+def decode_cursor(cursor):
+    """
+    Parses a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: For a malformed cursor.
+    """
+    timestamp, _, entry_id = cursor.rpartition('_')
+    return datetime.fromisoformat(timestamp), int(entry_id)
+
+
+def recent_for(user_id, limit, before=None):
+    """
+    Lists a user's started sessions, newest first.
+
+    Args:
+        user_id (int): Whose timeline.
+        limit (int): Page size.
+        before (tuple, optional): ``(occurred_at, id)`` of the last entry of the previous page.
+
+    Returns:
+        tuple: (list of dicts in the recently-played format, next cursor or None).
+    """
+    users, quizzes = db.metadata.tables['users'], db.metadata.tables['quizzes']
+    activity = UserActivity.__table__
+    stmt = (select(activity, quizzes.c.name.label('quiz_name'), quizzes.c.user_id.label('quiz_creator_id'),
+                   users.c.username.label('quiz_creator_username'), users.c.avatar.label('quiz_creator_avatar'))
+            .join(quizzes, quizzes.c.id == activity.c.quiz_id)
+            .outerjoin(users, users.c.id == quizzes.c.user_id)
+            .where(activity.c.user_id == user_id, activity.c.started.is_(True))
+            .order_by(activity.c.occurred_at.desc(), activity.c.id.desc())
+            .limit(limit + 1))
+    if before is not None:
+        stmt = stmt.where(tuple_(activity.c.occurred_at, activity.c.id) < tuple_(*before))
+    rows = db.session.execute(stmt).all()
+
+    entries = [{
+        'session_id': row.session_id,
+        'session_code': row.session_code,
+        'quiz_id': row.quiz_id,
+        'quiz_name': row.quiz_name,
+        'quiz_creator_id': row.quiz_creator_id,
+        'quiz_creator_username': row.quiz_creator_username,
+        'quiz_creator_avatar': row.quiz_creator_avatar,
+        'played_at': row.occurred_at.replace(tzinfo=timezone.utc).isoformat(),
+        'role': row.role,
+        'score': (row.score if row.score is not None else 0.0) if row.role == ROLE_PLAYED else None,
+        'is_team_mode': row.num_teams > 1,
+        'team_number': row.team_number,
+    } for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].occurred_at, rows[limit - 1].id) if len(rows) > limit else None
+    return entries, next_cursor
+
+
+def rebuild(session=None):
+    """
+    Recreates user_activity from quiz_sessions and session_participants.
+    """
+    session = session or db.session
+    table, sessions, participants = UserActivity.__table__, QuizSession.__table__, SessionParticipant.__table__
+    columns = ['user_id', 'session_id', 'role', 'quiz_id', 'session_code', 'num_teams', 'team_number', 'score',
+               'started', 'occurred_at']
+    common = (sessions.c.quiz_id, sessions.c.code, sessions.c.num_teams)
+    occurred = func.coalesce(sessions.c.created_at, func.now())
+    started = func.coalesce(sessions.c.started, False)
+    session.execute(delete(table))
+    session.execute(insert(table).from_select(columns, select(
+        sessions.c.host_id, sessions.c.id, literal(ROLE_HOSTED), *common, literal(None), literal(None),
+        started, occurred)))
+    session.execute(insert(table).from_select(columns, select(
+        participants.c.user_id, sessions.c.id, literal(ROLE_PLAYED), *common, participants.c.team_number,
+        participants.c.score, started, occurred).join(participants, participants.c.session_id == sessions.c.id)))
+
+
+def init_app(app):
+    app.cli.add_command(activity_cli)
+
+
+@click.group('activity')
+def activity_cli():
+    """Manage the user activity timeline."""
+
+
+@activity_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Rebuild user_activity from the session tables."""
+    db.session.execute(db.text("SET LOCAL statement_timeout = 0"))
+    rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt {db.session.query(UserActivity).count()} activity rows")
@@ -0,0 +1,415 @@
+# src/backend/answer_buffer.py
+"""
+Write-behind buffer for answers submitted during a live session.
+
+When a question is live, every participant answers within a few seconds.
+Giving each answer its own ORM flush and commit means several round trips and a
+WAL flush per answer, hundreds of times a second. ``AnswerBuffer`` groups them
+instead. Requests append their rows to a per-process queue. A flusher thread
+writes up to ``ANSWER_BUFFER_BATCH_ROWS`` rows at a time in one transaction,
+as soon as a batch is full or ``ANSWER_BUFFER_FLUSH_MS`` after its first row
+arrived:
+
+    nextval() x n          ids for the whole batch in one statement
+    INSERT ... VALUES      one multi-row statement for ``answers`` and one per
+                           subtype table (text/multiple choice/slider)
+    COMMIT
+
+Multi-row INSERTs are used rather than COPY because psycopg2 cannot COPY in the
+gevent workers (see cooperative.py). They are built with SQLAlchemy Core, so both
+drivers that pooling.py supports (psycopg2 and psycopg 3) can run them.
+
+Guarantees:
+    group commit   ``submit`` returns a ticket that is set once the batch holding
+                   its rows has committed. Routes wait on it (up to
+                   ``ANSWER_BUFFER_COMMIT_TIMEOUT``), so a 201 means the answers are
+                   stored. On timeout the rows stay queued and the route answers 202.
+    back-pressure  At most ``ANSWER_BUFFER_MAX_PENDING`` rows wait at a time. While
+                   the database is slow or down (connection errors), failed batches
+                   are retried with backoff and new submissions fail fast with
+                   ``AnswerBufferFull`` (503 + Retry-After), as with the hashing pool.
+    bad rows       A row the database refuses, e.g. an answer to a question or
+                   option that an edit of the quiz just deleted, must not block
+                   the rows behind it. The batch is split with savepoints until the
+                   offending rows are found. Those are logged and dropped, their
+                   tickets report them as ``rejected``, and the rest commits. Any
+                   other error spills the batch to disk and rejects it.
+    shutdown       ``shutdown()`` runs from gunicorn's ``worker_exit`` hook and at
+                   interpreter exit. It stops the flusher and writes what is left.
+                   Rows that still cannot be written are spilled as JSON lines to
+                   ``ANSWER_BUFFER_SPILL_DIR``, and ``flask answers replay``
+                   loads them later.
+
+With ``ANSWER_BUFFER_FLUSH_MS = 0`` every submission is written inline (tests,
+scripts).
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, InterfaceError, OperationalError
+
+from .init_flask import db
+from .Answers import Answer, TextInputAnswer, MultipleChoiceAnswer, SliderAnswer
+
+_SUBTYPE_TABLES = {
+    'text_input': (TextInputAnswer.__table__, 'text'),
+    'multiple_choice': (MultipleChoiceAnswer.__table__, 'option_id'),
+    'slider': (SliderAnswer.__table__, 'value'),
+}
+
+
+class AnswerBufferFull(Exception):
+    """
+    Raised when too many answers are waiting to be written and the request should be rejected.
+    """
+
+
+# Errors that concern the rows themselves; retrying the same rows cannot succeed
+_ROW_ERRORS = (IntegrityError, DataError)
+
+
+def _is_transient(error):
+    # Lost or refused connections; the same batch may well succeed on the next attempt
+    return isinstance(error, DBAPIError) and (error.connection_invalidated
+                                              or isinstance(error, (OperationalError, InterfaceError)))
+
+
+class Ticket:
+    """
+    Completion flag for the rows of one ``submit`` call.
+
+    Attributes:
+        rejected (int): Rows that were not stored (refused by the database or spilled).
+    """
+
+    def __init__(self, pending):
+        self._event = threading.Event()
+        self._pending = pending
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _done(self, count, rejected=0):
+        with self._lock:
+            self._pending -= count + rejected
+            self.rejected += rejected
+            if self._pending <= 0:
+                self._event.set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until every row is committed or rejected.
+
+        Returns:
+            bool: True if they are, False on timeout.
+        """
+        return self._event.wait(timeout)
+
+
+def write_rows(connection, rows):
+    """
+    Inserts answer rows with one statement per table; the caller commits.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection with an open transaction.
+        rows (list): ``(user_id, question_id, answer_type, value, answered_at)`` tuples.
+    """
+    ids = connection.execute(
+        select(func.nextval(func.pg_get_serial_sequence('answers', 'id'))).select_from(func.generate_series(1, len(rows)))
+    ).scalars().all()
+    connection.execute(insert(Answer.__table__).values([
+        {'id': answer_id, 'user_id': user_id, 'question_id': question_id, 'answered_at': answered_at,
+         'answer_type': answer_type}
+        for answer_id, (user_id, question_id, answer_type, _, answered_at) in zip(ids, rows)
+    ]))
+    for answer_type, (table, column) in _SUBTYPE_TABLES.items():
+        values = [{'id': answer_id, column: value} for answer_id, (_, _, row_type, value, _) in zip(ids, rows)
+                  if row_type == answer_type]
+        if values:
+            connection.execute(insert(table).values(values))
+
+
+def write_rows_checked(connection, rows):
+    """
+    Writes answer rows, leaving out the ones the database refuses; the caller commits.
+
+    The whole batch is tried first. On an integrity or data error the transaction is
+    rolled back, and the batch is written again in halves under savepoints, down to
+    the single rows that fail.
+
+    Returns:
+        list: ``(index, error)`` of the rows left out.
+    """
+    try:
+        write_rows(connection, rows)
+        return []
+    except _ROW_ERRORS:
+        connection.rollback()
+
+    rejected = []
+
+    def attempt(start, end):
+        savepoint = connection.begin_nested()
+        try:
+            write_rows(connection, rows[start:end])
+        except _ROW_ERRORS as e:
+            savepoint.rollback()
+            if end - start == 1:
+                rejected.append((start, e))
+            else:
+                middle = (start + end) // 2
+                attempt(start, middle)
+                attempt(middle, end)
+        else:
+            savepoint.commit()
+
+    attempt(0, len(rows))
+    return rejected
+
+
+class AnswerBuffer:
+    """
+    Per-process answer queue with a background flusher.
+
+    Like the feed fan-out pool, the flusher thread starts lazily and again after a fork.
+
+    Args:
+        app: The Flask app (its engine is used for writes).
+        batch_rows (int): Most rows written per transaction.
+        flush_interval (float): Seconds a row may wait for its batch to fill (0 = write inline).
+        max_pending (int): Most rows queued at once before submissions are rejected.
+        spill_dir (str): Where rows that cannot be written at shutdown are saved.
+    """
+
+    def __init__(self, app, batch_rows=500, flush_interval=0.005, max_pending=20000, spill_dir=None):
+        self.app = app
+        self.batch_rows = max(1, batch_rows)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_rows, max_pending)
+        self.spill_dir = spill_dir
+        self._cond = threading.Condition()
+        self._queue = []  # (row, ticket)
+        self._first_queued_at = None
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._atexit_registered = False
+        self.batches_written = 0
+        self.rows_written = 0
+        self.rows_rejected = 0
+
+    def _ensure_flusher(self):
+        # Called with self._cond held
+        if self._thread is None or self._pid != os.getpid():
+            self._queue, self._first_queued_at, self._stopping = [], None, False  # Not ours after a fork
+            self._thread = threading.Thread(target=self._flush_loop, name='answer-buffer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def submit(self, rows):
+        """
+        Queues answer rows for writing.
+
+        Args:
+            rows (list): ``(user_id, question_id, answer_type, value, answered_at)`` tuples.
+
+        Returns:
+            Ticket: Set once every row is committed.
+
+        Raises:
+            AnswerBufferFull: If the queue has no room for the rows.
+        """
+        ticket = Ticket(len(rows))
+        if not rows:
+            ticket._done(0)
+            return ticket
+        if self.flush_interval <= 0:
+            self._write([(row, ticket) for row in rows])
+            return ticket
+
+        with self._cond:
+            self._ensure_flusher()
+            if self._stopping or len(self._queue) + len(rows) > self.max_pending:
+                raise AnswerBufferFull("Answer buffer is full")
+            if not self._queue:
+                self._first_queued_at = time.monotonic()
+            self._queue.extend((row, ticket) for row in rows)
+            self._cond.notify()
+        return ticket
+
+    def _write(self, items):
+        with self.app.app_context():
+            connection = db.engine.connect()
+            try:
+                rejected = write_rows_checked(connection, [row for row, _ in items])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.close()
+        for index, error in rejected:
+            print(f"Dropping answer {items[index][0]!r}: {str(error.orig).strip()}")
+        self.batches_written += 1
+        self.rows_written += len(items) - len(rejected)
+        self.rows_rejected += len(rejected)
+        self._settle(items, {index for index, _ in rejected})
+
+    @staticmethod
+    def _settle(items, rejected_indexes):
+        counts = {}
+        for index, (_, ticket) in enumerate(items):
+            stored, rejected = counts.get(ticket, (0, 0))
+            counts[ticket] = (stored, rejected + 1) if index in rejected_indexes else (stored + 1, rejected)
+        for ticket, (stored, rejected) in counts.items():
+            ticket._done(stored, rejected)
+
+    def _take_batch(self):
+        # Called with self._cond held; waits until a batch is due or the buffer stops
+        while True:
+            if self._queue:
+                due = self._first_queued_at + self.flush_interval
+                if self._stopping or len(self._queue) >= self.batch_rows or time.monotonic() >= due:
+                    batch, self._queue = self._queue[:self.batch_rows], self._queue[self.batch_rows:]
+                    self._first_queued_at = time.monotonic() if self._queue else None
+                    return batch
+                self._cond.wait(due - time.monotonic())
+            elif self._stopping:
+                return None
+            else:
+                self._cond.wait()
+
+    def _flush_loop(self):
+        backoff = 0.05
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+                backoff = 0.05
+            except Exception as e:
+                if not _is_transient(e):
+                    # Retrying would block every answer behind this batch; keep it on disk instead
+                    print(f"Error writing {len(batch)} buffered answers, spilling them: {e}")
+                    self._spill_items(batch)
+                    continue
+                print(f"Error writing {len(batch)} buffered answers, retrying: {e}")
+                with self._cond:
+                    self._queue[:0] = batch  # Keep their place; the queue limit now pushes back
+                    self._first_queued_at = time.monotonic()
+                    if self._stopping:
+                        return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 2.0)
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self, timeout=10.0):
+        """
+        Stops the flusher and writes what is left; spills the rest to disk if that fails.
+
+        Returns:
+            int: Number of rows spilled (0 when everything was written).
+        """
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return 0
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        thread.join(timeout)
+        with self._cond:
+            leftover, self._queue = self._queue, []
+            self._thread = None
+        if not leftover:
+            return 0
+        try:
+            self._write(leftover)
+            return 0
+        except Exception as e:
+            print(f"Error writing {len(leftover)} buffered answers at shutdown, spilling them: {e}")
+            return self._spill_items(leftover)
+
+    def _spill_items(self, items):
+        try:
+            return self._spill([row for row, _ in items])
+        finally:
+            self.rows_rejected += len(items)
+            self._settle(items, set(range(len(items))))
+
+    def _spill(self, rows):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"answers-{os.getpid()}-{uuid.uuid4().hex}.jsonl")
+        with open(path, 'w') as fh:
+            for user_id, question_id, answer_type, value, answered_at in rows:
+                fh.write(json.dumps([user_id, question_id, answer_type, value, answered_at.isoformat()]) + '\n')
+        print(f"Spilled {len(rows)} answers to {path}; load them with `flask answers replay`")
+        return len(rows)
+
+
+def init_app(app):
+    app.extensions['answer_buffer'] = AnswerBuffer(
+        app,
+        batch_rows=app.config.get('ANSWER_BUFFER_BATCH_ROWS', 500),
+        flush_interval=app.config.get('ANSWER_BUFFER_FLUSH_MS', 5) / 1000.0,
+        max_pending=app.config.get('ANSWER_BUFFER_MAX_PENDING', 20000),
+        spill_dir=app.config.get('ANSWER_BUFFER_SPILL_DIR'),
+    )
+    app.cli.add_command(answers_cli)
+
+
+def get_buffer():
+    return current_app.extensions['answer_buffer']
+
+
+def shutdown_app(app):
+    """
+    Drains the app's answer buffer (for gunicorn's ``worker_exit`` hook).
+    """
+    buffer = app.extensions.get('answer_buffer')
+    if buffer is not None:
+        buffer.shutdown()
+
+
+@click.group('answers')
+def answers_cli():
+    """Manage buffered answers."""
+
+
+@answers_cli.command('replay')
+@with_appcontext
+def replay_command():
+    """Write answers spilled at shutdown and remove their files."""
+    spill_dir = current_app.extensions['answer_buffer'].spill_dir
+    total = 0
+    for path in sorted(glob.glob(os.path.join(spill_dir, 'answers-*.jsonl'))):
+        with open(path) as fh:
+            rows = [(user_id, question_id, answer_type, value, datetime.fromisoformat(answered_at))
+                    for user_id, question_id, answer_type, value, answered_at in map(json.loads, fh)]
+        connection = db.engine.connect()
+        try:
+            rejected = write_rows_checked(connection, rows) if rows else []
+            connection.commit()
+        finally:
+            connection.close()
+        for index, error in rejected:
+            click.echo(f"Skipped answer {rows[index]!r}: {str(error.orig).strip()}")
+        os.remove(path)
+        total += len(rows) - len(rejected)
+    click.echo(f"Replayed {total} answers")
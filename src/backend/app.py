@@ -5,18 +5,27 @@ Main application module for the Aquimemni backend.
 This module defines the database models, API routes, and business logic for the quiz application.
 It includes user authentication, quiz management, session handling, and notification systems.
 """
+import math
 import random
 import string
 from datetime import datetime, timedelta, timezone # Added timezone
 import re
 
 from flask import Flask, request, jsonify, session, current_app
-from sqlalchemy import or_, and_
+from flask_session import Session
+from sqlalchemy import or_, and_, func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from .init_flask import db, migrate, main_bp
+from . import passwords, auth, session_store, cooperative, pooling, routing, responses, read_models, quiz_documents
+from . import question_reads, grading, batch, activity, feed, quiz_stats, question_stats
+from . import answer_buffer, live_sessions, events, session_cache, sharding
+from .passwords import HashingBusy
+from .answer_buffer import AnswerBufferFull
+from .sharding import StaleOwner
+from .auth import Principal, current_principal, login_principal, invalidate_principal
+from .field_selection import parse_field_selection
 from .config import Config
 from flask_cors import CORS
 
@@ -26,10 +35,15 @@ from .Questions import (
 )
 from .session import QuizSession, SessionParticipant as session_models_SessionParticipant  # Renamed to avoid conflict with Flask's session
 from .notifications import Notification # Import Notification model
+from .question_reads import QuestionRead
+from .quiz_stats import QuizStats
+from .seed import seed_command
 
 followers = db.Table('followers',
     db.Column('follower_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
-    db.Column('followed_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    db.Column('followed_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    # The primary key leads with follower_id; this index serves the reverse direction (followers of X)
+    db.Index('ix_followers_followed_id_follower_id', 'followed_id', 'follower_id')
 )
 
 class User(db.Model):
@@ -75,7 +89,7 @@ class User(db.Model):
         Args:
             password (str): The plain text password to hash and store.
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.get_hasher().hash(password)
 
     def check_password(self, password):
         """
@@ -87,7 +101,16 @@ class User(db.Model):
         Returns:
             bool: True if the password matches, False otherwise.
         """
-        return check_password_hash(self.password_hash, password)
+        return passwords.get_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """
+        Checks whether the stored hash uses other parameters than PASSWORD_HASH_METHOD.
+
+        Returns:
+            bool: True if the password should be rehashed after the next successful login.
+        """
+        return passwords.get_hasher().needs_rehash(self.password_hash)
 
     def is_following(self, other_user):
         """
@@ -119,6 +142,7 @@ class User(db.Model):
                     notification_type='new_follower'
                 )
                 db.session.add(notification)
+                events.publish(db.session, events.user_topic(other_user.id), 'notification', type='new_follower')
 
     def unfollow(self, other_user):
         """
@@ -158,7 +182,9 @@ class Quiz(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # GEWIJZIGD: lazy='selectin' voor efficiënt laden van vragen
-    questions = db.relationship('Question', backref='quiz', lazy='selectin', cascade='all, delete-orphan')
+    questions = db.relationship('Question', backref='quiz', lazy='selectin', cascade='all, delete-orphan', order_by='Question.id')
+
+    __table_args__ = (db.Index('ix_quizzes_user_id_created_at', 'user_id', 'created_at'),)
     sessions = db.relationship('QuizSession', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
 
 
@@ -180,78 +206,143 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     CORS(app, supports_credentials=True, origins=["http://localhost:3000"])
+    responses.init_app(app)    # orjson provider and gzip/brotli for large bodies
+    cooperative.init_app(app)  # Engine and hashing settings for gevent workers, before db.init_app
+    pooling.configure(app)     # Pool profile (direct / pgbouncer), also before db.init_app
+    routing.configure(app)     # Read replicas as extra binds
     db.init_app(app)
+    pooling.init_app(app)
+    routing.init_app(app, db)
     migrate.init_app(app, db)
+    passwords.init_app(app)
+    if app.config.get('SESSION_TYPE') == 'sql':
+        session_store.init_app(app)
+    else:
+        Session(app)
+    auth.init_app(app, load_principal_record)
 
     app.register_blueprint(main_bp)
+    app.cli.add_command(seed_command)
+    question_reads.init_app(app)
+    activity.init_app(app)
+    feed.init_app(app)
+    quiz_stats.init_app(app)
+    question_stats.init_app(app)
+    answer_buffer.init_app(app)
+    live_sessions.init_app(app)
+    events.init_app(app)
+    session_cache.init_app(app)  # Subscribes to the event hub
+    sharding.init_app(app)
 
     return app
 
+def load_principal_record(user_id):
+    """
+    Loads the minimal user record used by the authentication layer.
+
+    Only the columns the principal needs are selected, so no User entity is built.
+
+    Args:
+        user_id (int): The id stored in the session.
+
+    Returns:
+        Principal or None: The record, or None if the user no longer exists.
+    """
+    row = db.session.query(User.id, User.username, User.avatar, User.password_hash).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return Principal(row.id, row.username, row.avatar, auth.credential_tag(row.password_hash))
+
+def _followed_ids_among(follower_id, candidate_ids):
+    """
+    Returns which of the candidate users are followed by follower_id, in one query.
+    """
+    if not candidate_ids: return set()
+    return {row[0] for row in db.session.query(followers.c.followed_id).filter(
+        followers.c.follower_id == follower_id, followers.c.followed_id.in_(candidate_ids))}
+
 # --- ROUTES ---
 
+@main_bp.errorhandler(HashingBusy)
+def handle_hashing_busy(error):
+    # Reject fast instead of letting the worker wait for a saturated hashing pool
+    response = jsonify({"error": "Server is busy, please try again in a moment"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@main_bp.errorhandler(AnswerBufferFull)
+def handle_answer_buffer_full(error):
+    # The database is behind on answer writes; clients retry instead of piling up more
+    response = jsonify({"error": "Server is busy, please try again in a moment"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@main_bp.errorhandler(StaleOwner)
+def handle_stale_owner(error):
+    # Another node took this session over in a rebalance; send the client there
+    db.session.rollback()
+    return sharding.misdirected(request.view_args.get('session_code_param', ''))
+
+PROFILE_SUMMARY_FIELDS = ('id', 'username', 'bio', 'avatar', 'registered_at', 'is_following', 'viewing_own_profile',
+                          'followers_count', 'following_count', 'banner_type', 'banner_value', 'notifications_enabled')
+PROFILE_VIEWS = {'summary': PROFILE_SUMMARY_FIELDS, 'full': PROFILE_SUMMARY_FIELDS + ('quizzes',)}
+
 @main_bp.route('/users/<int:user_id_param>/profile', methods=['GET'])
 def get_public_profile(user_id_param):
-    profile_user = db.session.query(User).options(
-        db.selectinload(User.quizzes)
-    ).get(user_id_param)
+    try:
+        selection = parse_field_selection(request.args, PROFILE_VIEWS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    profile_user = db.session.get(User, user_id_param)
     if not profile_user:
         return jsonify({"error": "User not found"}), 404
 
     is_following_profile_user = False
-    current_user_session_id = session.get('user_id')
+    principal = current_principal()
     viewing_own_profile = False
 
-    if current_user_session_id:
-        current_user_obj = db.session.get(User, current_user_session_id)
-        if current_user_obj:
-            if current_user_obj.id == profile_user.id:
-                viewing_own_profile = True
-            else:
-                is_following_profile_user = current_user_obj.is_following(profile_user)
-        else:
-            session.clear()
-
-    public_quizzes_data = []
-    for quiz_item in profile_user.quizzes:
-        aware_created_at = quiz_item.created_at.replace(tzinfo=timezone.utc) if quiz_item.created_at else None
-        public_quizzes_data.append({
-            "id": quiz_item.id, "name": quiz_item.name,
-            "created_at": aware_created_at.isoformat() if aware_created_at else None,
-            "questions_count": len(quiz_item.questions)
-        })
+    if principal:
+        if principal.id == profile_user.id:
+            viewing_own_profile = True
+        elif selection.wants('is_following'):
+            is_following_profile_user = bool(_followed_ids_among(principal.id, [profile_user.id]))
 
     aware_registered_at = profile_user.registered_at.replace(tzinfo=timezone.utc) if profile_user.registered_at else None
-    return jsonify({
+    profile_data = {
         "id": profile_user.id, "username": profile_user.username, "bio": profile_user.bio,
         "avatar": profile_user.avatar,
         "registered_at": aware_registered_at.isoformat() if aware_registered_at else None,
         "is_following": is_following_profile_user, "viewing_own_profile": viewing_own_profile,
-        "quizzes": public_quizzes_data,
-        "followers_count": profile_user.followers.count(),
-        "following_count": profile_user.followed.count(),
         "banner_type": profile_user.banner_type, "banner_value": profile_user.banner_value,
         "notifications_enabled": profile_user.notifications_enabled # Added for consistency
-    }), 200
+    }
+    # Only run the queries for the parts that were asked for
+    if selection.wants('quizzes'):
+        profile_data["quizzes"] = _quiz_summaries(Quiz.user_id == profile_user.id)
+    if selection.wants('followers_count'):
+        profile_data["followers_count"] = profile_user.followers.count()
+    if selection.wants('following_count'):
+        profile_data["following_count"] = profile_user.followed.count()
+    return jsonify(selection.project(profile_data)), 200
 
 @main_bp.route('/users/search', methods=['GET'])
 def search_users():
-    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
-    current_user_obj = db.session.get(User, session['user_id'])
-    if not current_user_obj:
-        session.clear(); return jsonify({"error": "Invalid session"}), 401
+    principal = current_principal()
+    if principal is None: return jsonify({"error": "Not logged in"}), 401
 
     search_query = request.args.get('q', '').strip().lower()
     if not search_query: return jsonify([]), 200
     sanitized_query = search_query.replace('%', '\\%').replace('_', '\\_')
 
     users_list = User.query.filter(
-        User.username.ilike(f'{sanitized_query}%'), User.id != current_user_obj.id
+        User.username.ilike(f'{sanitized_query}%'), User.id != principal.id
     ).order_by(User.username.asc()).limit(10).all()
+    followed_ids = _followed_ids_among(principal.id, [u.id for u in users_list])
 
     return jsonify([{
         "id": u.id, "username": u.username, "avatar": u.avatar,
-        "is_following": current_user_obj.is_following(u)
+        "is_following": u.id in followed_ids
     } for u in users_list]), 200
 
 @main_bp.route('/quizzes/search', methods=['GET'])
@@ -262,36 +353,42 @@ def search_quizzes():
     if not q_search: return jsonify([]), 200
 
     name_pattern = f"{q_search}%"; user_pattern = f"{q_search}%"
-    quizzes_list = (Quiz.query.join(User)
-               .options(joinedload(Quiz.user),
-                        db.selectinload(Quiz.questions))
+    questions_count = (db.session.query(func.count(QuestionRead.id)).filter(QuestionRead.quiz_id == Quiz.id)
+                       .correlate(Quiz).scalar_subquery())
+    # Most played first; stats come from the batch-computed quiz_stats table
+    quizzes_list = (db.session.query(Quiz, questions_count, QuizStats).join(User)
+               .outerjoin(QuizStats, QuizStats.quiz_id == Quiz.id)
+               .options(joinedload(Quiz.user))
                .filter(Quiz.user_id != current_user_id,
                        or_(Quiz.name.ilike(name_pattern), User.username.ilike(user_pattern)))
-               .order_by(Quiz.name.asc()).limit(10).all())
+               .order_by(func.coalesce(QuizStats.unique_players, 0).desc(), Quiz.name.asc()).limit(10).all())
 
+    rate = quiz_stats.decay_rate()
     results = []
-    for quiz_item in quizzes_list:
+    for quiz_item, quiz_questions_count, stats in quizzes_list:
         aware_created_at = quiz_item.created_at.replace(tzinfo=timezone.utc) if quiz_item.created_at else None
         results.append({
             "id": quiz_item.id, "name": quiz_item.name,
             "creator": quiz_item.user.username if quiz_item.user else 'Unknown',
             "creator_avatar": quiz_item.user.avatar if quiz_item.user else None,
             "created_at": aware_created_at.isoformat() if aware_created_at else None,
-            "questions_count": len(quiz_item.questions)
+            "questions_count": quiz_questions_count,
+            **quiz_stats.to_dict(stats, rate)
         })
     return jsonify(results), 200
 
+@main_bp.route('/quizzes/trending', methods=['GET'])
+def get_trending_quizzes():
+    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
+    limit_val = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify(quiz_stats.trending(limit_val, quiz_stats.decay_rate())), 200
+
 @main_bp.route('/users/all', methods=['GET'])
 def get_all_users():
-    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
-    current_user_obj = db.session.get(User, session['user_id'])
-    if not current_user_obj: session.clear(); return jsonify({"error": "Invalid session"}), 401
+    principal = current_principal()
+    if principal is None: return jsonify({"error": "Not logged in"}), 401
 
-    users_list = User.query.filter(User.id != current_user_obj.id).order_by(User.username.asc()).all()
-    return jsonify([{
-        "id": u.id, "username": u.username, "avatar": u.avatar,
-        "is_following": current_user_obj.is_following(u)
-    } for u in users_list]), 200
+    return jsonify([u.to_dict() for u in read_models.all_users(principal.id)]), 200
 
 @main_bp.route('/users/invitable', methods=['GET'])
 def get_invitable_users():
@@ -337,6 +434,7 @@ def follow_user(user_id_to_follow):
 
     current_user_obj.follow(user_to_follow_obj)
     try:
+        feed.backfill(current_user_id_val, user_to_follow_obj.id)
         db.session.commit()
         return jsonify({"message": f"Now following {user_to_follow_obj.username}"}), 200
     except Exception as e:
@@ -356,6 +454,7 @@ def unfollow_user(user_id_to_unfollow):
 
     current_user_obj.unfollow(user_to_unfollow_obj)
     try:
+        feed.forget(current_user_id_val, user_to_unfollow_obj.id)
         db.session.commit()
         return jsonify({"message": f"Unfollowed {user_to_unfollow_obj.username}"}), 200
     except Exception as e:
@@ -377,6 +476,7 @@ def remove_follower(follower_id_to_remove):
 
     current_user_obj.remove_follower(follower_to_remove_obj)
     try:
+        feed.forget(follower_id_to_remove, current_user_id_val)
         db.session.commit()
         return jsonify({"message": f"Removed {follower_to_remove_obj.username} from your followers"}), 200
     except Exception as e:
@@ -385,24 +485,40 @@ def remove_follower(follower_id_to_remove):
 
 @main_bp.route('/followers', methods=['GET'])
 def get_followers_list():
-    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
-    current_user_obj = db.session.get(User, session['user_id'])
-    if not current_user_obj: session.clear(); return jsonify({"error": "Invalid session"}), 401
+    principal = current_principal()
+    if principal is None: return jsonify({"error": "Not logged in"}), 401
 
-    return jsonify([{
-        "id": u.id, "username": u.username, "avatar": u.avatar,
-        "is_following": current_user_obj.is_following(u)
-    } for u in current_user_obj.followers.all()]), 200
+    return jsonify([u.to_dict() for u in read_models.followers_of(principal.id)]), 200
 
 
 @main_bp.route('/following', methods=['GET'])
 def get_following_list():
-    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
-    current_user_obj = db.session.get(User, session['user_id'])
-    if not current_user_obj: session.clear(); return jsonify({"error": "Invalid session"}), 401
+    principal = current_principal()
+    if principal is None: return jsonify({"error": "Not logged in"}), 401
+
+    return jsonify([u.to_dict(with_following=False) for u in read_models.followed_by(principal.id)]), 200
+
+
+@main_bp.route('/feed', methods=['GET'])
+def get_follow_feed():
+    """
+    Lists the newest quizzes published by the users the current user follows.
 
-    return jsonify([{"id": u.id, "username": u.username, "avatar": u.avatar} for u in current_user_obj.followed.all()]), 200
+    Query parameters:
+        limit: Page size (default 20, at most 50).
+        before: Cursor from the ``X-Next-Cursor`` header of the previous page.
+    """
+    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
+    limit_val = max(1, min(request.args.get('limit', 20, type=int), 50))
+    before_val = None
+    if request.args.get('before'):
+        try: before_val = activity.decode_cursor(request.args['before'])
+        except ValueError: return jsonify({"error": "Invalid cursor"}), 400
 
+    items, next_cursor = feed.feed_for(session['user_id'], limit_val, before_val)
+    response = jsonify(items)
+    if next_cursor: response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 @main_bp.route('/signup', methods=['POST'])
 def signup():
@@ -439,7 +555,17 @@ def login():
     if user_obj is None or not user_obj.check_password(password_val):
         return jsonify({"error": "Invalid login credentials"}), 401
 
-    session.clear(); session['user_id'] = user_obj.id; session['username'] = user_obj.username
+    if user_obj.password_needs_rehash():
+        # Hash parameters changed since this hash was made: upgrade it transparently
+        try:
+            user_obj.set_password(password_val); db.session.commit()
+        except HashingBusy:
+            db.session.rollback()  # Login still succeeds; retry the upgrade next time
+        except Exception as e:
+            db.session.rollback(); print(f"Error rehashing password for user {user_obj.id}: {e}")
+
+    login_principal(Principal(user_obj.id, user_obj.username, user_obj.avatar,
+                              auth.credential_tag(user_obj.password_hash)))
     session.permanent = True
     current_app.permanent_session_lifetime = timedelta(days=7)
 
@@ -448,52 +574,93 @@ def login():
 
 @main_bp.route('/home', methods=['GET'])
 def home_auth_check():
-    if 'user_id' not in session: return jsonify({"error": "Niet gemachtigd"}), 401
-    user_obj = db.session.get(User, session['user_id'])
-    if not user_obj: session.clear(); return jsonify({"error": "Niet gemachtigd (user not found)"}), 401
-    return jsonify({"message": f"Welkom, {session.get('username', 'Onbekend')}!"}), 200
+    principal = current_principal()
+    if principal is None: return jsonify({"error": "Niet gemachtigd"}), 401
+    return jsonify({"message": f"Welkom, {principal.username}!"}), 200
 
 @main_bp.route('/logout', methods=['POST'])
 def logout():
     session.clear(); return jsonify({"message": "Uitgelogd"}), 200
 
+QUIZ_SUMMARY_FIELDS = ('id', 'name', 'created_at', 'questions_count')
+QUIZ_LIST_VIEWS = {'summary': QUIZ_SUMMARY_FIELDS, 'full': QUIZ_SUMMARY_FIELDS + ('questions',)}
+
+def _question_to_dict(q_model_item):
+    """
+    Serializes one question with its type-specific fields (including the correct answer).
+    """
+    q_data_item = {
+        "id": q_model_item.id,
+        "type": q_model_item.question_type,
+        "text": q_model_item.question_text
+    }
+    if isinstance(q_model_item, MultipleChoiceQuestion):
+        q_data_item['options'] = [{
+            "id": opt.id, "text": opt.text, "is_correct": opt.is_correct
+        } for opt in q_model_item.options]
+    elif isinstance(q_model_item, SliderQuestion):
+        q_data_item.update({
+            "min": q_model_item.min_value, "max": q_model_item.max_value,
+            "step": q_model_item.step, "correct_value": q_model_item.correct_value
+        })
+    elif isinstance(q_model_item, TextInputQuestion):
+        q_data_item.update({
+            "max_length": q_model_item.max_length, "correct_answer": q_model_item.correct_answer
+        })
+    return q_data_item
+
+def _quiz_summaries(*criteria):
+    """
+    Lists quizzes with their question counts in a single aggregate query.
+
+    Only columns are selected, and questions are counted in ``question_reads``, so
+    no Quiz or Question entities (and none of the question subclass tables or
+    options) are loaded.
+
+    Args:
+        *criteria: Filter expressions on Quiz, e.g. ``Quiz.user_id == 5``.
+
+    Returns:
+        list: Summary dicts, newest quiz first.
+    """
+    rows = (db.session.query(Quiz.id, Quiz.name, Quiz.created_at, func.count(QuestionRead.id).label('questions_count'))
+            .outerjoin(QuestionRead, QuestionRead.quiz_id == Quiz.id)
+            .filter(*criteria).group_by(Quiz.id).order_by(Quiz.created_at.desc(), Quiz.id.desc()).all())
+    return [{
+        "id": row.id, "name": row.name,
+        "created_at": row.created_at.replace(tzinfo=timezone.utc).isoformat() if row.created_at else None,
+        "questions_count": row.questions_count
+    } for row in rows]
+
 @main_bp.route('/quizzes', methods=['GET'])
 def get_user_quizzes():
     if 'user_id' not in session: return jsonify({"error": "Niet ingelogd"}), 401
     user_id_val = session['user_id']
-    quizzes_list = Quiz.query.filter_by(user_id=user_id_val).order_by(Quiz.created_at.desc()).all()
+    try:
+        selection = parse_field_selection(request.args, QUIZ_LIST_VIEWS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not selection.wants('questions'):
+        return jsonify([selection.project(q) for q in _quiz_summaries(Quiz.user_id == user_id_val)]), 200
+
+    quizzes_list = (db.session.query(Quiz.id, Quiz.name, Quiz.created_at).filter(Quiz.user_id == user_id_val)
+                    .order_by(Quiz.created_at.desc(), Quiz.id.desc()).all())
+    # All questions of all quizzes from the flattened table, one index range per quiz
+    questions_by_quiz = {quiz_item.id: [] for quiz_item in quizzes_list}
+    for row in question_reads.quiz_rows(list(questions_by_quiz)) if questions_by_quiz else []:
+        questions_by_quiz[row.quiz_id].append(question_reads.to_dict(row))
 
     quizzes_data_list = []
     for quiz_item in quizzes_list:
-        q_list = []
-        for q_model_item in quiz_item.questions: # questions is al geladen door lazy='selectin'
-            q_data_item = {
-                "id": q_model_item.id,
-                "type": q_model_item.question_type,
-                "text": q_model_item.question_text
-            }
-            if isinstance(q_model_item, MultipleChoiceQuestion):
-                q_data_item['options'] = [{
-                    "id": opt.id, "text": opt.text, "is_correct": opt.is_correct
-                } for opt in q_model_item.options]
-            elif isinstance(q_model_item, SliderQuestion):
-                q_data_item.update({
-                    "min": q_model_item.min_value, "max": q_model_item.max_value,
-                    "step": q_model_item.step, "correct_value": q_model_item.correct_value
-                })
-            elif isinstance(q_model_item, TextInputQuestion):
-                q_data_item.update({
-                    "max_length": q_model_item.max_length, "correct_answer": q_model_item.correct_answer
-                })
-            q_list.append(q_data_item)
-
+        q_list = questions_by_quiz[quiz_item.id]
         aware_created_at = quiz_item.created_at.replace(tzinfo=timezone.utc) if quiz_item.created_at else None
-        quizzes_data_list.append({
+        quizzes_data_list.append(selection.project({
             "id": quiz_item.id, "name": quiz_item.name,
             "created_at": aware_created_at.isoformat() if aware_created_at else None,
             "questions_count": len(q_list),
             "questions": q_list
-        })
+        }))
     return jsonify(quizzes_data_list), 200
 
 
@@ -570,36 +737,57 @@ def create_quiz():
             if question_obj: db.session.add(question_obj)
 
         db.session.commit()
+        feed.publish(new_quiz_obj)  # Followers' timelines are filled in the background
         return jsonify({"message": "Quiz created", "quiz_id": new_quiz_obj.id}), 201
     except Exception as e:
         db.session.rollback(); print(f"Error creating quiz: {e}"); import traceback; traceback.print_exc()
         return jsonify({"error": "Could not create quiz due to an internal error"}), 500
 
+QUIZ_DETAIL_SUMMARY_FIELDS = ('id', 'name', 'created_at', 'creator', 'creator_id', 'creator_avatar', 'questions_count')
+QUIZ_DETAIL_VIEWS = {'summary': QUIZ_DETAIL_SUMMARY_FIELDS, 'full': QUIZ_DETAIL_SUMMARY_FIELDS + ('questions',)}
+
 @main_bp.route('/quizzes/<int:quiz_id_param>', methods=['GET'])
 def get_quiz_details(quiz_id_param):
-    quiz_obj = Quiz.query.get(quiz_id_param)
+    try:
+        selection = parse_field_selection(request.args, QUIZ_DETAIL_VIEWS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not selection.wants('questions'):
+        # Summary: quiz, creator and question count in one aggregate query
+        row = (db.session.query(Quiz.id, Quiz.name, Quiz.created_at, User.id.label('creator_id'),
+                                User.username.label('creator'), User.avatar.label('creator_avatar'),
+                                func.count(QuestionRead.id).label('questions_count'))
+               .outerjoin(User, User.id == Quiz.user_id).outerjoin(QuestionRead, QuestionRead.quiz_id == Quiz.id)
+               .filter(Quiz.id == quiz_id_param).group_by(Quiz.id, User.id).first())
+        if row is None: return jsonify({"error": "Quiz not found"}), 404
+        return jsonify(selection.project({
+            "id": row.id, "name": row.name,
+            "created_at": row.created_at.replace(tzinfo=timezone.utc).isoformat() if row.created_at else None,
+            "creator": row.creator or "Unknown", "creator_id": row.creator_id, "creator_avatar": row.creator_avatar,
+            "questions_count": row.questions_count
+        })), 200
+
+    if selection.fields == frozenset(QUIZ_DETAIL_VIEWS['full']) and quiz_documents.enabled():
+        # The whole document is built in Postgres and sent as-is
+        quiz_doc = quiz_documents.load_details(quiz_id_param)
+        if quiz_doc is None: return jsonify({"error": "Quiz not found"}), 404
+        return current_app.response_class(quiz_doc, mimetype='application/json'), 200
+
+    quiz_obj = db.session.get(Quiz, quiz_id_param)
     if not quiz_obj: return jsonify({"error": "Quiz not found"}), 404
 
-    questions_data_list = []
-    for q_model_item in quiz_obj.questions:
-        q_data_item = {"id": q_model_item.id, "type": q_model_item.question_type, "text": q_model_item.question_text}
-        if isinstance(q_model_item, MultipleChoiceQuestion):
-            q_data_item['options'] = [{"id": opt.id, "text": opt.text, "is_correct": opt.is_correct} for opt in q_model_item.options]
-        elif isinstance(q_model_item, SliderQuestion):
-            q_data_item.update({"min": q_model_item.min_value, "max": q_model_item.max_value, "step": q_model_item.step, "correct_value": q_model_item.correct_value})
-        elif isinstance(q_model_item, TextInputQuestion):
-            q_data_item.update({"max_length": q_model_item.max_length, "correct_answer": q_model_item.correct_answer})
-        questions_data_list.append(q_data_item)
+    questions_data_list = [_question_to_dict(q_model_item) for q_model_item in quiz_obj.questions]
 
     aware_created_at = quiz_obj.created_at.replace(tzinfo=timezone.utc) if quiz_obj.created_at else None
-    return jsonify({
+    return jsonify(selection.project({
         "id": quiz_obj.id, "name": quiz_obj.name,
         "created_at": aware_created_at.isoformat() if aware_created_at else None,
         "creator": quiz_obj.user.username if quiz_obj.user else "Unknown",
         "creator_id": quiz_obj.user.id if quiz_obj.user else None,
         "creator_avatar": quiz_obj.user.avatar if quiz_obj.user else None,
         "questions": questions_data_list, "questions_count": len(questions_data_list)
-    }), 200
+    })), 200
 
 @main_bp.route('/quizzes/<int:quiz_id_param>', methods=['DELETE'])
 def delete_quiz(quiz_id_param):
@@ -615,6 +803,15 @@ def delete_quiz(quiz_id_param):
         db.session.rollback(); print(f"Error deleting quiz: {e}")
         return jsonify({"error": "Could not delete quiz"}), 500
 
+@main_bp.route('/quizzes/<int:quiz_id_param>/analytics', methods=['GET'])
+def get_quiz_analytics(quiz_id_param):
+    if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
+    owner_id = db.session.query(Quiz.user_id).filter(Quiz.id == quiz_id_param).scalar()
+    if owner_id is None: return jsonify({"error": "Quiz not found"}), 404
+    if owner_id != session['user_id']: return jsonify({"error": "Only the creator can view analytics"}), 403
+    # Read from the per-question rollups, so the cost does not grow with the number of plays
+    return jsonify(question_stats.quiz_analytics(quiz_id_param)), 200
+
 @main_bp.route('/quizzes/<int:quiz_id_param>', methods=['PUT'])
 def update_quiz(quiz_id_param):
     if 'user_id' not in session: return jsonify({"error": "Not logged in"}), 401
@@ -762,6 +959,8 @@ def handle_profile():
              return jsonify({"message": "No changes detected"}), 200
 
         db.session.commit()
+        if user_obj.username != original_username_str:
+            invalidate_principal(user_obj.id)
         return jsonify({"message": "Profile updated successfully", "user": {
             "id": user_obj.id, "username": user_obj.username, "bio": user_obj.bio,
             "avatar": user_obj.avatar, "banner_type": user_obj.banner_type, "banner_value": user_obj.banner_value,
@@ -799,6 +998,11 @@ def change_password():
 
     try:
         user_obj.set_password(new_pw_str); db.session.commit()
+        # Other sessions of this user carry the old credential tag and are now rejected
+        invalidate_principal(user_obj.id)
+        session['credential_tag'] = auth.credential_tag(user_obj.password_hash)
+        if isinstance(current_app.session_interface, session_store.SqlSessionInterface):
+            current_app.session_interface.revoke_user(user_obj.id, keep_sid=session.sid)
         return jsonify({"message": "Password updated successfully"}), 200
     except Exception as e:
         db.session.rollback(); print(f"Error changing password for user {user_obj.id}: {e}")
@@ -816,6 +1020,7 @@ def delete_account():
 
     try:
         db.session.delete(user_obj); db.session.commit()
+        invalidate_principal(user_obj.id)
         session.clear()
         return jsonify({"message": "Account deleted successfully"}), 200
     except Exception as e:
@@ -846,7 +1051,9 @@ def create_quiz_session():
 
     try:
         new_session_obj = QuizSession(quiz_id=quiz_id_val, host_id=user_id_val, code=session_code_str, num_teams=num_teams_int)
-        db.session.add(new_session_obj); db.session.commit()
+        db.session.add(new_session_obj)
+        activity.record_hosted(new_session_obj)
+        db.session.commit()
         return jsonify({'message': 'Session created', 'code': new_session_obj.code, 'quiz_id': new_session_obj.quiz_id, 'num_teams': new_session_obj.num_teams}), 201
     except Exception as e:
         db.session.rollback(); print(f"Error creating session: {e}")
@@ -891,7 +1098,9 @@ def invite_to_session(session_code_param):
             session_id=quiz_session_obj.id,
             notification_type='session_invite'
         )
-        db.session.add(notification_obj); db.session.commit()
+        db.session.add(notification_obj)
+        events.publish(db.session, events.user_topic(recipient_id_val), 'notification', type='session_invite')
+        db.session.commit()
         return jsonify({'message': f'Invitation sent to {recipient_user_obj.username}'}), 201
     except Exception as e:
         db.session.rollback(); print(f"Error sending invite for session {session_code_param}: {e}")
@@ -942,6 +1151,11 @@ def join_quiz_session(session_code_param):
                 is_read=False
             ).update({'is_read': True})
 
+        if action_taken_str != 'no_change':
+            activity.record_joined(quiz_session_obj, participant_obj)
+            events.publish(db.session, events.session_topic(session_code_param),
+                           'participant_joined' if action_taken_str == 'joined' else 'participant_switched_team',
+                           user_id=user_id_val, team_number=team_number_val)
         db.session.commit()
         return jsonify({'message': message_response_str, 'action': action_taken_str}), 200
     except IntegrityError:
@@ -986,20 +1200,76 @@ def start_quiz_session(session_code_param):
         return jsonify({'error': 'Cannot start a session with no participants'}), 400
 
     try:
-        quiz_session_obj.started = True; db.session.commit()
+        quiz_session_obj.started, quiz_session_obj.started_at = True, datetime.utcnow()
+        activity.mark_started(quiz_session_obj.id)
+        events.publish(db.session, events.session_topic(session_code_param), 'session_started')
+        db.session.commit()
         return jsonify({'message': 'Session started successfully'}), 200
     except Exception as e:
         db.session.rollback(); print(f"Error starting session {session_code_param}: {e}")
         return jsonify({'error': 'Could not start the session due to an internal error'}), 500
 
-@main_bp.route('/sessions/<string:session_code_param>', methods=['GET'])
-def get_session_details(session_code_param):
+@main_bp.route('/sessions/<string:session_code_param>/live/advance', methods=['POST'])
+def advance_live_session(session_code_param):
+    if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
+    user_id_val = session['user_id']
+    data_dict = request.get_json(silent=True) or {}
+    try: duration_val = float(data_dict.get('duration', current_app.config.get('LIVE_QUESTION_SECONDS', 20)))
+    except (TypeError, ValueError): return jsonify({'error': 'Duration must be a number of seconds'}), 400
+    if not 1 <= duration_val <= 3600: return jsonify({'error': 'Duration must be between 1 and 3600 seconds'}), 400
+
+    state = live_sessions.get_state(session_code_param)
+    if state is None: return jsonify({'error': 'Session not found'}), 404
+    if state.host_id != user_id_val: return jsonify({'error': 'Only the host can control this session'}), 403
+
+    try:
+        if state.phase == live_sessions.LOBBY:
+            # Opening the first question starts the session, like POST /start
+            quiz_session_obj = db.session.get(QuizSession, state.session_id)
+            if not quiz_session_obj.started:
+                if not quiz_session_obj.participants:
+                    return jsonify({'error': 'Cannot start a session with no participants'}), 400
+                quiz_session_obj.started, quiz_session_obj.started_at = True, datetime.utcnow()
+                activity.mark_started(quiz_session_obj.id)
+                events.publish(db.session, events.session_topic(session_code_param), 'session_started')
+        new_state = live_sessions.advance(state, duration_val)
+        events.publish(db.session, events.session_topic(session_code_param), 'live_state',
+                       version=new_state.version, phase=new_state.phase, question_index=new_state.question_index)
+        db.session.commit()
+        live_sessions.remember(new_state)  # Only committed states are served
+        return jsonify(live_sessions.to_dict(new_state)), 200
+    except ValueError as e:
+        db.session.rollback(); live_sessions.forget(state)
+        return jsonify({'error': str(e)}), 400
+    except StaleOwner:
+        live_sessions.forget(state); raise  # 421 via handle_stale_owner
+    except Exception as e:
+        db.session.rollback(); live_sessions.forget(state); print(f"Error advancing live session {session_code_param}: {e}")
+        return jsonify({'error': 'Could not advance the session due to an internal error'}), 500
+
+@main_bp.route('/sessions/<string:session_code_param>/live', methods=['GET'])
+def get_live_session(session_code_param):
+    state = live_sessions.get_state(session_code_param)
+    if state is None: return jsonify({'error': 'Session not found'}), 404
+
+    # Clients poll with the version they have; nothing new is an empty 304
+    known_version = request.args.get('version', type=int)
+    if known_version is not None and known_version > state.version:
+        live_sessions.forget(state)  # The client saw a newer state elsewhere; this worker's copy is behind
+        state = live_sessions.get_state(session_code_param)
+    if known_version is not None and known_version == state.version: return '', 304
+    return jsonify(live_sessions.to_dict(state)), 200
+
+def _cached_json(body):
+    return current_app.response_class(body, mimetype='application/json')
+
+def _load_session_details(session_code_param):
     quiz_session_obj = QuizSession.query.options(
         joinedload(QuizSession.host),
         joinedload(QuizSession.quiz).joinedload(Quiz.user)
     ).filter_by(code=session_code_param).first()
 
-    if not quiz_session_obj: return jsonify({'error': 'Session not found'}), 404
+    if not quiz_session_obj: return None
 
     host_user_obj = quiz_session_obj.host
     current_quiz_obj = quiz_session_obj.quiz
@@ -1007,7 +1277,7 @@ def get_session_details(session_code_param):
 
     aware_created_at = quiz_session_obj.created_at.replace(tzinfo=timezone.utc) if quiz_session_obj.created_at else None
 
-    return jsonify({
+    return current_app.json.dumps({
         'code': quiz_session_obj.code,
         'quiz_id': quiz_session_obj.quiz_id,
         'quiz_name': current_quiz_obj.name if current_quiz_obj else "N/A",
@@ -1021,32 +1291,95 @@ def get_session_details(session_code_param):
         'quiz_maker_username': quiz_creator_obj.username if quiz_creator_obj else "N/A",
         'quiz_maker_avatar': quiz_creator_obj.avatar if quiz_creator_obj else None,
         'quiz_maker_id': quiz_creator_obj.id if quiz_creator_obj else None,
-    }), 200
+    })
+
+@main_bp.route('/sessions/<string:session_code_param>', methods=['GET'])
+def get_session_details(session_code_param):
+    """
+    Returns a session with its host and quiz; served from the session read cache (session_cache.py).
+    """
+    body = session_cache.cached(session_code_param, 'details', lambda: _load_session_details(session_code_param))
+    if body is None: return jsonify({'error': 'Session not found'}), 404
+    return _cached_json(body), 200
+
+def _load_session_participants(session_code_param):
+    team_counts = read_models.session_team_counts(session_code_param)
+    if team_counts is None: return None
+    session_id_val, counts_dict = team_counts
+    total_val = sum(counts_dict.values())
+
+    if total_val <= current_app.config.get('SESSION_LARGE_THRESHOLD', 100):
+        participants_list_data = read_models.session_participants(session_code_param)
+        return session_id_val, current_app.json.dumps([p.to_dict() for p in participants_list_data])
+
+    sample_dict = read_models.participant_sample(session_id_val, current_app.config.get('SESSION_PARTICIPANT_SAMPLE', 20))
+    return session_id_val, {
+        'mode': 'sampled',
+        'total': total_val,
+        'teams': [{'team_number': team, 'count': count} for team, count in
+                  sorted(counts_dict.items(), key=lambda item: (item[0] is None, item[0] or 0))],
+        'first': [p.to_dict() for p in sample_dict['first']],
+        'newest': [p.to_dict() for p in sample_dict['newest']],
+    }
 
 @main_bp.route('/sessions/<string:session_code_param>/participants', methods=['GET'])
 def get_session_participants(session_code_param):
-    quiz_session_obj = QuizSession.query.filter_by(code=session_code_param).first()
-    if not quiz_session_obj: return jsonify({'error': 'Session not found'}), 404
+    """
+    Lists a session's participants.
 
-    participants_list_data = session_models_SessionParticipant.query.options(
-        joinedload(session_models_SessionParticipant.user)
-    ).filter_by(session_id=quiz_session_obj.id).all()
+    Up to SESSION_LARGE_THRESHOLD participants this is the full list. Larger sessions
+    return a summary instead, so every lobby poll stays the same size however many join:
+    the count per team, the first and newest SESSION_PARTICIPANT_SAMPLE joiners and the
+    caller's own entry. The full list is then paged through /participants/roster.
+    Everything but the caller's entry is shared through the session read cache.
+    """
+    cached_val = session_cache.cached(session_code_param, 'participants',
+                                      lambda: _load_session_participants(session_code_param))
+    if cached_val is None: return jsonify({'error': 'Session not found'}), 404
+    session_id_val, payload = cached_val
+    if isinstance(payload, str): return _cached_json(payload), 200
 
-    return jsonify([{
-        'user_id': p.user.id, 'username': p.user.username, 'avatar': p.user.avatar,
-        'team_number': p.team_number, 'score': p.score
-    } for p in participants_list_data if p.user]), 200
+    me_item = read_models.participant_of(session_id_val, session['user_id']) if 'user_id' in session else None
+    return jsonify({**payload, 'me': me_item.to_dict() if me_item else None}), 200
+
+@main_bp.route('/sessions/<string:session_code_param>/participants/roster', methods=['GET'])
+def get_session_roster(session_code_param):
+    """
+    Pages through all participants of a session in join order.
+
+    Query parameters:
+        limit: Page size (default 50, at most 200).
+        after: Cursor from the ``X-Next-Cursor`` header of the previous page.
+    """
+    session_id_val = db.session.query(QuizSession.id).filter(QuizSession.code == session_code_param).scalar()
+    if session_id_val is None: return jsonify({'error': 'Session not found'}), 404
+    limit_val = max(1, min(request.args.get('limit', 50, type=int), 200))
+    after_val = None
+    if request.args.get('after'):
+        try: after_val = int(request.args['after'])
+        except ValueError: return jsonify({'error': 'Invalid cursor'}), 400
+
+    items, next_cursor = read_models.participant_roster(session_id_val, limit_val, after_val)
+    response = jsonify([p.to_dict() for p in items])
+    if next_cursor: response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 
 @main_bp.route('/sessions/<string:session_code_param>/submit-score', methods=['POST'])
 def submit_session_score(session_code_param):
     if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
     user_id_val = session['user_id']
-    score_req_val = (request.get_json() or {}).get('score')
+    data_dict = request.get_json() or {}
+    score_req_val = data_dict.get('score')
+    answers_dict = data_dict.get('answers')
 
-    if score_req_val is None: return jsonify({'error': 'Score is required'}), 400
-    try: score_float = float(score_req_val)
-    except (ValueError, TypeError): return jsonify({'error': 'Invalid score format, must be a number'}), 400
+    # With 'answers' ({question_id: value}) the server grades; otherwise the client's score is taken as-is
+    if answers_dict is not None:
+        if not isinstance(answers_dict, dict): return jsonify({'error': 'Answers must be an object'}), 400
+    elif score_req_val is None: return jsonify({'error': 'Score is required'}), 400
+    else:
+        try: score_float = float(score_req_val)
+        except (ValueError, TypeError): return jsonify({'error': 'Invalid score format, must be a number'}), 400
 
     participant_obj = session_models_SessionParticipant.query.join(QuizSession).filter(
         QuizSession.code == session_code_param,
@@ -1056,33 +1389,125 @@ def submit_session_score(session_code_param):
     if not participant_obj: return jsonify({'error': 'Participant not found in this session or session does not exist'}), 404
     if not participant_obj.session.started : return jsonify({'error': 'Cannot submit score, session not started yet'}), 403
 
+    results_dict = None
+    if answers_dict is not None:
+        try: score_float, results_dict = grading.grade(participant_obj.session.quiz_id, answers_dict)
+        except ValueError as e: return jsonify({'error': str(e)}), 400
+
     try:
-        participant_obj.score = score_float; db.session.commit()
-        return jsonify({'message': 'Score submitted successfully'}), 200
+        participant_obj.score = score_float
+        activity.record_score(participant_obj.session_id, user_id_val, score_float)
+        events.publish(db.session, events.session_topic(session_code_param), 'score_submitted', user_id=user_id_val)
+        db.session.commit()
+        response_dict = {'message': 'Score submitted successfully'}
+        if results_dict is not None:
+            response_dict.update({'score': score_float, 'correct': {str(q_id): ok for q_id, ok in results_dict.items()}})
+        return jsonify(response_dict), 200
     except Exception as e:
         db.session.rollback(); print(f"Error submitting score for user {user_id_val} in session {session_code_param}: {e}")
         return jsonify({'error': 'Could not submit score due to an internal error'}), 500
 
-@main_bp.route('/sessions/<string:session_code_param>/results', methods=['GET'])
-def get_quiz_session_results(session_code_param):
-    quiz_session_obj = QuizSession.query.filter_by(code=session_code_param).first()
-    if not quiz_session_obj: return jsonify({'error': 'Session not found'}), 404
+def _answer_row(user_id, row, value, answered_at):
+    """
+    Converts a submitted value into an answer buffer row for a question_reads row.
+
+    Raises:
+        ValueError: If the value does not fit the question type.
+    """
+    if row.question_type == 'multiple_choice':
+        try: option_id = int(value)
+        except (TypeError, ValueError): raise ValueError(f"Question {row.id} expects an option id")
+        if option_id not in {option['id'] for option in row.options or []}:
+            raise ValueError(f"Option {value} is not part of question {row.id}")
+        return (user_id, row.id, 'multiple_choice', option_id, answered_at)
+    if row.question_type == 'slider':
+        try: number = float(value)
+        except (TypeError, ValueError): raise ValueError(f"Question {row.id} expects a number")
+        if not math.isfinite(number) or number != int(number): raise ValueError(f"Question {row.id} expects a whole number")
+        if (row.min_value is not None and number < row.min_value) or (row.max_value is not None and number > row.max_value):
+            raise ValueError(f"Question {row.id} expects a value between {row.min_value} and {row.max_value}")
+        return (user_id, row.id, 'slider', int(number), answered_at)
+    if row.question_type == 'text_input':
+        if not isinstance(value, str) or len(value) > 1000: raise ValueError(f"Question {row.id} expects text of at most 1000 characters")
+        return (user_id, row.id, 'text_input', value, answered_at)
+    raise ValueError(f"Question {row.id} cannot be answered")
+
+@main_bp.route('/sessions/<string:session_code_param>/answers', methods=['POST'])
+def submit_session_answers(session_code_param):
+    if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
+    user_id_val = session['user_id']
+    data_dict = request.get_json() or {}
 
-    participants_list_data = session_models_SessionParticipant.query.options(joinedload(session_models_SessionParticipant.user)).filter_by(
-        session_id=quiz_session_obj.id
-    ).order_by(session_models_SessionParticipant.score.desc()).all()
+    # One answer ({question_id, answer}) as a question goes by, or several at once ({answers: {question_id: value}})
+    if 'answers' in data_dict:
+        answers_dict = data_dict['answers']
+        if not isinstance(answers_dict, dict) or not answers_dict: return jsonify({'error': 'Answers must be a non-empty object'}), 400
+    elif data_dict.get('question_id') is not None and 'answer' in data_dict:
+        answers_dict = {data_dict['question_id']: data_dict['answer']}
+    else: return jsonify({'error': 'question_id and answer are required'}), 400
+
+    participant_row = db.session.query(QuizSession.quiz_id, QuizSession.started).join(
+        session_models_SessionParticipant, session_models_SessionParticipant.session_id == QuizSession.id
+    ).filter(QuizSession.code == session_code_param, session_models_SessionParticipant.user_id == user_id_val).first()
+    if not participant_row: return jsonify({'error': 'Participant not found in this session or session does not exist'}), 404
+    if not participant_row.started: return jsonify({'error': 'Cannot submit answers, session not started yet'}), 403
+
+    questions_by_id = {row.id: row for row in question_reads.quiz_rows([participant_row.quiz_id])}
+    answered_at = datetime.utcnow()
+    rows, correct_dict = [], {}
+    try:
+        for key, value in answers_dict.items():
+            try: question_row = questions_by_id.get(int(key))
+            except (TypeError, ValueError): raise ValueError(f"Invalid question id '{key}'")
+            if question_row is None: raise ValueError(f"Question {key} is not part of this quiz")
+            if not live_sessions.accepts_answer(session_code_param, question_row.id):
+                return jsonify({'error': f"Question {question_row.id} is not open"}), 409
+            rows.append(_answer_row(user_id_val, question_row, value, answered_at))
+            correct_dict[str(question_row.id)] = grading.is_correct(question_row, value)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Answers are written in batches by the answer buffer; the request only waits for its batch to commit
+    db.session.rollback()  # Hand the connection back before waiting
+    try:
+        ticket = answer_buffer.get_buffer().submit(rows)
+    except AnswerBufferFull: raise  # 503 via handle_answer_buffer_full
+    except Exception as e:
+        print(f"Error storing answers for user {user_id_val} in session {session_code_param}: {e}")
+        return jsonify({'error': 'Could not store answers due to an internal error'}), 500
+    stored = ticket.wait(current_app.config.get('ANSWER_BUFFER_COMMIT_TIMEOUT', 2.0))
+    if ticket.rejected:
+        # E.g. the question or option was removed by an edit of the quiz in the meantime
+        return jsonify({'error': 'Some answers could not be stored', 'stored': False, 'correct': correct_dict}), 409
+    return jsonify({'stored': stored, 'correct': correct_dict}), 201 if stored else 202
+
+def _load_session_results(session_code_param):
+    participants_list_data = read_models.session_participants(session_code_param, by_score=True)
+    if participants_list_data is None: return None
 
-    return jsonify([{
-        'user_id': p.user.id, 'username': p.user.username, 'avatar': p.user.avatar,
-        'score': p.score if p.score is not None else 0.0,
-        'team_number': p.team_number
-    } for p in participants_list_data if p.user]), 200
+    results = []
+    for p in participants_list_data:
+        p_dict = p.to_dict()
+        p_dict['score'] = p.score if p.score is not None else 0.0
+        results.append(p_dict)
+    return current_app.json.dumps(results)
+
+@main_bp.route('/sessions/<string:session_code_param>/results', methods=['GET'])
+def get_quiz_session_results(session_code_param):
+    body = session_cache.cached(session_code_param, 'results', lambda: _load_session_results(session_code_param))
+    if body is None: return jsonify({'error': 'Session not found'}), 404
+    return _cached_json(body), 200
 
 @main_bp.route('/simulate/<int:quiz_id_param>', methods=['GET'])
 def simulate_quiz_session(quiz_id_param):
     if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
 
-    quiz_obj = Quiz.query.get(quiz_id_param)
+    if quiz_documents.enabled():
+        quiz_doc = quiz_documents.load_for_play(quiz_id_param)
+        if quiz_doc is None: return jsonify({'error': 'Quiz not found'}), 404
+        return current_app.response_class(quiz_doc, mimetype='application/json'), 200
+
+    quiz_obj = db.session.get(Quiz, quiz_id_param)
 
     if not quiz_obj: return jsonify({'error': 'Quiz not found'}), 404
 
@@ -1101,6 +1526,17 @@ def simulate_quiz_session(quiz_id_param):
 
     return jsonify({'quiz_id': quiz_obj.id, 'quiz_name': quiz_obj.name, 'questions': questions_data_list}), 200
 
+@main_bp.route('/batch', methods=['POST'])
+def run_batch_requests():
+    try:
+        requests_list = batch.parse_batch(request.get_json(silent=True), current_app.config.get('BATCH_MAX_REQUESTS', 10))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    results, set_cookies = batch.run_batch(requests_list)
+    response = jsonify({'responses': results})
+    for header in set_cookies: response.headers.add('Set-Cookie', header)
+    return response, 200
+
 @main_bp.route('/notifications', methods=['GET'])
 def get_notifications():
     if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
@@ -1109,14 +1545,28 @@ def get_notifications():
     limit_val = request.args.get('limit', 10, type=int)
     if limit_val > 50: limit_val = 50
 
-    query_obj = Notification.query.filter_by(recipient_id=user_id_val).options(
-        joinedload(Notification.sender),
-        joinedload(Notification.session_info).joinedload(QuizSession.quiz)
-    )
-
-    notifications_list_data = query_obj.order_by(Notification.created_at.desc()).limit(limit_val).all()
+    notifications_list_data = read_models.notifications_for(user_id_val, limit_val)
     return jsonify([n.to_dict() for n in notifications_list_data]), 200
 
+def _long_poll(topic):
+    """
+    Waits for events of a topic after the client's cursor (see events.py).
+    """
+    max_wait_val = current_app.config.get('EVENT_LONG_POLL_SECONDS', 25)
+    wait_val = min(max(request.args.get('wait', max_wait_val, type=float), 0.0), max_wait_val)
+    db.session.rollback()  # Don't hold a pool connection while waiting
+    return jsonify(events.wait(topic, request.args.get('cursor'), wait_val)), 200
+
+@main_bp.route('/sessions/<string:session_code_param>/events', methods=['GET'])
+def get_session_events(session_code_param):
+    if live_sessions.get_state(session_code_param) is None: return jsonify({'error': 'Session not found'}), 404
+    return _long_poll(events.session_topic(session_code_param))
+
+@main_bp.route('/notifications/events', methods=['GET'])
+def get_notification_events():
+    if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
+    return _long_poll(events.user_topic(session['user_id']))
+
 @main_bp.route('/notifications/count', methods=['GET'])
 def get_unread_notification_count():
     if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
@@ -1168,59 +1618,33 @@ def get_recently_played_quizzes():
     """
     Fetches the quizzes that the current user has recently played or hosted.
 
-    Returns a list of recently played quizzes, sorted by the session's creation date
-    in descending order (most recent first). Each entry includes the quiz name,
-    session code, date played, and other relevant details.
+    Returns a list of started sessions from the user's activity timeline, sorted by
+    the session's creation date in descending order (most recent first). Each entry
+    includes the quiz name, session code, date played, role ('played' or 'hosted')
+    and the user's score and team.
+
+    Query parameters:
+        limit: Page size (default 5, at most 20).
+        before: Cursor from the ``X-Next-Cursor`` header of the previous page.
 
     Returns:
         JSON response with the list of recently played quizzes or an error message.
     """
-    from flask import session as flask_session  # Import Flask's session object with a different name to avoid conflict
-    if 'user_id' not in flask_session: return jsonify({'error': 'Not logged in'}), 401
-    user_id_val = flask_session['user_id']
+    if 'user_id' not in session: return jsonify({'error': 'Not logged in'}), 401
+    user_id_val = session['user_id']
 
     limit_val = request.args.get('limit', 5, type=int)
-    if limit_val > 20: limit_val = 20  # Cap the limit to prevent excessive queries
+    limit_val = max(1, min(limit_val, 20))  # Cap the limit to prevent excessive queries
+    before_val = None
+    if request.args.get('before'):
+        try: before_val = activity.decode_cursor(request.args['before'])
+        except ValueError: return jsonify({'error': 'Invalid cursor'}), 400
 
     try:
-        # Query for sessions where the user was a participant
-        participated_sessions = (
-            db.session.query(
-                QuizSession,
-                Quiz.id.label('quiz_id'),
-                Quiz.name.label('quiz_name'),
-                Quiz.user_id.label('quiz_creator_id'),
-                User.username.label('quiz_creator_username'),
-                User.avatar.label('quiz_creator_avatar'),
-                session_models_SessionParticipant.score.label('user_score')
-            )
-            .join(Quiz, QuizSession.quiz_id == Quiz.id)
-            .join(User, Quiz.user_id == User.id)
-            .join(session_models_SessionParticipant, QuizSession.id == session_models_SessionParticipant.session_id)
-            .filter(session_models_SessionParticipant.user_id == user_id_val)
-            .filter(QuizSession.started == True)  # Only include sessions that were actually started
-            .order_by(QuizSession.created_at.desc())
-            .limit(limit_val)
-            .all()
-        )
-
-        result = []
-        for session, quiz_id, quiz_name, creator_id, creator_username, creator_avatar, score in participated_sessions:
-            result.append({
-                'session_id': session.id,
-                'session_code': session.code,
-                'quiz_id': quiz_id,
-                'quiz_name': quiz_name,
-                'quiz_creator_id': creator_id,
-                'quiz_creator_username': creator_username,
-                'quiz_creator_avatar': creator_avatar,
-                'played_at': session.created_at.replace(tzinfo=timezone.utc).isoformat() if session.created_at else None,
-                'score': score if score is not None else 0.0,
-                'is_team_mode': session.is_team_mode,
-                'team_number': next((p.team_number for p in session.participants if p.user_id == user_id_val), None)
-            })
-
-        return jsonify(result), 200
+        entries, next_cursor = activity.recent_for(user_id_val, limit_val, before_val)
+        response = jsonify(entries)
+        if next_cursor: response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e:
         print(f"Error fetching recently played quizzes for user {user_id_val}: {e}")
         return jsonify({'error': 'Could not fetch recently played quizzes'}), 500
@@ -0,0 +1,166 @@
+# src/backend/auth.py
+"""
+Authentication layer: resolves the logged-in user once per request.
+
+A ``before_request`` hook validates the session's ``user_id`` and stores a small
+``Principal`` record in ``flask.g``. The record is served from an in-process TTL
+cache, so the common case (a polling client with a valid session) does not touch
+the ``users`` table at all. Routes that only need the user id read
+``current_principal().id`` instead of loading a full ``User``.
+
+The cache is invalidated explicitly when a password or username changes and when
+an account is deleted. Other gunicorn workers see such changes after at most
+``PRINCIPAL_CACHE_TTL`` seconds.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, g, session
+
+Principal = namedtuple('Principal', ['id', 'username', 'avatar', 'credential_tag'])
+Principal.__doc__ = """
+Minimal authenticated user record.
+
+Attributes:
+    id (int): The user's id.
+    username (str): The current username.
+    avatar (int): The avatar number (used by several list responses).
+    credential_tag (str): Short fingerprint of the password hash; sessions created
+        before a password change carry an outdated tag and are rejected.
+"""
+
+
+def credential_tag(password_hash):
+    """
+    Derives a short, non-reversible fingerprint from a password hash.
+
+    Args:
+        password_hash (str): The stored werkzeug password hash.
+
+    Returns:
+        str: A 16 character hex tag.
+    """
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
+
+
+class PrincipalCache:
+    """
+    Thread-safe TTL cache of Principal records keyed by user id.
+
+    Args:
+        ttl (float): Seconds a record may be served without re-reading the database.
+        max_entries (int): Upper bound on cached users; the least recently used go first.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app, loader):
+    """
+    Installs the principal cache and the before_request loader.
+
+    Args:
+        app (Flask): The application.
+        loader (callable): ``loader(user_id) -> Principal or None``, reading the
+            minimal user record from the database.
+    """
+    app.extensions['principal_cache'] = PrincipalCache(
+        ttl=app.config.get('PRINCIPAL_CACHE_TTL', 30.0),
+        max_entries=app.config.get('PRINCIPAL_CACHE_SIZE', 10000),
+    )
+    app.extensions['principal_loader'] = loader
+    app.before_request(load_principal)
+
+
+def load_principal():
+    """
+    Resolves ``g.principal`` for the current request.
+
+    Clears the session when it refers to a user that no longer exists or whose
+    password changed after the session was created, so the routes' usual
+    ``'user_id' not in session`` checks reject it.
+    """
+    g.principal = None
+    user_id = session.get('user_id')
+    if user_id is None:
+        return
+
+    cache = current_app.extensions['principal_cache']
+    principal = cache.get(user_id)
+    if principal is None:
+        principal = current_app.extensions['principal_loader'](user_id)
+        if principal is not None:
+            cache.put(principal)
+
+    # Sessions from before this check was introduced have no tag; they stay valid.
+    session_tag = session.get('credential_tag')
+    if principal is None or (session_tag is not None and session_tag != principal.credential_tag):
+        session.clear()
+        return
+    g.principal = principal
+
+
+def current_principal():
+    """
+    Returns the authenticated Principal of this request, or None.
+    """
+    return g.get('principal')
+
+
+def login_principal(principal):
+    """
+    Stores a freshly authenticated user in the session and the cache.
+
+    Args:
+        principal (Principal): The user that just logged in.
+    """
+    session.clear()
+    if hasattr(session, 'regenerate'):
+        session.regenerate()  # Server-side sessions get a fresh id on login
+    session['user_id'] = principal.id
+    session['username'] = principal.username
+    session['credential_tag'] = principal.credential_tag
+    current_app.extensions['principal_cache'].put(principal)
+    g.principal = principal
+
+
+def invalidate_principal(user_id):
+    """
+    Drops a user's cached record after a password change, rename or account deletion.
+    """
+    current_app.extensions['principal_cache'].invalidate(user_id)
+    if g.get('principal') is not None and g.principal.id == user_id:
+        g.principal = None
@@ -0,0 +1,140 @@
+# src/backend/batch.py
+"""
+Batched read requests (``POST /batch``).
+
+A page load in the frontend fires several independent GETs (``/home``,
+``/profile``, ``/notifications/count``, ...). Each pays for the proxy hop, the
+session lookup and its own database checkout. ``run_batch`` runs such a list
+inside the current request instead:
+
+    POST /batch
+    {"requests": [{"path": "/profile"}, {"path": "/quizzes?view=summary"}]}
+    -> {"responses": [{"path": "/profile", "status": 200, "body": {...}}, ...]}
+
+Every sub-request is dispatched through the normal route and its before/after
+hooks in a nested request context. The nested contexts reuse the outer app
+context, and with it ``db.session`` and its connection, but each gets an empty
+``g``: replica choice, write flag and principal are per sub-request. Cookies
+work as in a browser. A sub-request sends the caller's cookies as updated by
+the items before it, and every ``Set-Cookie`` (session, read-your-writes) is
+passed on to the batch response.
+
+Only GET is accepted. A failed sub-request does not fail the batch; its status
+is reported instead. Writes stay separate requests, so each keeps its own
+transaction and error handling.
+"""
+from contextlib import contextmanager
+from http.cookies import SimpleCookie
+
+from flask import current_app, g, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from .init_flask import db
+
+ALLOWED_METHODS = ('GET',)
+
+
+def parse_batch(data, max_requests):
+    """
+    Validates a batch body.
+
+    Args:
+        data: The decoded JSON body.
+        max_requests (int): Most sub-requests allowed in one batch.
+
+    Returns:
+        list: ``(method, path)`` tuples.
+
+    Raises:
+        ValueError: With a message fit for a 400 response.
+    """
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("'requests' must be a non-empty list")
+    if len(items) > max_requests:
+        raise ValueError(f"A batch may contain at most {max_requests} requests")
+
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise ValueError("Every request needs a 'path'")
+        method = str(item.get('method', 'GET')).upper()
+        path = item['path']
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f"Method {method} is not allowed in a batch")
+        if not path.startswith('/') or path.split('?', 1)[0].rstrip('/') == request.path.rstrip('/'):
+            raise ValueError(f"Invalid batch path '{path}'")
+        parsed.append((method, path))
+    return parsed
+
+
+@contextmanager
+def _own_globals():
+    # The nested request shares the outer app context; give it a clean ``g`` for its duration
+    outer = g._get_current_object()
+    saved = dict(vars(outer))
+    vars(outer).clear()
+    try:
+        yield
+    finally:
+        vars(outer).clear()
+        vars(outer).update(saved)
+
+
+def _update_jar(jar, set_cookie_headers):
+    for header in set_cookie_headers:
+        for name, morsel in SimpleCookie(header).items():
+            if morsel['max-age'] == '0' or not morsel.value:
+                jar.pop(name, None)
+            else:
+                jar[name] = morsel.value
+
+
+def _dispatch(method, path, jar):
+    app = current_app._get_current_object()
+    path_only, _, query_string = path.partition('?')
+    builder = EnvironBuilder(path=path_only, query_string=query_string, method=method,
+                             base_url=request.host_url,
+                             headers={'Cookie': '; '.join(f'{name}={value}' for name, value in jar.items())},
+                             environ_base={'REMOTE_ADDR': request.remote_addr or ''})
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with _own_globals(), app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except HTTPException as e:
+            response = e.get_response()
+        except Exception as e:
+            # The session is shared with the rest of the batch, so leave it usable
+            db.session.rollback(); print(f"Error in batched request {method} {path}: {e}")
+            return 500, {'error': 'Internal error'}, []
+
+    body = response.get_json(silent=True)
+    if body is None and response.status_code != 204:
+        body = response.get_data(as_text=True)
+    return response.status_code, body, response.headers.getlist('Set-Cookie')
+
+
+def run_batch(requests_list):
+    """
+    Runs batched GET requests in order.
+
+    Args:
+        requests_list (list): ``(method, path)`` tuples from ``parse_batch``.
+
+    Returns:
+        tuple: (one ``{"path", "status", "body"}`` dict per sub-request,
+        the ``Set-Cookie`` headers they sent, in order).
+    """
+    results, set_cookies = [], []
+    jar = dict(request.cookies)
+    for method, path in requests_list:
+        status, body, cookies = _dispatch(method, path, jar)
+        _update_jar(jar, cookies)
+        set_cookies.extend(cookies)
+        results.append({'path': path, 'status': status, 'body': body})
+    return results, set_cookies
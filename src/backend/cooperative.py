@@ -0,0 +1,128 @@
+# src/backend/cooperative.py
+"""
+Support for the cooperative (gevent) serving mode.
+
+With ``WORKER_MODE=gevent`` every gunicorn worker runs each request in a greenlet
+instead of tying up a whole process, so a single node can keep thousands of lobby
+and notification connections open with the same worker count. The gevent
+worker monkey-patches the standard library before the app is loaded. This module
+makes the remaining pieces cooperative:
+
+* psycopg2 talks to Postgres through a C library that never yields to the gevent
+  hub. ``patch_psycopg`` installs a wait callback, so queries park the greenlet on
+  the socket instead of blocking the whole worker. psycopg 3 needs no callback.
+* The SQLAlchemy pool's locks are patched into gevent locks. The pool is sized for
+  many short greenlets sharing few connections (COOPERATIVE_DB_POOL_SIZE).
+* Password hashing is CPU-bound and would stall the hub. It runs on gevent's
+  native threadpool, where hashlib releases the GIL (see ``GeventThreadpoolExecutor``).
+
+Flask's request/app contexts and Flask-SQLAlchemy's scoped session are keyed on
+contextvars, which gevent keeps per greenlet, so the blueprint needs no changes.
+See ``service/gunicorn_gevent.conf.py`` for the matching gunicorn settings.
+"""
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+def is_gevent_patched():
+    """
+    Tells whether this process runs under a monkey-patched gevent worker.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def _gevent_wait_callback(conn, timeout=None):
+    """
+    psycopg2 wait callback that yields to the gevent hub while Postgres is busy.
+    """
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import extensions, OperationalError
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def patch_psycopg():
+    """
+    Makes psycopg2 cooperative. Safe to call more than once.
+
+    Note that psycopg2 does not support COPY in this mode; bulk tools such as
+    ``flask seed`` run outside the gevent workers.
+    """
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return
+    extensions.set_wait_callback(_gevent_wait_callback)
+
+
+class _GeventFuture:
+    def __init__(self, async_result):
+        self._result = async_result
+
+    def result(self, timeout=None):
+        import gevent
+        try:
+            return self._result.get(timeout=timeout)
+        except gevent.Timeout:
+            raise FutureTimeoutError()
+
+    def cancel(self):
+        return False
+
+    def add_done_callback(self, fn):
+        self._result.rawlink(lambda _: fn(self))
+
+
+class GeventThreadpoolExecutor:
+    """
+    Minimal executor on gevent's native threadpool, used for password hashing.
+
+    Native threads keep hashing off the hub. hashlib releases the GIL while it
+    runs scrypt/pbkdf2, so several hashes still run in parallel.
+
+    Args:
+        max_workers (int): Number of native threads.
+    """
+
+    def __init__(self, max_workers):
+        from gevent.threadpool import ThreadPool
+        self._pool = ThreadPool(max(1, max_workers))
+
+    def submit(self, func, *args):
+        return _GeventFuture(self._pool.spawn(func, *args))
+
+    def shutdown(self, wait=False, cancel_futures=False):
+        self._pool.kill()
+
+
+def init_app(app):
+    """
+    Applies cooperative-mode settings. Must run before ``db.init_app``.
+
+    Does nothing unless ``WORKER_MODE`` is 'gevent'.
+    """
+    if app.config.get('WORKER_MODE') != 'gevent':
+        return
+
+    engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    engine_options.setdefault('pool_size', app.config.get('COOPERATIVE_DB_POOL_SIZE', 20))
+    engine_options.setdefault('max_overflow', app.config.get('COOPERATIVE_DB_MAX_OVERFLOW', 10))
+    # Greenlets beyond the pool wait here instead of opening more connections
+    engine_options.setdefault('pool_timeout', app.config.get('COOPERATIVE_DB_POOL_TIMEOUT', 10))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+    app.config['PASSWORD_HASH_EXECUTOR'] = 'gevent'
+
+    if is_gevent_patched():
+        patch_psycopg()
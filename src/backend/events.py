@@ -0,0 +1,384 @@
+# src/backend/events.py
+"""
+Session and notification events across workers and nodes.
+
+A join, a start or an invite is handled by one gunicorn worker, but the clients
+waiting for it hold connections on other workers, and later on other nodes.
+Routes therefore publish typed events:
+
+    events.publish(db.session, events.session_topic(code), 'participant_joined', user_id=...)
+
+and every worker fans them out to the clients long-polling that topic
+(``GET /sessions/<code>/events``, ``GET /notifications/events``).
+
+Publishing is transactional. Events are kept in the SQLAlchemy session and sent
+when it commits; a rollback drops them, so clients never hear of a join that did
+not happen. Two brokers carry them between processes (``EVENT_BROKER``):
+
+    postgres  ``pg_notify`` inside the committing transaction (one statement for
+              all its events). Each worker has one listener thread, with its own
+              connection to ``EVENT_LISTEN_URL``, that ``LISTEN``s on
+              ``EVENT_CHANNEL``. This must be a direct connection: LISTEN does not
+              work through PgBouncer in transaction mode. On a multi-node ring,
+              session events go to ``EVENT_CHANNEL_<owner node>`` instead, so only
+              the node serving the session receives them (see sharding.py).
+    local     Delivered in-process after commit. For a single worker and tests.
+
+Each worker's ``EventHub`` coalesces per topic. Events that arrive within
+``EVENT_COALESCE_SECONDS`` of the previous update are merged into one update per
+kind, with a count and the latest payload. A burst of 200 joins therefore
+reaches a waiting client as a handful of "participant_joined" updates, rather
+than 200 responses. Clients treat updates as hints and fetch what they show
+(participants, live state, notifications) afterwards.
+
+Cursors are only meaningful to the worker that issued them. A poll without a
+cursor, or with one from another worker (after a load balancer moved the client),
+starts at the worker's current position and waits like any other poll; its
+response carries ``resync: true``, which means "refetch everything". Answering
+such polls right away would make a client that alternates between workers poll
+in a tight loop. A cursor older than the retained history also yields a resync.
+"""
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from . import sharding
+
+Event = namedtuple('Event', ['topic', 'kind', 'data'])
+
+KINDS = frozenset({
+    'participant_joined', 'participant_switched_team', 'session_started', 'live_state', 'score_submitted',
+    'notification',
+})
+
+_PENDING_KEY = 'pending_events'
+
+
+def session_topic(code):
+    return f"session:{code}"
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+def publish(db_session, topic, kind, **data):
+    """
+    Queues an event to be sent when ``db_session`` commits.
+
+    Args:
+        db_session: The (scoped) SQLAlchemy session of the change the event reports.
+        topic (str): ``session_topic(...)`` or ``user_topic(...)``.
+        kind (str): One of KINDS.
+        **data: JSON-serializable details.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown event kind '{kind}'")
+    db_session.info.setdefault(_PENDING_KEY, []).append(Event(topic, kind, data))
+
+
+class _Topic:
+    __slots__ = ('seq', 'history', 'pending', 'pending_since', 'last_flush')
+
+    def __init__(self, history):
+        self.seq = 0
+        self.history = deque(maxlen=history)  # (seq, [update, ...])
+        self.pending = {}  # kind -> update
+        self.pending_since = None
+        self.last_flush = float('-inf')
+
+
+class EventHub:
+    """
+    Per-process fan-out of events to long-polling clients, with coalescing.
+
+    Args:
+        coalesce_seconds (float): Least time between two updates of a topic.
+        history (int): Updates kept per topic for clients that were between polls.
+        max_topics (int): Topics kept; the least recently used go first.
+    """
+
+    def __init__(self, coalesce_seconds=0.25, history=32, max_topics=10000):
+        self.coalesce_seconds = coalesce_seconds
+        self.history = history
+        self.max_topics = max_topics
+        self.instance = uuid.uuid4().hex[:8]
+        self._topics = OrderedDict()
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self.delivered = 0
+
+    def subscribe(self, callback):
+        """
+        Registers ``callback(events)`` for every batch of events this process hears of.
+
+        Callbacks run on the thread that delivers the events (a request thread or the
+        listener thread), without an application context, and must not block.
+        """
+        self._subscribers.append(callback)
+
+    def announce(self, events):
+        """
+        Passes events to the subscribers only, without queueing them for long-polling clients.
+        """
+        for callback in self._subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"Event subscriber {callback!r} failed: {e}")
+
+    def _topic(self, name):
+        # Called with self._cond held
+        topic = self._topics.get(name)
+        if topic is None:
+            topic = self._topics[name] = _Topic(self.history)
+            while len(self._topics) > self.max_topics:
+                self._topics.popitem(last=False)
+        self._topics.move_to_end(name)
+        return topic
+
+    def deliver(self, events):
+        """
+        Adds events to their topics' pending updates and wakes the waiting clients.
+        """
+        with self._cond:
+            now = time.monotonic()
+            for ev in events:
+                topic = self._topic(ev.topic)
+                update = topic.pending.get(ev.kind)
+                if update is None:
+                    topic.pending[ev.kind] = {"kind": ev.kind, "count": 1, "data": ev.data}
+                else:
+                    update["count"] += 1
+                    update["data"] = ev.data  # The latest wins
+                if topic.pending_since is None:
+                    topic.pending_since = now
+            self._cond.notify_all()
+        self.announce(events)
+
+    def _flush_due(self, topic, now):
+        # Called with self._cond held; returns seconds until the pending updates are due (0 = flushed)
+        if not topic.pending:
+            return None
+        due = max(topic.pending_since, topic.last_flush + self.coalesce_seconds)
+        if now < due:
+            return due - now
+        topic.seq += 1
+        topic.history.append((topic.seq, list(topic.pending.values())))
+        topic.pending, topic.pending_since, topic.last_flush = {}, None, now
+        self.delivered += 1
+        return 0
+
+    def cursor(self, seq):
+        return f"{self.instance}-{seq}"
+
+    def wait(self, name, cursor, timeout):
+        """
+        Waits for updates of a topic after a cursor.
+
+        Args:
+            name (str): The topic.
+            cursor (str, optional): The cursor of the client's previous response.
+            timeout (float): Most seconds to wait.
+
+        Returns:
+            dict: ``{"cursor", "updates": [...], "resync": bool}``. Without a cursor of
+            this worker, ``resync`` is true and the updates are those of the next flush.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            topic = self._topic(name)
+            seq = None
+            if cursor:
+                instance, _, number = cursor.partition('-')
+                if instance == self.instance and number.isdigit() and int(number) <= topic.seq:
+                    seq = int(number)
+            resync = seq is None
+            if resync:
+                seq = topic.seq
+
+            while True:
+                now = time.monotonic()
+                remaining = self._flush_due(topic, now)
+                if topic.seq > seq:
+                    if not topic.history or topic.history[0][0] > seq + 1:
+                        return {"cursor": self.cursor(topic.seq), "updates": [], "resync": True}
+                    updates = [update for number, batch in topic.history if number > seq for update in batch]
+                    return {"cursor": self.cursor(topic.seq), "updates": updates, "resync": resync}
+                if now >= deadline:
+                    return {"cursor": self.cursor(topic.seq), "updates": [], "resync": resync}
+                self._cond.wait(min(deadline - now, remaining) if remaining else deadline - now)
+
+
+class LocalBroker:
+    """
+    Delivers committed events to this process's hub only.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def stage(self, session, events):
+        pass
+
+    def committed(self, events):
+        self.hub.deliver(events)
+
+    def shutdown(self):
+        pass
+
+
+class PostgresBroker:
+    """
+    Sends events with ``pg_notify`` and receives them on a listener thread.
+
+    Like the answer buffer, the listener starts lazily (on the first wait) and again after a fork.
+
+    Args:
+        hub (EventHub): Where received events go.
+        listen_url (str): Direct (non-PgBouncer) connection URL for LISTEN.
+        channel (str): The notification channel.
+    """
+
+    def __init__(self, hub, listen_url, channel, node_id=None):
+        self.hub = hub
+        self.listen_url = listen_url
+        self.channel = channel
+        self.node_id = node_id
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def _channel_for(self, topic):
+        kind, _, key = topic.partition(':')
+        owner = sharding.owner_of(key) if kind == 'session' else None
+        return f"{self.channel}_{owner}" if owner else self.channel
+
+    def stage(self, session, events):
+        channels = [self._channel_for(ev.topic) for ev in events]
+        payloads = [json.dumps({"t": ev.topic, "k": ev.kind, "d": ev.data}, separators=(',', ':')) for ev in events]
+        session.execute(text("SELECT pg_notify(channel, payload) "
+                             "FROM unnest(CAST(:channels AS text[]), CAST(:payloads AS text[])) AS e(channel, payload)"),
+                        {'channels': channels, 'payloads': payloads})
+
+    def committed(self, events):
+        # The listener threads deliver them, in this process too; subscribers hear of them right away
+        self.hub.announce(events)
+
+    def ensure_listening(self):
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._listen_loop, name='event-listener', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def _listen_loop(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        backoff = 0.1
+        while not self._stopping:
+            connection = None
+            try:
+                connection = psycopg2.connect(self.listen_url)
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                connection.cursor().execute(f'LISTEN "{self.channel}"')
+                if self.node_id:
+                    connection.cursor().execute(f'LISTEN "{self.channel}_{self.node_id}"')
+                backoff = 0.1
+                while not self._stopping:
+                    if select.select([connection], [], [], 5.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    received = []
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        try:
+                            body = json.loads(notify.payload)
+                            received.append(Event(body['t'], body['k'], body['d']))
+                        except (ValueError, KeyError):
+                            print(f"Ignoring malformed event: {notify.payload[:200]}")
+                    if received:
+                        self.hub.deliver(received)
+            except Exception as e:
+                if not self._stopping:
+                    print(f"Event listener lost its connection, reconnecting: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 5.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def shutdown(self):
+        self._stopping = True
+
+
+def _before_commit(session):
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        current_app.extensions['event_broker'].stage(session, pending)
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        current_app.extensions['event_broker'].committed(pending)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def hub():
+    return current_app.extensions['event_hub']
+
+
+def ensure_listening():
+    """
+    Starts this worker's listener if the broker has one.
+    """
+    broker = current_app.extensions['event_broker']
+    if isinstance(broker, PostgresBroker):
+        broker.ensure_listening()
+
+
+def wait(topic, cursor, timeout):
+    """
+    Long-polls a topic; see ``EventHub.wait``. Starts this worker's listener if needed.
+    """
+    ensure_listening()
+    return hub().wait(topic, cursor, timeout)
+
+
+def init_app(app):
+    event_hub = EventHub(
+        coalesce_seconds=app.config.get('EVENT_COALESCE_SECONDS', 0.25),
+        history=app.config.get('EVENT_HISTORY', 32),
+        max_topics=app.config.get('EVENT_MAX_TOPICS', 10000),
+    )
+    app.extensions['event_hub'] = event_hub
+    if app.config.get('EVENT_BROKER', 'postgres') == 'postgres':
+        app.extensions['event_broker'] = PostgresBroker(
+            event_hub,
+            listen_url=make_url(app.config.get('EVENT_LISTEN_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+            .set(drivername='postgresql').render_as_string(hide_password=False),
+            channel=app.config.get('EVENT_CHANNEL', 'aquimemni_events'),
+            node_id=app.config.get('NODE_ID'),
+        )
+    else:
+        app.extensions['event_broker'] = LocalBroker(event_hub)
+
+    if not event.contains(Session, 'before_commit', _before_commit):
+        event.listen(Session, 'before_commit', _before_commit)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_soft_rollback', _after_rollback)
@@ -0,0 +1,313 @@
+# src/backend/feed.py
+"""
+Home feed of quizzes published by the people a user follows.
+
+Reading the feed straight from ``followers`` and ``quizzes`` means merging the
+newest quizzes of every followed user on each request, which gets expensive for
+users who follow thousands. Instead every user has a precomputed timeline in
+``feed_entries``:
+
+    fan-out on write  When ``create_quiz`` commits, a background job copies the
+                      quiz into the timeline of each follower of its creator.
+                      ``flask feed trim`` (run it from cron) cuts timelines back to
+                      ``FEED_TIMELINE_LENGTH`` entries.
+    fan-out on read   Creators with more than ``FEED_FANOUT_MAX_FOLLOWERS``
+                      followers are not copied; a single quiz would mean that many
+                      inserts. They are listed in ``feed_pull_creators``, and
+                      ``feed_for`` merges their newest quizzes in at read time, via
+                      ``ix_quizzes_user_id_created_at``.
+
+Reading a page is one range scan of the user's timeline plus one short range per
+followed high-follower creator. Pages use the same ``(created_at, id)`` keyset
+cursors as the activity timeline.
+
+Settings (see ``Config``):
+    FEED_FANOUT_WORKERS        background threads per worker process (0 = fan out inline)
+    FEED_FANOUT_MAX_FOLLOWERS  above this follower count a creator is read on demand
+    FEED_TIMELINE_LENGTH       entries kept per timeline by ``trim`` and ``rebuild``
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .init_flask import db
+from .activity import encode_cursor
+
+BACKFILL_ON_FOLLOW = 20  # Newest quizzes of a creator copied in when someone follows them
+
+
+class FeedEntry(db.Model):
+    """
+    A quiz in a follower's timeline.
+    """
+    __tablename__ = 'feed_entries'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), primary_key=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_feed_entries_user_id_created_at_quiz_id', 'user_id', 'created_at', 'quiz_id'),
+                      db.Index('ix_feed_entries_creator_id', 'creator_id'))
+
+
+class FeedPullCreator(db.Model):
+    """
+    A creator whose quizzes are merged into feeds at read time instead of fanned out.
+    """
+    __tablename__ = 'feed_pull_creators'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+
+def _followers():
+    return db.metadata.tables['followers']
+
+
+# Cuts every timeline longer than :limit back to :limit entries. The LATERAL finds the
+# first entry past the limit with one short index range per long timeline.
+_TRIM_SQL = text("""
+    WITH cutoff AS (
+        SELECT long.user_id, c.created_at, c.quiz_id
+        FROM (SELECT user_id FROM feed_entries GROUP BY user_id HAVING count(*) > :limit) long
+        CROSS JOIN LATERAL (
+            SELECT e.created_at, e.quiz_id FROM feed_entries e
+            WHERE e.user_id = long.user_id
+            ORDER BY e.created_at DESC, e.quiz_id DESC
+            OFFSET :limit LIMIT 1
+        ) c
+    )
+    DELETE FROM feed_entries f
+    USING cutoff
+    WHERE f.user_id = cutoff.user_id AND (f.created_at, f.quiz_id) <= (cutoff.created_at, cutoff.quiz_id)
+""")
+
+
+def fan_out(quiz_id, creator_id, created_at, max_followers):
+    """
+    Copies a new quiz into its creator's followers' timelines (or marks the creator for reads).
+
+    Runs in its own transaction; the caller commits. Timelines are cut back to length by
+    ``trim``, not here: finding each follower's cutoff costs more than the insert itself.
+
+    Returns:
+        int: Number of timelines written (0 when the creator is read on demand).
+    """
+    followers = _followers()
+    follower_count = db.session.execute(
+        select(func.count()).select_from(followers).where(followers.c.followed_id == creator_id)).scalar()
+    if follower_count > max_followers:
+        db.session.execute(text("INSERT INTO feed_pull_creators (user_id) VALUES (:creator_id) ON CONFLICT DO NOTHING"),
+                           {'creator_id': creator_id})
+        return 0
+
+    db.session.execute(pg_insert(FeedEntry.__table__).from_select(
+        ['user_id', 'quiz_id', 'creator_id', 'created_at'],
+        select(followers.c.follower_id, literal(quiz_id), literal(creator_id), literal(created_at))
+        .where(followers.c.followed_id == creator_id)).on_conflict_do_nothing())
+    return follower_count
+
+
+def trim(timeline_length):
+    """
+    Cuts every timeline back to its newest ``timeline_length`` entries.
+
+    Returns:
+        int: Number of entries deleted.
+    """
+    return db.session.execute(_TRIM_SQL, {'limit': timeline_length}).rowcount
+
+
+def backfill(follower_id, creator_id):
+    """
+    Copies a creator's newest quizzes into a new follower's timeline (same transaction as the follow).
+    """
+    if db.session.get(FeedPullCreator, creator_id) is not None:
+        return
+    quizzes, entries = db.metadata.tables['quizzes'], FeedEntry.__table__
+    newest = (select(quizzes.c.id).where(quizzes.c.user_id == creator_id)
+              .order_by(quizzes.c.created_at.desc()).limit(BACKFILL_ON_FOLLOW).scalar_subquery())
+    db.session.execute(pg_insert(entries).from_select(
+        ['user_id', 'quiz_id', 'creator_id', 'created_at'],
+        select(literal(follower_id), quizzes.c.id, quizzes.c.user_id, func.coalesce(quizzes.c.created_at, func.now()))
+        .where(quizzes.c.id.in_(newest))).on_conflict_do_nothing())
+
+
+def forget(follower_id, creator_id):
+    """
+    Drops a creator's quizzes from a timeline after an unfollow.
+    """
+    db.session.execute(delete(FeedEntry).where(FeedEntry.user_id == follower_id, FeedEntry.creator_id == creator_id))
+
+
+def feed_for(user_id, limit, before=None):
+    """
+    Lists the newest quizzes of the people a user follows.
+
+    Args:
+        user_id (int): The reader.
+        limit (int): Page size.
+        before (tuple, optional): ``(created_at, quiz_id)`` of the last entry of the previous page.
+
+    Returns:
+        tuple: (list of quiz dicts, next cursor or None).
+    """
+    pulls, followers = FeedPullCreator.__table__, _followers()
+    # Read-on-demand creators are few, so look up the ones this user follows first and give
+    # each its own branch. With the creator id inlined, the planner sees how many quizzes
+    # they have and reads the newest ones backwards from ix_quizzes_user_id_created_at.
+    pull_ids = db.session.execute(
+        select(pulls.c.user_id)
+        .join(followers, and_(followers.c.followed_id == pulls.c.user_id, followers.c.follower_id == user_id))
+    ).scalars().all()
+
+    params = {'user_id': user_id, 'limit': limit + 1}
+    keyset = ''
+    if before is not None:
+        params['before_at'], params['before_id'] = before
+        keyset = 'AND (created_at, {id}) < (:before_at, :before_id)'
+    branches = [f"""(SELECT quiz_id, created_at FROM feed_entries
+                     WHERE user_id = :user_id {keyset.format(id='quiz_id')}
+                     ORDER BY created_at DESC, quiz_id DESC LIMIT :limit)"""]
+    for i, creator_id in enumerate(pull_ids):
+        params[f'creator_{i}'] = creator_id
+        branches.append(f"""(SELECT id, created_at FROM quizzes
+                             WHERE user_id = :creator_{i} {keyset.format(id='id')}
+                             ORDER BY created_at DESC, id DESC LIMIT :limit)""")
+    # Written as SQL: building this union with the expression API cost more than running it
+    rows = db.session.execute(text(f"""
+        SELECT page.quiz_id, page.created_at, q.name, u.id AS creator_id, u.username, u.avatar,
+               (SELECT count(*) FROM question_reads r WHERE r.quiz_id = page.quiz_id) AS questions_count
+        FROM ({' UNION '.join(branches)} ORDER BY created_at DESC, quiz_id DESC LIMIT :limit) page
+        JOIN quizzes q ON q.id = page.quiz_id
+        LEFT JOIN users u ON u.id = q.user_id
+        ORDER BY page.created_at DESC, page.quiz_id DESC
+    """), params).all()
+
+    items = [{
+        "id": row.quiz_id, "name": row.name,
+        "created_at": row.created_at.replace(tzinfo=timezone.utc).isoformat(),
+        "creator": row.username or "Unknown", "creator_id": row.creator_id, "creator_avatar": row.avatar,
+        "questions_count": row.questions_count,
+    } for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].quiz_id) if len(rows) > limit else None
+    return items, next_cursor
+
+
+class FeedFanout:
+    """
+    Runs fan-out jobs on a small per-process thread pool after the quiz is committed.
+
+    Like the password hasher, the pool is created lazily and again after a fork.
+    """
+
+    def __init__(self, app, workers=1, max_followers=10000, timeline_length=500):
+        self.app = app
+        self.workers = workers
+        self.max_followers = max_followers
+        self.timeline_length = timeline_length
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='feed-fanout')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, quiz_id, creator_id, created_at):
+        # A fresh app context gets its own db.session, independent of the request's
+        with self.app.app_context():
+            try:
+                fan_out(quiz_id, creator_id, created_at, self.max_followers)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback(); print(f"Error fanning out quiz {quiz_id}: {e}")
+
+    def publish(self, quiz_id, creator_id, created_at):
+        """
+        Schedules the fan-out of a committed quiz (runs it inline with 0 workers).
+        """
+        if self.workers <= 0:
+            return self._run(quiz_id, creator_id, created_at)
+        self._get_executor().submit(self._run, quiz_id, creator_id, created_at)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def init_app(app):
+    app.extensions['feed_fanout'] = FeedFanout(
+        app,
+        workers=app.config.get('FEED_FANOUT_WORKERS', 1),
+        max_followers=app.config.get('FEED_FANOUT_MAX_FOLLOWERS', 10000),
+        timeline_length=app.config.get('FEED_TIMELINE_LENGTH', 500),
+    )
+    app.cli.add_command(feed_cli)
+
+
+def publish(quiz):
+    """
+    Hands a just-committed quiz to the app's fan-out pool.
+    """
+    current_app.extensions['feed_fanout'].publish(quiz.id, quiz.user_id, quiz.created_at)
+
+
+def rebuild(max_followers, timeline_length):
+    """
+    Recomputes every timeline and the list of read-on-demand creators from scratch.
+    """
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    db.session.execute(text("TRUNCATE feed_entries, feed_pull_creators"))
+    db.session.execute(text("""
+        INSERT INTO feed_pull_creators (user_id)
+        SELECT followed_id FROM followers GROUP BY followed_id HAVING count(*) > :max_followers
+    """), {'max_followers': max_followers})
+    db.session.execute(text("""
+        INSERT INTO feed_entries (user_id, quiz_id, creator_id, created_at)
+        SELECT user_id, quiz_id, creator_id, created_at FROM (
+            SELECT fl.follower_id AS user_id, q.id AS quiz_id, q.user_id AS creator_id,
+                   COALESCE(q.created_at, now()) AS created_at,
+                   row_number() OVER (PARTITION BY fl.follower_id ORDER BY q.created_at DESC, q.id DESC) AS rank
+            FROM followers fl
+            JOIN quizzes q ON q.user_id = fl.followed_id
+            WHERE fl.followed_id NOT IN (SELECT user_id FROM feed_pull_creators)
+        ) ranked
+        WHERE rank <= :timeline_length
+    """), {'timeline_length': timeline_length})
+
+
+@click.group('feed')
+def feed_cli():
+    """Manage the follow feed timelines."""
+
+
+@feed_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute all feed timelines from followers and quizzes."""
+    fanout = current_app.extensions['feed_fanout']
+    rebuild(fanout.max_followers, fanout.timeline_length)
+    db.session.commit()
+    click.echo(f"Rebuilt {db.session.query(FeedEntry).count()} feed entries; "
+               f"{db.session.query(FeedPullCreator).count()} creators read on demand")
+
+
+@feed_cli.command('trim')
+@with_appcontext
+def trim_command():
+    """Cut every feed timeline back to FEED_TIMELINE_LENGTH entries."""
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    deleted = trim(current_app.extensions['feed_fanout'].timeline_length)
+    db.session.commit()
+    click.echo(f"Trimmed {deleted} feed entries")
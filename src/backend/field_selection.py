@@ -0,0 +1,71 @@
+# src/backend/field_selection.py
+"""
+Field selection for read endpoints (``?view=summary|full`` and ``?fields=a,b``).
+
+An endpoint describes its views as named field lists. The parsed
+``FieldSelection`` tells the route which fields the client asked for. The route
+uses it twice: to plan the query, e.g. a single aggregate for a summary instead of
+loading every question, and to project the response.
+
+    view=summary        the endpoint's summary fields
+    view=full           every field (the default, so existing clients see no change)
+    fields=id,name      exactly these fields; combined with view, a subset of that view
+"""
+
+
+class FieldSelection:
+    """
+    The set of response fields requested by the client.
+
+    Attributes:
+        view (str): The requested view name.
+        fields (frozenset): The fields to include in the response.
+    """
+
+    def __init__(self, view, fields):
+        self.view = view
+        self.fields = frozenset(fields)
+
+    def wants(self, *names):
+        """
+        Tells whether any of the given fields was requested.
+        """
+        return any(name in self.fields for name in names)
+
+    def project(self, data):
+        """
+        Drops every key of a response dict that was not requested.
+        """
+        return {key: value for key, value in data.items() if key in self.fields}
+
+
+def parse_field_selection(args, views, default_view='full'):
+    """
+    Reads ``view`` and ``fields`` from the query string.
+
+    Args:
+        args: The request's query arguments (``request.args``).
+        views (dict): View name -> tuple of field names. ``'full'`` must list every field.
+        default_view (str): View used when the client gives none.
+
+    Returns:
+        FieldSelection: The requested fields.
+
+    Raises:
+        ValueError: For an unknown view or field, with a message fit for a 400 response.
+    """
+    view = args.get('view', default_view).strip().lower() or default_view
+    if view not in views:
+        raise ValueError(f"Unknown view '{view}' (expected one of: {', '.join(views)})")
+
+    fields_arg = args.get('fields', '').strip()
+    if not fields_arg:
+        return FieldSelection(view, views[view])
+
+    requested = {name.strip() for name in fields_arg.split(',') if name.strip()}
+    available = set(views[view] if 'view' in args else views['full'])
+    unknown = requested - available
+    if unknown:
+        raise ValueError(f"Unknown field(s) for view '{view}': {', '.join(sorted(unknown))}")
+    # 'id' always comes along so clients can match the result to what they asked for
+    return FieldSelection(view, requested | ({'id'} & available))
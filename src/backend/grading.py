@@ -0,0 +1,75 @@
+# src/backend/grading.py
+"""
+Server-side grading of quiz answers.
+
+The rules match the quiz player (QuizSimulator.jsx), and every correct answer is
+worth one point:
+    * multiple_choice: the chosen option id is the question's first correct option
+    * text_input: the trimmed answer is non-empty and equals the correct answer, case-insensitively
+    * slider: the number equals the correct value
+
+The answer key comes from ``question_reads``, so a quiz of any size is graded from
+one index range, without loading the question hierarchy.
+"""
+from . import question_reads
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_correct(row, answer):
+    """
+    Grades one answer against a question_reads row.
+
+    Args:
+        row: The question's question_reads row.
+        answer: The submitted value (option id, text or number).
+
+    Returns:
+        bool: Whether the answer is correct.
+    """
+    if answer is None:
+        return False
+    if row.question_type == 'multiple_choice':
+        return row.correct_option_id is not None and _to_number(answer) == row.correct_option_id
+    if row.question_type == 'text_input':
+        given = str(answer).strip().lower()
+        return given != '' and given == (row.correct_answer or '').strip().lower()
+    if row.question_type == 'slider':
+        given = _to_number(answer)
+        return given is not None and row.correct_value is not None and given == row.correct_value
+    return False
+
+
+def grade(quiz_id, answers):
+    """
+    Scores a set of answers for a quiz.
+
+    Args:
+        quiz_id (int): The quiz that was played.
+        answers (dict): Question id (int or str) -> submitted value. Unanswered questions score 0.
+
+    Returns:
+        tuple: (score as float, dict of question id -> bool for every question of the quiz).
+
+    Raises:
+        ValueError: If an answer refers to a question that is not part of the quiz.
+    """
+    submitted = {}
+    for key, value in answers.items():
+        try:
+            submitted[int(key)] = value
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid question id '{key}'")
+
+    rows = question_reads.quiz_rows([quiz_id])
+    unknown = set(submitted) - {row.id for row in rows}
+    if unknown:
+        raise ValueError(f"Question(s) not in this quiz: {', '.join(map(str, sorted(unknown)))}")
+
+    results = {row.id: is_correct(row, submitted.get(row.id)) for row in rows}
+    return float(sum(results.values())), results
@@ -10,8 +10,11 @@ from flask_migrate import Migrate
 # Config wordt geïmporteerd in app.py waar create_app is
 from flask_cors import CORS
 
+from .routing import RoutingSession
+
 # Initialize extensions
-db = SQLAlchemy()
+# RoutingSession stuurt leesqueries van GET-requests naar een replica, als die er is (zie routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 # Define blueprint
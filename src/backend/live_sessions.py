@@ -0,0 +1,321 @@
+# src/backend/live_sessions.py
+"""
+Host-driven live quiz sessions.
+
+Without this module a session only knows ``started``, and each client plays the
+quiz on its own through ``/simulate``. With it, the host moves the session
+through its states and every client shows the same question at the same time:
+
+    lobby -> question 0 open -> question 0 reveal -> question 1 open -> ... -> finished
+
+``advance()`` performs the next step. An open question also closes on its own
+once its timer (``closes_at``) runs out. That expiry is never written anywhere.
+Whoever reads the state after the deadline sees the reveal, and the version
+number moves on by one exactly as if the host had closed the question. Every
+worker reaches the same result.
+
+The state lives in memory. Each worker keeps a ``LiveState`` per session in an
+LRU, together with the quiz's questions, so a poll is a dictionary lookup that
+returns the current question. A host action checkpoints the state to
+``live_session_checkpoints``, one small row per session, updated under a row
+lock. That is a handful of writes per question, and nothing per poll or per
+tick. Other workers pick the new state up when their copy is older than
+``LIVE_STATE_CACHE_TTL`` seconds, by re-reading that row through its primary
+key. The ``version`` lets clients ask "anything new since version N?" and get
+a 304 back.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import question_reads, sharding
+from .init_flask import db
+from .session import QuizSession
+
+LOBBY, QUESTION, REVEAL, FINISHED = 'lobby', 'question', 'reveal', 'finished'
+
+
+class LiveSessionCheckpoint(db.Model):
+    """
+    The last checkpointed live state of one session.
+
+    Attributes:
+        session_id (int): The quiz session.
+        phase (str): 'lobby', 'question', 'reveal' or 'finished'.
+        question_index (int): Position of the current question in the quiz (-1 in the lobby).
+        opened_at (datetime): When the current question opened.
+        closes_at (datetime): When it closes by itself.
+        version (int): Incremented on every state change, including timer expiry.
+        ring_epoch (int): Cluster ring epoch of the node that wrote it (see sharding.py).
+        updated_at (datetime): Time of the checkpoint.
+    """
+    __tablename__ = 'live_session_checkpoints'
+    session_id = db.Column(db.Integer, db.ForeignKey('quiz_sessions.id', ondelete='CASCADE'), primary_key=True)
+    phase = db.Column(db.String(16), nullable=False)
+    question_index = db.Column(db.Integer, nullable=False)
+    opened_at = db.Column(db.DateTime)
+    closes_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False)
+    ring_epoch = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+class LiveState:
+    """
+    A session's live state as held in a worker's memory.
+    """
+    __slots__ = ('session_id', 'code', 'quiz_id', 'host_id', 'questions', 'phase', 'question_index',
+                 'opened_at', 'closes_at', 'version', 'fetched_at')
+
+    def __init__(self, session_id, code, quiz_id, host_id, questions):
+        self.session_id, self.code, self.quiz_id, self.host_id = session_id, code, quiz_id, host_id
+        self.questions = questions  # question_reads rows, in quiz order
+        self.phase, self.question_index, self.opened_at, self.closes_at, self.version = LOBBY, -1, None, None, 0
+        self.fetched_at = time.monotonic()
+
+    def copy(self):
+        clone = LiveState(self.session_id, self.code, self.quiz_id, self.host_id, self.questions)
+        clone.phase, clone.question_index, clone.version = self.phase, self.question_index, self.version
+        clone.opened_at, clone.closes_at, clone.fetched_at = self.opened_at, self.closes_at, self.fetched_at
+        return clone
+
+    def load(self, checkpoint):
+        if checkpoint is not None:
+            self.phase, self.question_index = checkpoint.phase, checkpoint.question_index
+            self.opened_at, self.closes_at, self.version = checkpoint.opened_at, checkpoint.closes_at, checkpoint.version
+        self.fetched_at = time.monotonic()
+
+    def expired(self, now):
+        return self.phase == QUESTION and self.closes_at is not None and now >= self.closes_at
+
+    def settle(self, now):
+        """
+        Applies a question timer that has run out (in memory only).
+        """
+        if self.expired(now):
+            self.phase = REVEAL
+            self.version += 1
+
+    @property
+    def current_question(self):
+        if 0 <= self.question_index < len(self.questions):
+            return self.questions[self.question_index]
+        return None
+
+
+class LiveStateCache:
+    """
+    Thread-safe LRU of LiveState objects keyed by session code.
+
+    Cached states are never changed in place; a new state replaces the old one, and
+    only if its version is not older, so a slow thread cannot put back an older state.
+
+    Args:
+        ttl (float): Seconds a state may be served before its checkpoint is read again.
+        max_entries (int): Upper bound on cached sessions; the least recently used go first.
+    """
+
+    def __init__(self, ttl=0.5, max_entries=5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, code):
+        with self._lock:
+            state = self._entries.get(code)
+            if state is not None:
+                self._entries.move_to_end(code)
+            return state
+
+    def put(self, state):
+        with self._lock:
+            current = self._entries.get(state.code)
+            if current is not None and current.version > state.version:
+                return
+            self._entries[state.code] = state
+            self._entries.move_to_end(state.code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _cache():
+    return current_app.extensions['live_state_cache']
+
+
+def _read_checkpoint(session_id, for_update=False):
+    stmt = select(LiveSessionCheckpoint).where(LiveSessionCheckpoint.session_id == session_id)
+    if for_update:
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
+    return db.session.execute(stmt).scalar_one_or_none()
+
+
+def get_state(code, now=None):
+    """
+    Returns the live state of a session, from memory when it is fresh enough.
+
+    Args:
+        code (str): The session code.
+        now (datetime, optional): The current time (naive UTC), for timer expiry.
+
+    Returns:
+        LiveState or None: None if the session does not exist.
+    """
+    now = now or datetime.utcnow()
+    cache = _cache()
+    state = cache.get(code)
+    if state is None:
+        row = db.session.execute(select(QuizSession.id, QuizSession.quiz_id, QuizSession.host_id)
+                                 .where(QuizSession.code == code)).first()
+        if row is None:
+            return None
+        state = LiveState(row.id, code, row.quiz_id, row.host_id, question_reads.quiz_rows([row.quiz_id]))
+        state.load(_read_checkpoint(row.id))
+        cache.put(state)
+    elif time.monotonic() - state.fetched_at >= cache.ttl:
+        # Another worker may have advanced the session since
+        state = state.copy()
+        state.load(_read_checkpoint(state.session_id))
+        cache.put(state)
+    if state.expired(now):
+        # Every reader derives the same reveal from the cached state; nothing shared is changed
+        state = state.copy()
+        state.settle(now)
+    return state
+
+
+def advance(state, duration_seconds, now=None):
+    """
+    Moves a session one step on and checkpoints it. The caller commits.
+
+    From the lobby or a reveal the next question opens (or the session finishes
+    after the last one); an open question closes. The step is taken on a copy, so
+    the cached state stays as it is until the caller has committed and passes the
+    new state to ``remember``.
+
+    Args:
+        state (LiveState): The session's state from ``get_state``.
+        duration_seconds (float): How long a newly opened question stays open.
+        now (datetime, optional): The current time (naive UTC).
+
+    Returns:
+        LiveState: The new state.
+
+    Raises:
+        ValueError: If the session has already finished or its quiz has no questions.
+        sharding.StaleOwner: If a node with a newer cluster ring has taken the session over.
+    """
+    now = now or datetime.utcnow()
+    db.session.execute(pg_insert(LiveSessionCheckpoint).values(
+        session_id=state.session_id, phase=LOBBY, question_index=-1, version=0, ring_epoch=0, updated_at=now
+    ).on_conflict_do_nothing())
+    # Locked until commit, so a double click cannot skip a question
+    checkpoint = _read_checkpoint(state.session_id, for_update=True)
+    sharding.check_epoch(checkpoint.ring_epoch)
+    state = state.copy()
+    state.load(checkpoint)
+    state.settle(now)
+
+    if state.phase == FINISHED:
+        raise ValueError("Session has already finished")
+    if not state.questions:
+        raise ValueError("Quiz has no questions")
+    if state.phase == QUESTION:
+        state.phase, state.closes_at = REVEAL, now
+    elif state.question_index + 1 < len(state.questions):
+        state.phase, state.question_index = QUESTION, state.question_index + 1
+        state.opened_at, state.closes_at = now, now + timedelta(seconds=duration_seconds)
+    else:
+        state.phase = FINISHED
+    state.version += 1
+
+    checkpoint.phase, checkpoint.question_index, checkpoint.version = state.phase, state.question_index, state.version
+    checkpoint.opened_at, checkpoint.closes_at, checkpoint.updated_at = state.opened_at, state.closes_at, now
+    checkpoint.ring_epoch = max(checkpoint.ring_epoch, sharding.current_epoch())
+    return state
+
+
+def remember(state):
+    """
+    Serves a state from this worker's memory; call it once the checkpoint has committed.
+    """
+    _cache().put(state)
+
+
+def forget(state):
+    """
+    Makes the next ``get_state`` re-read the checkpoint (after a failed ``advance``).
+    """
+    state.fetched_at = float('-inf')
+
+
+def accepts_answer(code, question_id, now=None):
+    """
+    Tells whether a session accepts an answer to a question right now.
+
+    Sessions the host never advanced keep the self-paced flow and accept any of
+    their quiz's questions; live sessions only accept the open question.
+    """
+    state = get_state(code, now)
+    if state is None or state.version == 0:
+        return True
+    question = state.current_question
+    return state.phase == QUESTION and question is not None and question.id == question_id
+
+
+def _iso(value):
+    return value.replace(tzinfo=timezone.utc).isoformat() if value else None
+
+
+def _public_question(row):
+    data = question_reads.to_dict(row)
+    data.pop('correct_value', None)
+    data.pop('correct_answer', None)
+    if 'options' in data:
+        data['options'] = [{"id": option['id'], "text": option['text']} for option in data['options']]
+    return data
+
+
+def _answer_key(row):
+    if row.question_type == 'multiple_choice':
+        return {"correct_option_id": row.correct_option_id}
+    if row.question_type == 'slider':
+        return {"correct_value": row.correct_value}
+    return {"correct_answer": row.correct_answer}
+
+
+def to_dict(state, now=None):
+    """
+    Serializes what clients need to render the session: the state and the current question only.
+    """
+    now = now or datetime.utcnow()
+    question = state.current_question
+    data = {
+        "code": state.code, "version": state.version, "phase": state.phase,
+        "question_index": state.question_index, "question_count": len(state.questions),
+        "question": None, "closes_at": None, "seconds_left": None,
+    }
+    if question is not None and state.phase in (QUESTION, REVEAL):
+        data["question"] = _public_question(question)
+        if state.phase == QUESTION:
+            data["closes_at"] = _iso(state.closes_at)
+            data["seconds_left"] = round(max(0.0, (state.closes_at - now).total_seconds()), 1)
+        else:
+            data["question"].update(_answer_key(question))
+    return data
+
+
+def init_app(app):
+    app.extensions['live_state_cache'] = LiveStateCache(
+        ttl=app.config.get('LIVE_STATE_CACHE_TTL', 0.5),
+        max_entries=app.config.get('LIVE_STATE_CACHE_SIZE', 5000),
+    )
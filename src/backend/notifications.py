@@ -6,6 +6,32 @@ Notifications can be for various events like new followers or session invites.
 from .init_flask import db
 from datetime import datetime, timezone # Import timezone
 
+def display_message(notification_type, message, sender_username, quiz_name, session_code):
+    """
+    Returns the text shown for a notification, generating one if no message is stored.
+
+    Args:
+        notification_type (str): e.g. 'new_follower' or 'session_invite'.
+        message (str, optional): The stored custom message.
+        sender_username (str): The sender's name ("System" if there is none).
+        quiz_name (str, optional): Name of the quiz of an invited session.
+        session_code (str, optional): Code of an invited session.
+
+    Returns:
+        str: The display message.
+    """
+    if message:
+        return message
+    if notification_type == 'session_invite':
+        if sender_username and quiz_name and session_code:
+            return f"{sender_username} invited you to join the quiz '{quiz_name}'."
+        elif sender_username and session_code: # Fallback if quiz name isn't available for some reason
+            return f"{sender_username} invited you to join a session (Code: {session_code})."
+        return "You received a session invitation." # Generic fallback
+    elif notification_type == 'new_follower':
+        return f"{sender_username} started following you."
+    return f"You have a new notification of type: {notification_type}."
+
 class Notification(db.Model):
     """
     Represents a notification sent to a user.
@@ -31,6 +57,9 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+    __table_args__ = (db.Index('ix_notifications_recipient_id_is_read', 'recipient_id', 'is_read'),
+                      db.Index('ix_notifications_recipient_id_created_at', 'recipient_id', 'created_at'))
+
     # Relationships are defined via backref in User and QuizSession models
 
     def __repr__(self):
@@ -59,19 +88,8 @@ class Notification(db.Model):
             if self.session_info.quiz:
                  quiz_name = self.session_info.quiz.name
 
-        display_message = self.message
-        if not display_message: # Auto-generate message if not explicitly set
-            if self.notification_type == 'session_invite':
-                if sender_username and quiz_name and session_code:
-                    display_message = f"{sender_username} invited you to join the quiz '{quiz_name}'."
-                elif sender_username and session_code: # Fallback if quiz name isn't available for some reason
-                    display_message = f"{sender_username} invited you to join a session (Code: {session_code})."
-                else:
-                    display_message = "You received a session invitation." # Generic fallback
-            elif self.notification_type == 'new_follower':
-                 display_message = f"{sender_username} started following you."
-            else:
-                 display_message = f"You have a new notification of type: {self.notification_type}."
+        display_message_str = display_message(self.notification_type, self.message, sender_username,
+                                              quiz_name, session_code)
 
         # Make created_at timezone-aware (UTC) before formatting
         # This ensures the ISO string includes UTC timezone information (e.g., 'Z' or +00:00)
@@ -87,7 +105,7 @@ class Notification(db.Model):
             'session_code': session_code,
             'quiz_name': quiz_name,
             'notification_type': self.notification_type,
-            'message': display_message,
+            'message': display_message_str,
             'is_read': self.is_read,
             'created_at': aware_created_at.isoformat() # Now it will be like '2023-10-27T12:34:56+00:00'
         }
\ No newline at end of file
@@ -0,0 +1,171 @@
+# src/backend/passwords.py
+"""
+Password hashing offloaded to a bounded process pool.
+
+Hashing with scrypt/pbkdf2 is deliberately CPU-heavy. Running it inline in a sync
+gunicorn worker means a burst of logins at the start of a class session occupies
+every worker, and cheap requests such as lobby polls queue up behind it. The
+``PasswordHasher`` runs hashes in a small ``ProcessPoolExecutor`` per worker
+process and admits at most ``PASSWORD_HASH_QUEUE_LIMIT`` hashes in flight; anything
+beyond that fails fast with ``HashingBusy`` so the route can answer 503 instead of
+stalling.
+
+This only helps when a worker serves several requests at once: the gthread workers
+of service/gunicorn.conf.py, or the gevent workers. A plain sync worker blocks on
+the hash anyway and never has more than one hash in flight.
+
+Settings (see ``Config``):
+    PASSWORD_HASH_METHOD       werkzeug method string, e.g. 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS      processes per gunicorn worker (0 = hash inline)
+    PASSWORD_HASH_QUEUE_LIMIT  maximum hashes queued or running at once
+    PASSWORD_HASH_TIMEOUT      seconds to wait for a result before giving up
+    PASSWORD_HASH_EXECUTOR     'process' (default) or 'gevent' (native threadpool, see cooperative.py)
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing pool is saturated and the request should be rejected.
+    """
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for password hashing with admission control.
+
+    The executor is created lazily and recreated after a fork, so it is safe to
+    construct the hasher before gunicorn forks its workers.
+
+    Args:
+        method (str): werkzeug hash method used for new hashes.
+        workers (int): Number of hashing processes (0 hashes in the calling thread).
+        queue_limit (int): Maximum number of hashes admitted at the same time.
+        timeout (float): Seconds to wait for a hash result.
+        executor_factory (callable, optional): ``factory(workers)`` returning an object
+            with ``submit``/``shutdown`` like ProcessPoolExecutor (the default).
+    """
+
+    def __init__(self, method='scrypt', workers=2, queue_limit=8, timeout=10.0, executor_factory=None):
+        self.method = method
+        self.workers = workers
+        self.queue_limit = max(1, queue_limit)
+        self.timeout = timeout
+        self.executor_factory = executor_factory or (lambda max_workers: ProcessPoolExecutor(max_workers=max_workers))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self._method_prefix = None
+
+    @classmethod
+    def from_config(cls, config):
+        workers = config.get('PASSWORD_HASH_WORKERS', 2)
+        executor_factory = None
+        if config.get('PASSWORD_HASH_EXECUTOR', 'process') == 'gevent':
+            from .cooperative import GeventThreadpoolExecutor
+            executor_factory = GeventThreadpoolExecutor
+        return cls(
+            method=config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+            workers=workers,
+            queue_limit=config.get('PASSWORD_HASH_QUEUE_LIMIT') or max(1, workers) * 4,
+            timeout=config.get('PASSWORD_HASH_TIMEOUT', 10.0),
+            executor_factory=executor_factory,
+        )
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # A pool inherited through fork() is unusable; start a fresh one.
+                self._executor = self.executor_factory(self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("Password hashing capacity exhausted")
+        if self.workers <= 0:
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A hash that outlives its timeout keeps running (cancel() cannot stop it), so its
+        # slot is only freed when it actually finishes; the limit counts running hashes.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy("Password hashing timed out")
+
+    def hash(self, password):
+        """
+        Hashes a password with the configured method.
+
+        Args:
+            password (str): The plain text password.
+
+        Returns:
+            str: The werkzeug-formatted password hash.
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """
+        Checks a password against a stored hash.
+
+        Returns:
+            bool: True if the password matches.
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Tells whether a stored hash was made with other parameters than the configured ones.
+
+        Args:
+            password_hash (str): A werkzeug hash in the form ``method$salt$hash``.
+
+        Returns:
+            bool: True if the hash should be regenerated on the next successful login.
+        """
+        if self._method_prefix is None:
+            # werkzeug fills in default parameters ('scrypt' -> 'scrypt:32768:8:1'),
+            # so derive the canonical prefix from a throwaway hash once.
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def init_app(app):
+    """
+    Attaches a PasswordHasher built from the app config to ``app.extensions``.
+    """
+    app.extensions['password_hasher'] = PasswordHasher.from_config(app.config)
+
+
+def get_hasher():
+    """
+    Returns the hasher of the current app, or an inline default outside of one.
+    """
+    if has_app_context() and 'password_hasher' in current_app.extensions:
+        return current_app.extensions['password_hasher']
+    return _fallback_hasher
+
+
+_fallback_hasher = PasswordHasher(workers=0, queue_limit=1024)
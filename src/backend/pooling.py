@@ -0,0 +1,107 @@
+# src/backend/pooling.py
+"""
+Database connection pool profiles.
+
+Every gunicorn worker has its own SQLAlchemy engine and pool. ``configure`` turns
+the ``DB_*`` settings into ``SQLALCHEMY_ENGINE_OPTIONS`` for one of two profiles,
+chosen with ``DB_POOL_PROFILE``:
+
+    direct     The app connects straight to Postgres. It keeps a small pool per
+               worker, pings connections before use and recycles them
+               periodically. A per-connection statement_timeout is passed as a
+               startup option.
+    pgbouncer  The app talks to PgBouncer in transaction pooling mode. Server
+               connections are shared between clients per transaction, so nothing
+               may depend on session state. Startup options are not forwarded, so
+               the statement timeout is set with ``SET LOCAL`` at the start of each
+               transaction. Server-side prepared statements are disabled, which
+               only matters for psycopg 3; psycopg2 never prepares.
+
+Options that are already in ``SQLALCHEMY_ENGINE_OPTIONS`` win over the profile,
+including the pool sizes set by the cooperative mode (see cooperative.py).
+
+Sockets must not be shared across a fork. When gunicorn preloads the app, the
+``post_fork`` hook in ``service/gunicorn.conf.py`` calls ``dispose_engines`` so each
+worker opens its own connections.
+"""
+from sqlalchemy import event
+
+from .init_flask import db
+
+PROFILES = ('direct', 'pgbouncer')
+
+
+def engine_options(config):
+    """
+    Builds the engine options for the configured profile.
+
+    Args:
+        config (dict): The Flask app config.
+
+    Returns:
+        dict: Options for ``create_engine`` (``SQLALCHEMY_ENGINE_OPTIONS``).
+
+    Raises:
+        ValueError: If ``DB_POOL_PROFILE`` is not a known profile.
+    """
+    profile = config.get('DB_POOL_PROFILE', 'direct')
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r}; expected one of {', '.join(PROFILES)}")
+
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', config.get('DB_POOL_SIZE', 5))
+    options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', 5))
+    options.setdefault('pool_timeout', config.get('DB_POOL_TIMEOUT', 10))
+    options.setdefault('pool_recycle', config.get('DB_POOL_RECYCLE', 1800))
+    options.setdefault('pool_pre_ping', True)
+
+    connect_args = dict(options.get('connect_args') or {})
+    connect_args.setdefault('connect_timeout', config.get('DB_CONNECT_TIMEOUT', 5))
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if profile == 'direct' and statement_timeout:
+        connect_args.setdefault('options', f"-c statement_timeout={int(statement_timeout)}")
+    if profile == 'pgbouncer' and _driver(config) == 'psycopg':
+        connect_args.setdefault('prepare_threshold', None)
+    options['connect_args'] = connect_args
+    return options
+
+
+def _driver(config):
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    scheme = uri.split('://', 1)[0]
+    return scheme.split('+', 1)[1] if '+' in scheme else 'psycopg2'
+
+
+def configure(app):
+    """
+    Stores the profile's engine options in the app config. Must run before ``db.init_app``.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+
+def init_app(app):
+    """
+    Attaches per-transaction hooks to the engines. Must run after ``db.init_app``.
+    """
+    statement_timeout = app.config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if app.config.get('DB_POOL_PROFILE', 'direct') != 'pgbouncer' or not statement_timeout:
+        return
+
+    def _set_local_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout)}")
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'begin', _set_local_timeout)
+
+
+def dispose_engines(app):
+    """
+    Drops connections inherited from a parent process without closing them.
+
+    Call this in a freshly forked worker. ``close=False`` leaves the parent's
+    sockets alone and makes the child's pool start empty.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
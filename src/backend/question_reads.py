@@ -0,0 +1,191 @@
+# src/backend/question_reads.py
+"""
+Flattened, read-optimized copy of the question hierarchy.
+
+``Question`` uses joined-table inheritance. Every read that needs a full question
+therefore joins ``questions`` with the three subclass tables and then loads
+``multiple_choice_options``. ``question_reads`` keeps one row per question
+instead: the type-specific columns side by side, the options as a JSONB array,
+and the first correct option precomputed. An index on ``(quiz_id, id)`` means
+rendering or grading a whole quiz reads one index range.
+
+The table is derived data and is never written directly:
+    * ORM writes keep it current. A flush records every touched Question or
+      MultipleChoiceOption. Just before commit those questions are rebuilt from
+      the normalized tables, in the same transaction. Deleted questions and
+      quizzes disappear through ON DELETE CASCADE.
+    * Bulk loads that bypass the ORM (``flask seed``) call ``rebuild()``, and
+      ``flask question-reads rebuild`` recreates everything.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import String, delete, event, func, insert, select, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, aggregate_order_by
+
+from .init_flask import db
+from .routing import RoutingSession
+from .Questions import Question, TextInputQuestion, SliderQuestion, MultipleChoiceOption
+
+_PENDING_KEY = 'question_reads_pending'
+
+
+class QuestionRead(db.Model):
+    """
+    One question with all of its type-specific data.
+
+    Attributes:
+        id (int): The question id.
+        quiz_id (int): The quiz it belongs to.
+        question_type (str): 'text_input', 'multiple_choice' or 'slider'.
+        options (list): ``[{"id", "text", "is_correct"}, ...]`` ordered by id (multiple choice only).
+        correct_option_id (int): First correct option (multiple choice only).
+        correct_answer_text (str): Text of that option.
+    """
+    __tablename__ = 'question_reads'
+    id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    question_type = db.Column(db.String(50))
+    question_text = db.Column(db.String(1000), nullable=False)
+    max_length = db.Column(db.Integer)
+    correct_answer = db.Column(db.String(255))
+    min_value = db.Column(db.Integer)
+    max_value = db.Column(db.Integer)
+    step = db.Column(db.Integer)
+    correct_value = db.Column(db.Integer)
+    options = db.Column(JSONB)
+    correct_option_id = db.Column(db.Integer)
+    correct_answer_text = db.Column(db.String(255))
+
+    __table_args__ = (db.Index('ix_question_reads_quiz_id_id', 'quiz_id', 'id'),)
+
+
+def _source_select(question_ids=None):
+    """
+    Builds the SELECT that derives question_reads rows from the normalized tables.
+    """
+    q, t, s = Question.__table__, TextInputQuestion.__table__, SliderQuestion.__table__
+    o = MultipleChoiceOption.__table__
+
+    options = select(
+        o.c.question_id,
+        func.jsonb_agg(aggregate_order_by(
+            func.jsonb_build_object('id', o.c.id, 'text', o.c.text, 'is_correct', o.c.is_correct), o.c.id)
+        ).label('options'),
+        func.min(o.c.id).filter(o.c.is_correct).label('correct_option_id'),
+        type_coerce(func.array_agg(aggregate_order_by(o.c.text, o.c.id)).filter(o.c.is_correct),
+                    ARRAY(String))[1].label('correct_answer_text'),
+    ).group_by(o.c.question_id)
+    if question_ids is not None:
+        options = options.where(o.c.question_id.in_(question_ids))
+    options = options.subquery('mc')
+
+    is_mc = q.c.question_type == 'multiple_choice'
+    stmt = (select(q.c.id, q.c.quiz_id, q.c.question_type, q.c.question_text,
+                   t.c.max_length, t.c.correct_answer,
+                   s.c.min_value, s.c.max_value, s.c.step, s.c.correct_value,
+                   db.case((is_mc, func.coalesce(options.c.options, db.text("'[]'::jsonb")))),
+                   options.c.correct_option_id, options.c.correct_answer_text)
+            .select_from(q)
+            .outerjoin(t, t.c.id == q.c.id)
+            .outerjoin(s, s.c.id == q.c.id)
+            .outerjoin(options, options.c.question_id == q.c.id))
+    if question_ids is not None:
+        stmt = stmt.where(q.c.id.in_(question_ids))
+    return stmt
+
+
+_COLUMNS = ['id', 'quiz_id', 'question_type', 'question_text', 'max_length', 'correct_answer', 'min_value',
+            'max_value', 'step', 'correct_value', 'options', 'correct_option_id', 'correct_answer_text']
+
+
+def rebuild(session=None, question_ids=None):
+    """
+    Re-derives question_reads rows from the normalized tables.
+
+    Args:
+        session: Session or connection to run in (defaults to ``db.session``).
+        question_ids (iterable, optional): Only these questions; all questions if omitted.
+    """
+    session = session or db.session
+    table = QuestionRead.__table__
+    ids = None if question_ids is None else sorted(question_ids)
+    if ids is not None and not ids:
+        return
+    stmt = delete(table)
+    if ids is not None:
+        stmt = stmt.where(table.c.id.in_(ids))
+    session.execute(stmt)
+    session.execute(insert(table).from_select(_COLUMNS, _source_select(ids)))
+
+
+def _collect_touched_questions(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Question):
+            pending.add(obj.id)
+        elif isinstance(obj, MultipleChoiceOption):
+            pending.add(obj.question_id)
+    pending.discard(None)
+
+
+def _refresh_before_commit(session):
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        rebuild(session, pending)
+
+
+def _forget_pending(session, *args):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(RoutingSession, 'after_flush', _collect_touched_questions)
+event.listen(RoutingSession, 'before_commit', _refresh_before_commit)
+event.listen(RoutingSession, 'after_soft_rollback', _forget_pending)
+
+
+def quiz_rows(quiz_ids):
+    """
+    Loads the flattened questions of one or more quizzes, ordered by quiz and id.
+
+    Args:
+        quiz_ids (list): Quiz ids.
+
+    Returns:
+        list: Rows with the QuestionRead columns.
+    """
+    table = QuestionRead.__table__
+    stmt = select(table).where(table.c.quiz_id.in_(quiz_ids)).order_by(table.c.quiz_id, table.c.id)
+    return db.session.execute(stmt).all()
+
+
+def to_dict(row):
+    """
+    Serializes a question_reads row like the ORM question serializer (``_question_to_dict``).
+    """
+    data = {"id": row.id, "type": row.question_type, "text": row.question_text}
+    if row.question_type == 'multiple_choice':
+        data['options'] = row.options or []
+    elif row.question_type == 'slider':
+        data.update({"min": row.min_value, "max": row.max_value, "step": row.step, "correct_value": row.correct_value})
+    elif row.question_type == 'text_input':
+        data.update({"max_length": row.max_length, "correct_answer": row.correct_answer})
+    return data
+
+
+def init_app(app):
+    app.cli.add_command(question_reads_cli)
+
+
+@click.group('question-reads')
+def question_reads_cli():
+    """Manage the flattened question read table."""
+
+
+@question_reads_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Rebuild question_reads from the question tables."""
+    rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt {db.session.query(QuestionRead).count()} question rows")
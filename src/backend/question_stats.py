@@ -0,0 +1,251 @@
+# src/backend/question_stats.py
+"""
+Per-question answer analytics for quiz creators.
+
+Working out which questions people get wrong from the ``answers`` inheritance
+tables means joining every answer a quiz ever received. ``refresh()`` rolls the
+answers up in batches instead:
+
+    question_stats           answers and correct answers per question
+    question_answer_buckets  answer counts per multiple choice option, or per
+                             slider histogram bin (SLIDER_BINS equal bins over
+                             the question's range)
+
+Text answers only contribute to the correctness rate. Correctness follows the
+rules of ``grading.is_correct``, using the answer key in ``question_reads``.
+
+Like quiz_stats, each run continues from a watermark (the last answer id counted)
+and adds one aggregating statement's worth of counts. Answers newer than
+``QUESTION_STATS_SETTLE_SECONDS`` are left for the next run, so a transaction
+that commits a lower id late is not skipped. ``quiz_analytics`` reads one row per
+question and one per bucket, however often the quiz was played.
+
+The rollups reflect the answer key at the time of counting. After editing a
+quiz's correct answers or slider ranges, run ``flask question-stats rebuild``.
+Run ``flask question-stats refresh`` from cron.
+"""
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .init_flask import db
+from .question_reads import QuestionRead
+
+SLIDER_BINS = 20  # Changing this needs a rebuild
+
+
+class QuestionStats(db.Model):
+    """
+    Answer totals of one question.
+
+    Attributes:
+        question_id (int): The question.
+        quiz_id (int): Its quiz, to read a quiz's rollups in one index range.
+        answer_count (int): Answers counted.
+        correct_count (int): How many of them were correct.
+    """
+    __tablename__ = 'question_stats'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    answer_count = db.Column(db.Integer, default=0, nullable=False)
+    correct_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (db.Index('ix_question_stats_quiz_id', 'quiz_id'),)
+
+
+class QuestionAnswerBucket(db.Model):
+    """
+    Answers of one question that chose one option (bucket = option id) or fell in one slider bin.
+    """
+    __tablename__ = 'question_answer_buckets'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class QuestionStatsWatermark(db.Model):
+    """
+    The last answer counted by ``refresh`` (a single row).
+    """
+    __tablename__ = 'question_stats_watermark'
+    id = db.Column(db.Integer, primary_key=True)
+    answer_id = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+# Adds the answers with :from_id < id <= :to_id to the rollups. Slider values go into
+# LEAST(SLIDER_BINS, range size) equal bins; out-of-range values land in the outer bins.
+# Sliders with an empty range (max < min) get no bin. Text is trimmed of all whitespace,
+# like str.strip() in grading.is_correct.
+_REFRESH_SQL = text(r"""
+    WITH batch AS (
+        SELECT a.question_id, r.quiz_id,
+               CASE a.answer_type
+                   WHEN 'multiple_choice' THEN m.option_id
+                   WHEN 'slider' THEN CASE WHEN r.max_value >= r.min_value THEN LEAST(GREATEST(
+                       floor((sl.value - r.min_value)::numeric * LEAST(:bins, r.max_value - r.min_value + 1)
+                             / (r.max_value - r.min_value + 1)), 0),
+                       LEAST(:bins, r.max_value - r.min_value + 1) - 1)::int END
+               END AS bucket,
+               CASE a.answer_type
+                   WHEN 'multiple_choice' THEN m.option_id = r.correct_option_id
+                   WHEN 'slider' THEN sl.value = r.correct_value
+                   WHEN 'text_input' THEN regexp_replace(lower(t.text), '^\s+|\s+$', '', 'g') <> ''
+                                          AND regexp_replace(lower(t.text), '^\s+|\s+$', '', 'g')
+                                              = regexp_replace(lower(r.correct_answer), '^\s+|\s+$', '', 'g')
+               END AS correct
+        FROM answers a
+        JOIN question_reads r ON r.id = a.question_id
+        LEFT JOIN multiple_choice_answers m ON m.id = a.id AND a.answer_type = 'multiple_choice'
+        LEFT JOIN slider_answers sl ON sl.id = a.id AND a.answer_type = 'slider'
+        LEFT JOIN text_input_answers t ON t.id = a.id AND a.answer_type = 'text_input'
+        WHERE a.id > :from_id AND a.id <= :to_id
+    ), buckets AS (
+        INSERT INTO question_answer_buckets AS b (question_id, bucket, count)
+        SELECT question_id, bucket, count(*) FROM batch WHERE bucket IS NOT NULL GROUP BY question_id, bucket
+        ON CONFLICT (question_id, bucket) DO UPDATE SET count = b.count + EXCLUDED.count
+    )
+    INSERT INTO question_stats AS st (question_id, quiz_id, answer_count, correct_count)
+    SELECT question_id, min(quiz_id), count(*), count(*) FILTER (WHERE correct) FROM batch GROUP BY question_id
+    ON CONFLICT (question_id) DO UPDATE SET
+        answer_count = st.answer_count + EXCLUDED.answer_count,
+        correct_count = st.correct_count + EXCLUDED.correct_count
+""")
+
+
+def _watermark():
+    db.session.execute(pg_insert(QuestionStatsWatermark).values(
+        id=1, answer_id=0, updated_at=datetime.utcnow()).on_conflict_do_nothing())
+    # Locked until commit, so two overlapping runs cannot count the same answers twice
+    return db.session.execute(select(QuestionStatsWatermark).where(QuestionStatsWatermark.id == 1)
+                              .with_for_update().execution_options(populate_existing=True)).scalar_one()
+
+
+def refresh(settle_seconds=None, now=None):
+    """
+    Adds the answers stored since the watermark to the rollups and advances it.
+
+    The caller commits.
+
+    Args:
+        settle_seconds (int, optional): Answers younger than this are left for the next run.
+        now (datetime, optional): The current time (naive UTC).
+
+    Returns:
+        int: Number of questions whose stats changed.
+    """
+    if settle_seconds is None:
+        settle_seconds = current_app.config.get('QUESTION_STATS_SETTLE_SECONDS', 60)
+    settled_before = (now or datetime.utcnow()) - timedelta(seconds=settle_seconds)
+
+    mark = _watermark()
+    # Up to, not including, the first unsettled answer
+    to_id = db.session.execute(text("""
+        SELECT COALESCE(
+            (SELECT min(id) - 1 FROM answers WHERE id > :from_id AND answered_at >= :settled_before),
+            (SELECT max(id) FROM answers))
+    """), {'from_id': mark.answer_id, 'settled_before': settled_before}).scalar()
+    if to_id is None or to_id <= mark.answer_id:
+        return 0
+
+    changed = db.session.execute(_REFRESH_SQL, {'from_id': mark.answer_id, 'to_id': to_id,
+                                                'bins': SLIDER_BINS}).rowcount
+    mark.answer_id, mark.updated_at = to_id, datetime.utcnow()
+    return changed
+
+
+def rebuild(settle_seconds=None):
+    """
+    Recomputes the rollups from all answers (after answer key changes).
+    """
+    db.session.execute(text("TRUNCATE question_stats, question_answer_buckets"))
+    _watermark().answer_id = 0
+    db.session.flush()
+    return refresh(settle_seconds)
+
+
+def _slider_bins(row, counts):
+    size = row.max_value - row.min_value + 1
+    bins = min(SLIDER_BINS, size)
+    # Bin i holds the values v with floor((v - min) * bins / size) == i
+    return [{"from": row.min_value + -(-i * size // bins), "to": row.min_value + -(-(i + 1) * size // bins) - 1,
+             "count": counts.get(i, 0)} for i in range(bins)]
+
+
+def quiz_analytics(quiz_id):
+    """
+    Builds the per-question analytics of a quiz from the rollups.
+
+    Args:
+        quiz_id (int): The quiz.
+
+    Returns:
+        dict: ``{"quiz_id", "updated_at", "questions": [...]}``, questions in quiz order.
+    """
+    questions = db.session.execute(select(QuestionRead).where(QuestionRead.quiz_id == quiz_id)
+                                   .order_by(QuestionRead.id)).scalars().all()
+    totals = {row.question_id: row for row in db.session.execute(
+        select(QuestionStats).where(QuestionStats.quiz_id == quiz_id)).scalars()}
+    buckets = {}
+    if questions:
+        for row in db.session.execute(select(QuestionAnswerBucket).where(
+                QuestionAnswerBucket.question_id.in_([q.id for q in questions]))).scalars():
+            buckets.setdefault(row.question_id, {})[row.bucket] = row.count
+    mark = db.session.get(QuestionStatsWatermark, 1)
+
+    result = []
+    for question in questions:
+        stats = totals.get(question.id)
+        answered = stats.answer_count if stats else 0
+        correct = stats.correct_count if stats else 0
+        entry = {
+            "id": question.id, "question_text": question.question_text, "type": question.question_type,
+            "answer_count": answered, "correct_count": correct,
+            "correct_rate": round(correct / answered, 4) if answered else None,
+        }
+        counts = buckets.get(question.id, {})
+        if question.question_type == 'multiple_choice':
+            entry["options"] = [{"id": option['id'], "text": option['text'], "is_correct": option['is_correct'],
+                                 "count": counts.get(option['id'], 0)} for option in question.options or []]
+        elif question.question_type == 'slider' and question.min_value is not None \
+                and question.max_value is not None and question.max_value >= question.min_value:
+            entry["histogram"] = _slider_bins(question, counts)
+        result.append(entry)
+    return {
+        "quiz_id": quiz_id,
+        "updated_at": mark.updated_at.replace(tzinfo=timezone.utc).isoformat() if mark else None,
+        "questions": result,
+    }
+
+
+def init_app(app):
+    app.cli.add_command(question_stats_cli)
+
+
+@click.group('question-stats')
+def question_stats_cli():
+    """Manage per-question answer analytics."""
+
+
+@question_stats_cli.command('refresh')
+@with_appcontext
+def refresh_command():
+    """Add answers stored since the last run to the rollups."""
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    changed = refresh()
+    db.session.commit()
+    click.echo(f"Updated stats of {changed} questions")
+
+
+@question_stats_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute the rollups from all answers."""
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    changed = rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt stats of {changed} questions")
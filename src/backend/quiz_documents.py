@@ -0,0 +1,104 @@
+# src/backend/quiz_documents.py
+"""
+Quiz documents assembled inside Postgres.
+
+Loading a quiz through the ORM takes several round trips: the polymorphic
+``questions`` load across the three subclass tables, a selectin load for
+``multiple_choice_options``, the lazy ``quiz.user``, and then Python code that
+rebuilds the nested dicts. ``load_details`` and ``load_for_play`` instead build the
+complete response for ``GET /quizzes/<id>`` and ``GET /simulate/<id>`` in one
+statement with ``jsonb_agg``/``jsonb_build_object``. The questions come from the
+flattened ``question_reads`` table (see question_reads.py), so that statement reads
+one index range per quiz. The route sends the returned text as the response body
+without parsing it.
+
+The documents match the ORM serializers in app.py field for field. Questions and
+options are ordered by id, and timestamps are rendered like
+``created_at.replace(tzinfo=timezone.utc).isoformat()``. Key order inside objects
+differs, which JSON clients do not rely on.
+
+On other databases, or with ``QUIZ_DOCUMENT_SQL = False``, ``enabled`` returns
+False and the routes keep using the ORM serializers.
+"""
+from flask import current_app
+from sqlalchemy import text
+
+from .init_flask import db
+
+# Python's isoformat() leaves out the fraction when it is zero. Colons are escaped for text().
+_ISO_UTC = ("regexp_replace(to_char({col}, 'YYYY-MM-DD\"T\"HH24\\:MI\\:SS.US'), '\\.000000$', '') || '+00:00'")
+
+_QUESTIONS_SQL = """
+    SELECT jsonb_agg(
+               jsonb_build_object('id', r.id, 'type', r.question_type, 'text', r.question_text) ||
+               CASE r.question_type
+                   WHEN 'text_input' THEN jsonb_build_object('max_length', r.max_length, 'correct_answer', r.correct_answer)
+                   WHEN 'slider' THEN jsonb_build_object('min', r.min_value, 'max', r.max_value,
+                                                         'step', r.step, 'correct_value', r.correct_value)
+                   WHEN 'multiple_choice' THEN {multiple_choice}
+                   ELSE '{{}}'::jsonb
+               END
+               ORDER BY r.id) AS questions,
+           count(*) AS questions_count
+    FROM question_reads r
+    WHERE r.quiz_id = qz.id
+"""
+
+# The play document hides is_correct; the options array keeps its order
+_OPTIONS_WITHOUT_CORRECT = """COALESCE((SELECT jsonb_agg(o.option - 'is_correct' ORDER BY o.n)
+                     FROM jsonb_array_elements(r.options) WITH ORDINALITY AS o(option, n)), '[]'::jsonb)"""
+
+DETAILS_SQL = text(f"""
+SELECT jsonb_build_object(
+    'id', qz.id, 'name', qz.name, 'created_at', {_ISO_UTC.format(col='qz.created_at')},
+    'creator', COALESCE(u.username, 'Unknown'), 'creator_id', u.id, 'creator_avatar', u.avatar,
+    'questions', COALESCE(qs.questions, '[]'::jsonb), 'questions_count', qs.questions_count
+)::text
+FROM quizzes qz
+LEFT JOIN users u ON u.id = qz.user_id
+CROSS JOIN LATERAL ({_QUESTIONS_SQL.format(
+    multiple_choice="jsonb_build_object('options', COALESCE(r.options, '[]'::jsonb))")}) qs
+WHERE qz.id = :quiz_id
+""")
+
+PLAY_SQL = text(f"""
+SELECT jsonb_build_object(
+    'quiz_id', qz.id, 'quiz_name', qz.name, 'questions', COALESCE(qs.questions, '[]'::jsonb)
+)::text
+FROM quizzes qz
+CROSS JOIN LATERAL ({_QUESTIONS_SQL.format(
+    multiple_choice=(f"jsonb_build_object('options', {_OPTIONS_WITHOUT_CORRECT}, "
+                     "'correct_option_id', r.correct_option_id, 'correct_answer_text', r.correct_answer_text)"))}) qs
+WHERE qz.id = :quiz_id
+""")
+
+
+def enabled():
+    """
+    Tells whether quiz documents can be built in the database for this app.
+    """
+    return current_app.config.get('QUIZ_DOCUMENT_SQL', True) and db.engine.dialect.name == 'postgresql'
+
+
+def load_details(quiz_id):
+    """
+    Builds the ``GET /quizzes/<id>`` document (full view).
+
+    Args:
+        quiz_id (int): The quiz to load.
+
+    Returns:
+        str or None: The JSON text, or None if the quiz does not exist.
+    """
+    return db.session.execute(DETAILS_SQL, {'quiz_id': quiz_id}).scalar()
+
+
+def load_for_play(quiz_id):
+    """
+    Builds the ``GET /simulate/<id>`` document: options without ``is_correct``, plus the
+    correct option of every multiple choice question.
+
+    Returns:
+        str or None: The JSON text, or None if the quiz does not exist.
+    """
+    return db.session.execute(PLAY_SQL, {'quiz_id': quiz_id}).scalar()
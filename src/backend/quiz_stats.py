@@ -0,0 +1,278 @@
+# src/backend/quiz_stats.py
+"""
+Popularity and trending statistics per quiz.
+
+Counting plays, players and scores from ``quiz_sessions`` and
+``session_participants`` on every search would scan those tables per request.
+``refresh()`` computes them in a batch instead and keeps one row per played quiz
+in ``quiz_stats``:
+
+    play_count      participants over all started sessions
+    unique_players  distinct users among them
+    score_sum       sum of their scores (average = score_sum / play_count)
+    trending_log    log of the time-decayed play weight, see below
+
+Each run only reads sessions started after the watermark in
+``quiz_stats_watermark`` and adds their plays to the totals, in one aggregating
+statement. Sessions started less than ``QUIZ_STATS_SETTLE_MINUTES`` ago are left
+for the next run, because their scores are still coming in. The watermark follows
+the start time rather than the creation time: a lobby can stay open for a while,
+and a session started after newer ones were counted must still be counted. Unique players are counted
+exactly through ``quiz_stats_players``, which remembers who has been counted.
+
+Every play adds ``exp(rate * (started_at - TRENDING_EPOCH))`` to a quiz's weight,
+with ``rate = ln 2 / QUIZ_TRENDING_HALF_LIFE_HOURS``. Relative to now, that is a
+weight that halves every half-life. The sum grows without bound, so it is stored
+as its logarithm, and sorting on ``trending_log`` ranks quizzes by trend at any
+moment without rewriting old rows. ``trending_score`` converts it back to today's
+decayed play count. Changing the half-life needs ``flask quiz-stats rebuild``.
+
+Run ``flask quiz-stats refresh`` from cron (every few minutes).
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .init_flask import db
+from .question_reads import QuestionRead
+
+TRENDING_EPOCH = datetime(2024, 1, 1)
+_WATERMARK_START = (datetime(1970, 1, 1), 0)
+
+
+class QuizStats(db.Model):
+    """
+    Aggregated play statistics of one quiz.
+
+    Attributes:
+        quiz_id (int): The quiz.
+        play_count (int): Participants over all its started sessions.
+        unique_players (int): Distinct users among them.
+        score_sum (float): Sum of their scores.
+        trending_log (float): Log of the decayed play weight (higher is more trending).
+        last_played_at (datetime): Start time of its newest counted session.
+    """
+    __tablename__ = 'quiz_stats'
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), primary_key=True)
+    play_count = db.Column(db.Integer, default=0, nullable=False)
+    unique_players = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Float, default=0.0, nullable=False)
+    trending_log = db.Column(db.Float, nullable=False)
+    last_played_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_quiz_stats_trending_log', 'trending_log'),)
+
+
+class QuizStatsPlayer(db.Model):
+    """
+    A user already counted in a quiz's ``unique_players``.
+    """
+    __tablename__ = 'quiz_stats_players'
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+
+class QuizStatsWatermark(db.Model):
+    """
+    The last session counted by ``refresh`` (a single row).
+    """
+    __tablename__ = 'quiz_stats_watermark'
+    id = db.Column(db.Integer, primary_key=True)
+    session_started_at = db.Column(db.DateTime, nullable=False)
+    session_id = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+# Adds the plays of sessions in ((:from_at, :from_id), (:to_at, :to_id)] to quiz_stats.
+# The per-quiz weight is summed as max(x) + ln(sum(exp(x - max(x)))), and merged into the
+# stored one the same way, so no exp() ever overflows; the clamps keep it from underflowing.
+_REFRESH_SQL = text("""
+    WITH plays AS (
+        SELECT s.quiz_id, s.started_at, p.user_id, COALESCE(p.score, 0) AS score,
+               :rate * extract(epoch FROM s.started_at - :epoch) AS x
+        FROM quiz_sessions s
+        JOIN session_participants p ON p.session_id = s.id
+        WHERE s.started
+          AND (s.started_at, s.id) > (:from_at, :from_id) AND (s.started_at, s.id) <= (:to_at, :to_id)
+    ), new_players AS (
+        INSERT INTO quiz_stats_players (quiz_id, user_id)
+        SELECT DISTINCT quiz_id, user_id FROM plays
+        ON CONFLICT DO NOTHING
+        RETURNING quiz_id
+    ), new_player_counts AS (
+        SELECT quiz_id, count(*) AS n FROM new_players GROUP BY quiz_id
+    ), per_quiz AS (
+        SELECT quiz_id, count(*) AS plays, sum(score) AS score_sum, max(started_at) AS last_played_at,
+               max(x) + ln(sum(exp(GREATEST(x - max_x, -700)))) AS trending_log
+        FROM (SELECT *, max(x) OVER (PARTITION BY quiz_id) AS max_x FROM plays) p
+        GROUP BY quiz_id
+    )
+    INSERT INTO quiz_stats AS st (quiz_id, play_count, unique_players, score_sum, trending_log, last_played_at)
+    SELECT q.quiz_id, q.plays, COALESCE(n.n, 0), q.score_sum, q.trending_log, q.last_played_at
+    FROM per_quiz q
+    LEFT JOIN new_player_counts n ON n.quiz_id = q.quiz_id
+    ON CONFLICT (quiz_id) DO UPDATE SET
+        play_count = st.play_count + EXCLUDED.play_count,
+        unique_players = st.unique_players + EXCLUDED.unique_players,
+        score_sum = st.score_sum + EXCLUDED.score_sum,
+        trending_log = GREATEST(st.trending_log, EXCLUDED.trending_log)
+                       + ln(1 + exp(-LEAST(abs(st.trending_log - EXCLUDED.trending_log), 700))),
+        last_played_at = GREATEST(st.last_played_at, EXCLUDED.last_played_at)
+""")
+
+
+def decay_rate(half_life_hours=None):
+    """
+    Returns the decay rate per second for a half-life (default: the app's setting).
+    """
+    if half_life_hours is None:
+        half_life_hours = current_app.config.get('QUIZ_TRENDING_HALF_LIFE_HOURS', 48)
+    return math.log(2) / (half_life_hours * 3600.0)
+
+
+def trending_score(trending_log, rate, now=None):
+    """
+    Converts a stored ``trending_log`` into the decayed play count at ``now``.
+    """
+    now = now or datetime.utcnow()
+    return math.exp(trending_log - rate * (now - TRENDING_EPOCH).total_seconds())
+
+
+def _watermark():
+    db.session.execute(pg_insert(QuizStatsWatermark).values(
+        id=1, session_started_at=_WATERMARK_START[0], session_id=_WATERMARK_START[1],
+        updated_at=datetime.utcnow()).on_conflict_do_nothing())
+    # Locked until commit, so two overlapping runs cannot count the same sessions twice
+    return db.session.execute(select(QuizStatsWatermark).where(QuizStatsWatermark.id == 1)
+                              .with_for_update().execution_options(populate_existing=True)).scalar_one()
+
+
+def refresh(settle_minutes=None, rate=None, now=None):
+    """
+    Adds the sessions started since the watermark to quiz_stats and advances it.
+
+    The caller commits.
+
+    Args:
+        settle_minutes (int, optional): Sessions started less than this ago are left for the next run.
+        rate (float, optional): Decay rate per second (default from ``decay_rate()``).
+        now (datetime, optional): The current time (naive UTC).
+
+    Returns:
+        int: Number of quizzes whose stats changed.
+    """
+    if settle_minutes is None:
+        settle_minutes = current_app.config.get('QUIZ_STATS_SETTLE_MINUTES', 60)
+    rate = decay_rate() if rate is None else rate
+    settled_before = (now or datetime.utcnow()) - timedelta(minutes=settle_minutes)
+
+    mark = _watermark()
+    upper = db.session.execute(text("""
+        SELECT started_at, id FROM quiz_sessions
+        WHERE started AND started_at < :settled_before AND (started_at, id) > (:from_at, :from_id)
+        ORDER BY started_at DESC, id DESC LIMIT 1
+    """), {'settled_before': settled_before, 'from_at': mark.session_started_at,
+           'from_id': mark.session_id}).first()
+    if upper is None:
+        return 0
+
+    changed = db.session.execute(_REFRESH_SQL, {
+        'rate': rate, 'epoch': TRENDING_EPOCH,
+        'from_at': mark.session_started_at, 'from_id': mark.session_id,
+        'to_at': upper.started_at, 'to_id': upper.id,
+    }).rowcount
+    mark.session_started_at, mark.session_id = upper.started_at, upper.id
+    mark.updated_at = datetime.utcnow()
+    return changed
+
+
+def rebuild(settle_minutes=None, rate=None):
+    """
+    Recomputes quiz_stats from all sessions (after a half-life change, or to pick up late scores).
+    """
+    db.session.execute(text("TRUNCATE quiz_stats, quiz_stats_players"))
+    mark = _watermark()
+    mark.session_started_at, mark.session_id = _WATERMARK_START
+    db.session.flush()
+    return refresh(settle_minutes, rate)
+
+
+def to_dict(stats, rate, now=None):
+    """
+    Serializes a QuizStats row (or None for a quiz that was never played) for the API.
+    """
+    if stats is None:
+        return {"play_count": 0, "unique_players": 0, "avg_score": None, "trending_score": 0.0}
+    return {
+        "play_count": stats.play_count,
+        "unique_players": stats.unique_players,
+        "avg_score": round(stats.score_sum / stats.play_count, 2) if stats.play_count else None,
+        "trending_score": round(trending_score(stats.trending_log, rate, now), 3),
+    }
+
+
+def trending(limit, rate, now=None):
+    """
+    Lists the most trending quizzes in the search result format, with their stats.
+
+    Args:
+        limit (int): Number of quizzes.
+        rate (float): Decay rate per second.
+        now (datetime, optional): The current time (naive UTC).
+
+    Returns:
+        list: Quiz dicts, most trending first.
+    """
+    quizzes, users = db.metadata.tables['quizzes'], db.metadata.tables['users']
+    questions_count = (select(func.count(QuestionRead.id)).where(QuestionRead.quiz_id == QuizStats.quiz_id)
+                       .scalar_subquery())
+    top = select(QuizStats).order_by(QuizStats.trending_log.desc()).limit(limit).subquery()
+    stmt = (select(QuizStats, quizzes.c.name, quizzes.c.created_at, users.c.username, users.c.avatar,
+                   questions_count.label('questions_count'))
+            .select_from(top)
+            .join(QuizStats, QuizStats.quiz_id == top.c.quiz_id)
+            .join(quizzes, quizzes.c.id == QuizStats.quiz_id)
+            .outerjoin(users, users.c.id == quizzes.c.user_id)
+            .order_by(QuizStats.trending_log.desc()))
+    return [{
+        "id": row.QuizStats.quiz_id, "name": row.name,
+        "creator": row.username or 'Unknown', "creator_avatar": row.avatar,
+        "created_at": row.created_at.replace(tzinfo=timezone.utc).isoformat() if row.created_at else None,
+        "questions_count": row.questions_count,
+        **to_dict(row.QuizStats, rate, now),
+    } for row in db.session.execute(stmt)]
+
+
+def init_app(app):
+    app.cli.add_command(quiz_stats_cli)
+
+
+@click.group('quiz-stats')
+def quiz_stats_cli():
+    """Manage quiz popularity statistics."""
+
+
+@quiz_stats_cli.command('refresh')
+@with_appcontext
+def refresh_command():
+    """Add sessions played since the last run to quiz_stats."""
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    changed = refresh()
+    db.session.commit()
+    click.echo(f"Updated stats of {changed} quizzes")
+
+
+@quiz_stats_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute quiz_stats from all sessions."""
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    changed = rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt stats of {changed} quizzes; "
+               f"{db.session.query(func.count(QuizStatsPlayer.quiz_id)).scalar()} player pairs")
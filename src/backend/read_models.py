@@ -0,0 +1,268 @@
+# src/backend/read_models.py
+"""
+Read models for list endpoints, built on SQLAlchemy Core selects.
+
+The list routes only copy a handful of columns per row into a dict. Loading full
+``User``, ``SessionParticipant`` or ``Notification`` entities for that means
+identity-map bookkeeping, relationship loading and attribute instrumentation for
+every row. The functions here select exactly the columns a response needs, often
+joining in what used to be a second query. Rows come back as small ``__slots__``
+objects whose ``to_dict`` produces the same JSON as before.
+
+Queries still run through ``db.session``, so replica routing applies
+(see routing.py). See ``script/bench_read_models.py`` for a comparison with the
+ORM path.
+"""
+from datetime import timezone
+
+from sqlalchemy import func, literal, select, union_all
+
+from .init_flask import db
+from .notifications import Notification, display_message
+from .session import QuizSession, SessionParticipant
+
+
+def _table(name):
+    # users/followers are defined in app.py, which imports this module
+    return db.metadata.tables[name]
+
+
+def _iso_utc(value):
+    return value.replace(tzinfo=timezone.utc).isoformat() if value else None
+
+
+class UserListItem:
+    """
+    A user in a list, with whether the viewer follows them.
+    """
+    __slots__ = ('id', 'username', 'avatar', 'is_following')
+
+    def __init__(self, id, username, avatar, is_following):
+        self.id = id
+        self.username = username
+        self.avatar = avatar
+        self.is_following = is_following
+
+    def to_dict(self, with_following=True):
+        data = {"id": self.id, "username": self.username, "avatar": self.avatar}
+        if with_following:
+            data["is_following"] = self.is_following
+        return data
+
+
+class ParticipantItem:
+    """
+    A participant row of a session roster or result list.
+    """
+    __slots__ = ('user_id', 'username', 'avatar', 'team_number', 'score')
+
+    def __init__(self, user_id, username, avatar, team_number, score):
+        self.user_id = user_id
+        self.username = username
+        self.avatar = avatar
+        self.team_number = team_number
+        self.score = score
+
+    def to_dict(self):
+        return {'user_id': self.user_id, 'username': self.username, 'avatar': self.avatar,
+                'team_number': self.team_number, 'score': self.score}
+
+
+class NotificationItem:
+    """
+    A notification with the sender and session fields its message needs.
+    """
+    __slots__ = ('id', 'recipient_id', 'sender_id', 'sender_username', 'sender_avatar', 'session_id',
+                 'session_code', 'quiz_name', 'notification_type', 'message', 'is_read', 'created_at')
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+
+    def to_dict(self):
+        """
+        Same shape as ``Notification.to_dict``.
+        """
+        sender_username = self.sender_username or "System"
+        return {
+            'id': self.id, 'recipient_id': self.recipient_id, 'sender_id': self.sender_id,
+            'sender_username': sender_username, 'sender_avatar': self.sender_avatar,
+            'session_id': self.session_id, 'session_code': self.session_code, 'quiz_name': self.quiz_name,
+            'notification_type': self.notification_type,
+            'message': display_message(self.notification_type, self.message, sender_username,
+                                       self.quiz_name, self.session_code),
+            'is_read': self.is_read, 'created_at': _iso_utc(self.created_at),
+        }
+
+
+def _is_following_column(viewer_id, user_id_column):
+    # Aliased, so it does not correlate with a followers join in the outer query
+    follows = _table('followers').alias('viewer_follows')
+    return (select(literal(True)).where(follows.c.follower_id == viewer_id, follows.c.followed_id == user_id_column)
+            .exists().label('is_following'))
+
+
+def all_users(viewer_id):
+    """
+    Lists every user except the viewer, by username, with the viewer's follow state.
+
+    Returns:
+        list of UserListItem
+    """
+    users = _table('users')
+    stmt = (select(users.c.id, users.c.username, users.c.avatar, _is_following_column(viewer_id, users.c.id))
+            .where(users.c.id != viewer_id).order_by(users.c.username.asc()))
+    return [UserListItem(*row) for row in db.session.execute(stmt)]
+
+
+def followers_of(user_id):
+    """
+    Lists the followers of a user, with whether the user follows them back.
+
+    Returns:
+        list of UserListItem
+    """
+    users, followers = _table('users'), _table('followers')
+    stmt = (select(users.c.id, users.c.username, users.c.avatar, _is_following_column(user_id, users.c.id))
+            .join(followers, followers.c.follower_id == users.c.id)
+            .where(followers.c.followed_id == user_id))
+    return [UserListItem(*row) for row in db.session.execute(stmt)]
+
+
+def followed_by(user_id):
+    """
+    Lists the users a user follows.
+
+    Returns:
+        list of UserListItem (``is_following`` is always True)
+    """
+    users, followers = _table('users'), _table('followers')
+    stmt = (select(users.c.id, users.c.username, users.c.avatar, literal(True))
+            .join(followers, followers.c.followed_id == users.c.id)
+            .where(followers.c.follower_id == user_id))
+    return [UserListItem(*row) for row in db.session.execute(stmt)]
+
+
+def session_participants(session_code, by_score=False):
+    """
+    Lists the participants of a session in one query, looked up by session code.
+
+    Args:
+        session_code (str): The session's join code.
+        by_score (bool): Order by score, highest first (as the results page does).
+
+    Returns:
+        list of ParticipantItem, or None if the session does not exist.
+    """
+    users = _table('users')
+    sessions, participants = QuizSession.__table__, SessionParticipant.__table__
+    # Outer joins keep one row for a session without participants, so 404 and [] stay distinguishable
+    stmt = (select(sessions.c.id, users.c.id, users.c.username, users.c.avatar,
+                   participants.c.team_number, participants.c.score)
+            .select_from(sessions)
+            .outerjoin(participants, participants.c.session_id == sessions.c.id)
+            .outerjoin(users, users.c.id == participants.c.user_id)
+            .where(sessions.c.code == session_code))
+    if by_score:
+        stmt = stmt.order_by(participants.c.score.desc())
+    rows = db.session.execute(stmt).all()
+    if not rows:
+        return None
+    return [ParticipantItem(*row[1:]) for row in rows if row[1] is not None]
+
+
+def session_team_counts(session_code):
+    """
+    Counts a session's participants per team in one query, looked up by session code.
+
+    Returns:
+        tuple: (session id, {team_number: count}), or None if the session does not exist.
+    """
+    sessions, participants = QuizSession.__table__, SessionParticipant.__table__
+    stmt = (select(sessions.c.id, participants.c.team_number, func.count(participants.c.id))
+            .select_from(sessions)
+            .outerjoin(participants, participants.c.session_id == sessions.c.id)
+            .where(sessions.c.code == session_code)
+            .group_by(sessions.c.id, participants.c.team_number))
+    rows = db.session.execute(stmt).all()
+    if not rows:
+        return None
+    return rows[0][0], {team: count for _, team, count in rows if count}
+
+
+def _participant_select(session_id):
+    users = _table('users')
+    participants = SessionParticipant.__table__
+    return (select(participants.c.id, users.c.id.label('user_id'), users.c.username, users.c.avatar,
+                   participants.c.team_number, participants.c.score)
+            .join(users, users.c.id == participants.c.user_id)
+            .where(participants.c.session_id == session_id))
+
+
+def participant_sample(session_id, sample_size):
+    """
+    Loads the first and newest joiners of a session in one query.
+
+    Each part reads at most ``sample_size`` rows from the (session_id, id) index, however
+    large the session is.
+
+    Returns:
+        dict: ``{"first": [...], "newest": [...]}`` of ParticipantItem, newest first in "newest".
+    """
+    participants = SessionParticipant.__table__
+    parts = [_participant_select(session_id).add_columns(literal(label).label('part')).order_by(order).limit(sample_size)
+             for label, order in (('first', participants.c.id.asc()), ('newest', participants.c.id.desc()))]
+    result = {"first": [], "newest": []}
+    for row in db.session.execute(union_all(*[p.subquery().select() for p in parts])):
+        result[row.part].append((row.id, ParticipantItem(row.user_id, row.username, row.avatar, row.team_number, row.score)))
+    for label, reverse in (("first", False), ("newest", True)):
+        result[label] = [item for _, item in sorted(result[label], key=lambda pair: pair[0], reverse=reverse)]
+    return result
+
+
+def participant_of(session_id, user_id):
+    """
+    Loads one user's entry in a session, or None if they did not join.
+    """
+    participants = SessionParticipant.__table__
+    row = db.session.execute(_participant_select(session_id).where(participants.c.user_id == user_id)).first()
+    return ParticipantItem(*row[1:]) if row else None
+
+
+def participant_roster(session_id, limit, after_id=None):
+    """
+    Pages through a session's participants in join order (keyset on the participant id).
+
+    Returns:
+        tuple: (list of ParticipantItem, next cursor or None).
+    """
+    participants = SessionParticipant.__table__
+    stmt = _participant_select(session_id).order_by(participants.c.id).limit(limit + 1)
+    if after_id is not None:
+        stmt = stmt.where(participants.c.id > after_id)
+    rows = db.session.execute(stmt).all()
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    return [ParticipantItem(*row[1:]) for row in rows[:limit]], next_cursor
+
+
+def notifications_for(recipient_id, limit):
+    """
+    Lists a user's newest notifications with sender and session fields joined in.
+
+    Returns:
+        list of NotificationItem
+    """
+    users, notifications = _table('users'), Notification.__table__
+    sessions, quizzes = QuizSession.__table__, _table('quizzes')
+    stmt = (select(notifications.c.id, notifications.c.recipient_id, notifications.c.sender_id,
+                   users.c.username.label('sender_username'), users.c.avatar.label('sender_avatar'),
+                   notifications.c.session_id, sessions.c.code.label('session_code'),
+                   quizzes.c.name.label('quiz_name'), notifications.c.notification_type,
+                   notifications.c.message, notifications.c.is_read, notifications.c.created_at)
+            .select_from(notifications)
+            .outerjoin(users, users.c.id == notifications.c.sender_id)
+            .outerjoin(sessions, sessions.c.id == notifications.c.session_id)
+            .outerjoin(quizzes, quizzes.c.id == sessions.c.quiz_id)
+            .where(notifications.c.recipient_id == recipient_id)
+            .order_by(notifications.c.created_at.desc()).limit(limit))
+    return [NotificationItem(row) for row in db.session.execute(stmt)]
@@ -0,0 +1,116 @@
+# src/backend/responses.py
+"""
+Response encoding: fast JSON serialization and compression of large bodies.
+
+``FastJSONProvider`` replaces Flask's json-module provider with orjson when it is
+installed. Quiz lists with every question and option serialize several times
+faster that way. The output stays compatible: keys are sorted and non-string keys
+are converted. Datetimes are written as ISO 8601. Naive datetimes are taken to be
+UTC, so a raw ``created_at`` gives the same string as the routes' hand-built
+``created_at.replace(tzinfo=timezone.utc).isoformat()``. Without orjson the same
+rules apply through the standard json module.
+
+``init_app`` also installs an ``after_request`` hook that compresses JSON and text
+bodies of at least ``COMPRESS_MIN_BYTES``. It uses brotli when the client accepts
+it and the ``brotli`` package is installed, otherwise gzip, and follows the q
+values in ``Accept-Encoding``.
+
+Settings (see ``Config``):
+    JSON_PROVIDER        'orjson' (default, falls back to json if missing) or 'json'
+    COMPRESS_MIN_BYTES   smallest body worth compressing (0 disables compression)
+    COMPRESS_GZIP_LEVEL  1-9
+    COMPRESS_BR_QUALITY  0-11; low qualities are fast enough for dynamic responses
+"""
+import gzip
+from datetime import date, datetime, timezone
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider, _default as _flask_default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return (o if o.tzinfo else o.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    return _flask_default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, with the standard json module as fallback.
+    """
+    default = staticmethod(_default)
+    use_orjson = orjson is not None
+
+    def _orjson_option(self):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # Formatting arguments such as indent are only supported by the json module
+        if not self.use_orjson or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode()
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_option() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BR_QUALITY', 4))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+
+def init_app(app):
+    """
+    Installs the JSON provider and the compression hook built from the app config.
+    """
+    if app.config.get('JSON_PROVIDER', 'orjson') == 'orjson':
+        app.json = FastJSONProvider(app)
+
+    min_bytes = app.config.get('COMPRESS_MIN_BYTES', 1024)
+    if not min_bytes:
+        return
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed or not 200 <= response.status_code < 300
+                or response.status_code in (204, 206) or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(offered)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(_compress(data, encoding, app.config))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,129 @@
+# src/backend/routing.py
+"""
+Read-replica routing for ``db.session``.
+
+Most traffic is reads: lobby polls, profiles, quiz details, notifications and
+search. When ``DB_REPLICA_URIS`` lists one or more replicas, each is registered as
+an extra bind (``replica_0``, ``replica_1``, ...). ``RoutingSession`` then sends the
+queries of GET/HEAD requests to one replica per request. Everything else goes to
+the primary: flushes, INSERT/UPDATE/DELETE statements, SELECT ... FOR UPDATE,
+non-GET requests and work outside a request (CLI, tests). Raw ``text()`` SQL
+goes to a replica only when it is a plain query: a SELECT/WITH without DML,
+locking clauses or functions with side effects (pg_notify, nextval, advisory
+locks). Anything else, including SET, goes to the primary.
+
+Read-your-writes: after a request has written to the primary, the response sets
+a short-lived ``db_primary_until`` cookie. The client's reads in the next
+``READ_STICKY_SECONDS`` go to the primary as well, so a participant sees their own
+join in the lobby poll that follows it, even if the replica lags. The cookie only
+ever moves reads to the primary, so tampering with it is harmless.
+
+Without replicas nothing changes: every query uses the primary. To try this
+locally with a single database, point ``DB_REPLICA_URIS`` at the primary itself.
+"""
+import random
+import re
+import time
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+STICKY_COOKIE = 'db_primary_until'
+
+
+_READ_ONLY_TEXT = re.compile(r'\s*(\(\s*)*(select|with|values|show|explain)\b', re.IGNORECASE)
+_WRITE_IN_TEXT = re.compile(
+    r'\b(insert|update|delete|merge|truncate|for\s+(no\s+key\s+)?update|for\s+(key\s+)?share'
+    r'|pg_notify|nextval|setval|pg_advisory\w*|pg_try_advisory\w*)\b', re.IGNORECASE)
+
+
+def _is_write(clause):
+    if isinstance(clause, sa.sql.dml.UpdateBase):
+        return True
+    if isinstance(clause, sa.sql.elements.TextClause):
+        # Raw SQL is only sent to a replica when it is clearly a plain query
+        return not _READ_ONLY_TEXT.match(clause.text) or _WRITE_IN_TEXT.search(clause.text) is not None
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+def _replica_key():
+    """
+    Returns the replica bind key for the current request, or None to use the primary.
+    """
+    if not has_request_context():
+        return None
+    if 'db_replica' not in g:
+        replicas = current_app.extensions.get('db_replicas')
+        key = None
+        if replicas and request.method in ('GET', 'HEAD'):
+            try:
+                sticky_until = float(request.cookies.get(STICKY_COOKIE, 0))
+            except ValueError:
+                sticky_until = 0
+            if sticky_until < time.time():
+                key = random.choice(replicas)
+        g.db_replica = key
+    return g.db_replica
+
+
+def pinned_to_primary():
+    """
+    Returns True when replicas exist but this request reads from the primary for read-your-writes.
+    """
+    return bool(current_app.extensions.get('db_replicas')) and _replica_key() is None
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that reads from a replica during GET requests.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                if has_request_context():
+                    g.db_wrote = True
+            else:
+                key = _replica_key()
+                if key is not None:
+                    return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def configure(app):
+    """
+    Registers the replicas as binds. Must run before ``db.init_app``.
+    """
+    uris = app.config.get('DB_REPLICA_URIS') or []
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+    for index, uri in enumerate(uris):
+        keys.append(f'replica_{index}')
+        binds[keys[-1]] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_replicas'] = keys
+    if keys:
+        app.after_request(_mark_sticky)
+
+
+def init_app(app, db):
+    """
+    Hides the replica binds from schema operations. Must run after ``db.init_app``.
+
+    Flask-SQLAlchemy registers an (empty) metadata per bind. Without this,
+    ``create_all``/``drop_all`` and Flask-Migrate would also run against the replicas.
+    """
+    for key in app.extensions['db_replicas']:
+        db.metadatas.pop(key, None)
+
+
+def _mark_sticky(response):
+    if g.get('db_wrote') and response.status_code < 400:
+        window = current_app.config.get('READ_STICKY_SECONDS', 5)
+        response.set_cookie(
+            STICKY_COOKIE, str(int(time.time() + window) + 1), max_age=window, httponly=True,
+            samesite=current_app.config.get('SESSION_COOKIE_SAMESITE'),
+            secure=current_app.config.get('SESSION_COOKIE_SECURE', False),
+        )
+    return response
@@ -0,0 +1,426 @@
+# src/backend/seed.py
+"""
+Bulk synthetic data seeder, exposed as the ``flask seed`` command.
+
+Building large test databases through the ORM is far too slow (one INSERT and one
+password hash per user), so this module generates rows in Python and streams them
+into Postgres with ``COPY ... FROM STDIN`` in batches. Primary keys are assigned up
+front and the sequences are moved past them afterwards, which lets the joined-table
+inheritance layout of ``Question`` and ``Answer`` be written as parallel streams
+(``questions`` + ``text_input_questions`` / ``multiple_choice_questions`` /
+``slider_questions`` share the same id, and likewise for ``answers``).
+
+Usage:
+    flask --app src.wsgi seed --users 1000000 --quizzes 200000 --sessions 100000
+"""
+import io
+import random
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .init_flask import db
+from .passwords import get_hasher
+from . import question_reads, activity, feed, quiz_stats, question_stats
+
+QUESTION_TYPES = ('multiple_choice', 'slider', 'text_input')
+OPTIONS_PER_QUESTION = 4
+NOTIFICATION_TYPES = ('new_follower', 'session_invite')
+
+
+def _format_value(value):
+    """
+    Formats one value for the COPY text format.
+    """
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ')
+    return str(value)
+
+
+class CopyStream:
+    """
+    Buffers rows for one table and ships them to Postgres with COPY in batches.
+
+    Works with both psycopg2 (``copy_expert``) and psycopg 3 (``cursor.copy``).
+    Streams listed in ``parents`` are flushed first, so a batch never references
+    rows (foreign keys, inheritance parents) that are still sitting in a buffer.
+    """
+
+    def __init__(self, cursor, table, columns, batch_rows, parents=()):
+        self.cursor = cursor
+        self.sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        self.batch_rows = batch_rows
+        self.parents = parents
+        self.lines = []
+        self.total = 0
+
+    def write(self, *row):
+        self.lines.append('\t'.join(_format_value(v) for v in row) + '\n')
+        if len(self.lines) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        for parent in self.parents:
+            parent.flush()
+        if not self.lines:
+            return
+        data = ''.join(self.lines)
+        if hasattr(self.cursor, 'copy_expert'):
+            self.cursor.copy_expert(self.sql, io.StringIO(data))
+        else:
+            with self.cursor.copy(self.sql) as copy:
+                copy.write(data)
+        self.total += len(self.lines)
+        self.lines = []
+
+
+def _next_id(cursor, table):
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _sync_sequence(cursor, table):
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+    )
+
+
+def _base36(number):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    out = ''
+    while True:
+        number, rem = divmod(number, 36)
+        out = digits[rem] + out
+        if not number:
+            return out
+
+
+class Seeder:
+    """
+    Generates and loads a consistent synthetic data set.
+
+    Args:
+        cursor: A DBAPI cursor on a raw Postgres connection.
+        rng (random.Random): Source of randomness (seeded for reproducible data sets).
+        batch_rows (int): Rows per COPY batch.
+    """
+
+    def __init__(self, cursor, rng, batch_rows=50000):
+        self.cursor = cursor
+        self.rng = rng
+        self.batch_rows = batch_rows
+        self.now = datetime.utcnow()
+        self.user_ids = (0, 0)           # half-open range [first, last)
+        self.popularity_cum = None       # cumulative power-law weights over users
+        self.quiz_first_question = array('q')
+        self.quiz_first_option = array('q')
+        self.quiz_first_id = 0
+        self.questions_per_quiz = 0
+
+    def _stream(self, table, columns, parents=()):
+        return CopyStream(self.cursor, table, columns, self.batch_rows, parents)
+
+    def _timestamp(self, max_days=365):
+        moment = self.now - timedelta(seconds=self.rng.randrange(max_days * 86400))
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _random_user(self):
+        first, last = self.user_ids
+        return first + self.rng.randrange(last - first)
+
+    def _popular_user(self):
+        """
+        Draws a user id with probability following the power-law popularity curve.
+        """
+        first, _ = self.user_ids
+        total = self.popularity_cum[-1]
+        return first + bisect_left(self.popularity_cum, self.rng.random() * total)
+
+    def seed_users(self, count, password, exponent):
+        """
+        Loads ``count`` users sharing one precomputed password hash.
+        """
+        shared_hash = get_hasher().hash(password)
+        first = _next_id(self.cursor, 'users')
+        stream = self._stream('users', ['id', 'username', 'password_hash', 'bio', 'avatar', 'registered_at',
+                                        'banner_type', 'banner_value', 'notifications_enabled'])
+        for user_id in range(first, first + count):
+            stream.write(user_id, f'seed_{user_id}', shared_hash, None, self.rng.randint(1, 12),
+                         self._timestamp(), 'color', '#6c757d', self.rng.random() < 0.9)
+        stream.flush()
+        _sync_sequence(self.cursor, 'users')
+        self.user_ids = (first, first + count)
+
+        # Zipf-like popularity: the k-th user is followed with weight 1 / k**exponent.
+        cumulative, running = array('d'), 0.0
+        for rank in range(1, count + 1):
+            running += 1.0 / rank ** exponent
+            cumulative.append(running)
+        self.popularity_cum = cumulative
+        return stream.total
+
+    def seed_follows(self, avg_follows):
+        """
+        Builds a power-law follow graph: out-degrees are Pareto distributed and
+        targets are drawn by popularity, so a few users collect most followers.
+        """
+        stream = self._stream('followers', ['follower_id', 'followed_id'])
+        first, last = self.user_ids
+        cap = max(1, min(last - first - 1, avg_follows * 50))
+        # Pareto(alpha=2) has mean 2 * x_m, so x_m = avg / 2 keeps the requested average.
+        scale = max(avg_follows / 2.0, 0.5)
+        for follower in range(first, last):
+            degree = min(cap, int(scale * self.rng.paretovariate(2.0)))
+            targets = set()
+            attempts = 0
+            while len(targets) < degree and attempts < degree * 3:
+                attempts += 1
+                target = self._popular_user()
+                if target != follower:
+                    targets.add(target)
+            for target in targets:
+                stream.write(follower, target)
+        stream.flush()
+        return stream.total
+
+    def seed_quizzes(self, count, questions_per_quiz):
+        """
+        Loads quizzes with all three question subtypes (and MCQ options), writing the
+        base ``questions`` rows and the subtype rows with shared ids.
+        """
+        quizzes = self._stream('quizzes', ['id', 'user_id', 'name', 'created_at'])
+        questions = self._stream('questions', ['id', 'quiz_id', 'question_text', 'question_type', 'created_at'],
+                                 parents=(quizzes,))
+        text_inputs = self._stream('text_input_questions', ['id', 'max_length', 'correct_answer'],
+                                   parents=(questions,))
+        mcqs = self._stream('multiple_choice_questions', ['id'], parents=(questions,))
+        sliders = self._stream('slider_questions', ['id', 'min_value', 'max_value', 'step', 'correct_value'],
+                               parents=(questions,))
+        options = self._stream('multiple_choice_options', ['id', 'question_id', 'text', 'is_correct'],
+                               parents=(mcqs,))
+
+        quiz_id = self.quiz_first_id = _next_id(self.cursor, 'quizzes')
+        question_id = _next_id(self.cursor, 'questions')
+        option_id = _next_id(self.cursor, 'multiple_choice_options')
+        self.questions_per_quiz = questions_per_quiz
+
+        for _ in range(count):
+            created_at = self._timestamp()
+            quizzes.write(quiz_id, self._popular_user(), f'Seed quiz {quiz_id}', created_at)
+            self.quiz_first_question.append(question_id)
+            self.quiz_first_option.append(option_id)
+            for position in range(questions_per_quiz):
+                q_type = QUESTION_TYPES[position % len(QUESTION_TYPES)]
+                questions.write(question_id, quiz_id, f'Seed question {position + 1} of quiz {quiz_id}?',
+                                q_type, created_at)
+                if q_type == 'multiple_choice':
+                    mcqs.write(question_id)
+                    correct = self.rng.randrange(OPTIONS_PER_QUESTION)
+                    for k in range(OPTIONS_PER_QUESTION):
+                        options.write(option_id, question_id, f'Option {k + 1}', k == correct)
+                        option_id += 1
+                elif q_type == 'slider':
+                    sliders.write(question_id, 0, 100, 1, self.rng.randint(0, 100))
+                else:
+                    text_inputs.write(question_id, 64, f'answer{self.rng.randint(1, 9)}')
+                question_id += 1
+            quiz_id += 1
+
+        for stream in (quizzes, questions, text_inputs, mcqs, sliders, options):
+            stream.flush()
+        for table in ('quizzes', 'questions', 'multiple_choice_options'):
+            _sync_sequence(self.cursor, table)
+        return quizzes.total, questions.total, options.total
+
+    def seed_sessions(self, count, participants_per_session, answer_ratio):
+        """
+        Loads quiz sessions with participants and, for a share of the participants,
+        per-question answers in the ``answers`` inheritance tables.
+        """
+        sessions = self._stream('quiz_sessions', ['id', 'quiz_id', 'host_id', 'code', 'started', 'created_at',
+                                                  'started_at', 'num_teams'])
+        participants = self._stream('session_participants', ['id', 'session_id', 'user_id', 'team_number', 'score'],
+                                    parents=(sessions,))
+        answers = self._stream('answers', ['id', 'user_id', 'question_id', 'answered_at', 'answer_type'])
+        text_answers = self._stream('text_input_answers', ['id', 'text'], parents=(answers,))
+        mc_answers = self._stream('multiple_choice_answers', ['id', 'option_id'], parents=(answers,))
+        slider_answers = self._stream('slider_answers', ['id', 'value'], parents=(answers,))
+
+        session_id = _next_id(self.cursor, 'quiz_sessions')
+        participant_id = _next_id(self.cursor, 'session_participants')
+        answer_id = _next_id(self.cursor, 'answers')
+        quiz_count = len(self.quiz_first_question)
+
+        for _ in range(count):
+            quiz_index = self.rng.randrange(quiz_count)
+            num_teams = self.rng.choice((1, 1, 1, 2, 4))
+            created_at = self._timestamp()
+            sessions.write(session_id, self.quiz_first_id + quiz_index, self._random_user(),
+                           f'Z{_base36(session_id):0>7}', True, created_at, created_at, num_teams)
+
+            size = max(1, int(self.rng.expovariate(1.0 / participants_per_session)))
+            members = {self._random_user() for _ in range(size)}
+            for user_id in members:
+                team = self.rng.randint(1, num_teams) if num_teams > 1 else None
+                participants.write(participant_id, session_id, user_id, team, round(self.rng.uniform(0, 100), 1))
+                participant_id += 1
+
+                if self.rng.random() >= answer_ratio:
+                    continue
+                first_question = self.quiz_first_question[quiz_index]
+                mc_index = 0
+                for position in range(self.questions_per_quiz):
+                    q_type = QUESTION_TYPES[position % len(QUESTION_TYPES)]
+                    answers.write(answer_id, user_id, first_question + position, created_at, q_type)
+                    if q_type == 'multiple_choice':
+                        first_option = self.quiz_first_option[quiz_index] + mc_index * OPTIONS_PER_QUESTION
+                        mc_answers.write(answer_id, first_option + self.rng.randrange(OPTIONS_PER_QUESTION))
+                        mc_index += 1
+                    elif q_type == 'slider':
+                        slider_answers.write(answer_id, self.rng.randint(0, 100))
+                    else:
+                        text_answers.write(answer_id, f'answer{self.rng.randint(1, 9)}')
+                    answer_id += 1
+            session_id += 1
+
+        for stream in (sessions, participants, answers, text_answers, mc_answers, slider_answers):
+            stream.flush()
+        for table in ('quiz_sessions', 'session_participants', 'answers'):
+            _sync_sequence(self.cursor, table)
+        return sessions.total, participants.total, answers.total
+
+    def seed_notifications(self, count):
+        """
+        Loads follower and session-invite notifications.
+        """
+        stream = self._stream('notifications', ['id', 'recipient_id', 'sender_id', 'session_id',
+                                                'notification_type', 'message', 'is_read', 'created_at'])
+        self.cursor.execute("SELECT MIN(id), MAX(id) FROM quiz_sessions")
+        min_session, max_session = self.cursor.fetchone()
+        notification_id = _next_id(self.cursor, 'notifications')
+        for _ in range(count):
+            n_type = self.rng.choice(NOTIFICATION_TYPES) if min_session else 'new_follower'
+            session_ref = self.rng.randint(min_session, max_session) if n_type == 'session_invite' else None
+            stream.write(notification_id, self._popular_user(), self._random_user(), session_ref, n_type, None,
+                         self.rng.random() < 0.7, self._timestamp(30))
+            notification_id += 1
+        stream.flush()
+        _sync_sequence(self.cursor, 'notifications')
+        return stream.total
+
+
+def _rebuild_user_activity():
+    """
+    Backfills the activity timeline for the copied sessions and participants.
+    """
+    db.session.execute(db.text("SET LOCAL statement_timeout = 0"))
+    activity.rebuild()
+    db.session.commit()
+    return db.session.query(activity.UserActivity).count()
+
+
+def _rebuild_question_reads():
+    """
+    COPY bypasses the ORM hooks that maintain question_reads, so derive it in bulk.
+    """
+    db.session.execute(db.text("SET LOCAL statement_timeout = 0"))
+    question_reads.rebuild()
+    db.session.commit()
+    return db.session.query(question_reads.QuestionRead).count()
+
+
+def _rebuild_quiz_stats():
+    """
+    Counts the copied sessions into quiz_stats, including ones too recent for a normal refresh.
+    """
+    db.session.execute(db.text("SET LOCAL statement_timeout = 0"))
+    changed = quiz_stats.rebuild(settle_minutes=0)
+    db.session.commit()
+    return changed
+
+
+def _rebuild_question_stats():
+    """
+    Rolls the copied answers up into the per-question analytics.
+    """
+    db.session.execute(db.text("SET LOCAL statement_timeout = 0"))
+    changed = question_stats.rebuild(settle_seconds=0)
+    db.session.commit()
+    return changed
+
+
+def _rebuild_feed():
+    """
+    Fills the follow feed timelines for the copied follows and quizzes.
+    """
+    fanout = current_app.extensions['feed_fanout']
+    feed.rebuild(fanout.max_followers, fanout.timeline_length)
+    db.session.commit()
+    return db.session.query(feed.FeedEntry).count()
+
+
+@click.command('seed')
+@click.option('--users', default=10000, show_default=True, help='Number of users to create.')
+@click.option('--avg-follows', default=20, show_default=True, help='Average number of users each user follows.')
+@click.option('--popularity-exponent', default=1.1, show_default=True, help='Power-law exponent of follow targets.')
+@click.option('--quizzes', default=2000, show_default=True)
+@click.option('--questions-per-quiz', default=10, show_default=True)
+@click.option('--sessions', default=1000, show_default=True)
+@click.option('--participants-per-session', default=20, show_default=True, help='Mean session size.')
+@click.option('--answer-ratio', default=0.0, show_default=True,
+              help='Share of participants that also get per-question answer rows.')
+@click.option('--notifications', default=20000, show_default=True)
+@click.option('--password', default='password', show_default=True, help='Password shared by all seeded users.')
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per COPY batch.')
+@click.option('--seed', 'random_seed', default=None, type=int, help='Random seed for reproducible data.')
+@with_appcontext
+def seed_command(users, avg_follows, popularity_exponent, quizzes, questions_per_quiz, sessions,
+                 participants_per_session, answer_ratio, notifications, password, batch_size, random_seed):
+    """Bulk-load synthetic users, follows, quizzes, sessions and notifications."""
+    if users < 2:
+        raise click.BadParameter('at least two users are required', param_hint='--users')
+
+    raw_conn = db.engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        seeder = Seeder(cursor, random.Random(random_seed), batch_rows=batch_size)
+
+        def _stage(label, func, *args):
+            started = time.perf_counter()
+            # Bulk loads may run longer than the per-request statement timeout
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            result = func(*args)
+            raw_conn.commit()
+            click.echo(f"{label}: {result} in {time.perf_counter() - started:.1f}s")
+
+        _stage('users', seeder.seed_users, users, password, popularity_exponent)
+        _stage('follows', seeder.seed_follows, avg_follows)
+        if quizzes:
+            _stage('quizzes/questions/options', seeder.seed_quizzes, quizzes, max(1, questions_per_quiz))
+            _stage('question_reads', _rebuild_question_reads)
+            _stage('feed_entries', _rebuild_feed)
+            if sessions:
+                _stage('sessions/participants/answers', seeder.seed_sessions, sessions,
+                       participants_per_session, answer_ratio)
+                _stage('user_activity', _rebuild_user_activity)
+                _stage('quiz_stats', _rebuild_quiz_stats)
+                _stage('question_stats', _rebuild_question_stats)
+        _stage('notifications', seeder.seed_notifications, notifications)
+        cursor.execute("ANALYZE")
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
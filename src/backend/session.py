@@ -20,6 +20,7 @@ class QuizSession(db.Model):
     code = db.Column(db.String(10), unique=True, nullable=False, index=True)
     started = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # Set when the host starts the session
     num_teams = db.Column(db.Integer, default=1, nullable=False)
 
     # quiz = db.relationship('Quiz', backref='sessions') # Wordt gedefinieerd in app.py
@@ -30,6 +31,9 @@ class QuizSession(db.Model):
     # NIEUWE RELATIE voor notificaties gerelateerd aan deze sessie
     invites = db.relationship('Notification', foreign_keys='Notification.session_id', backref='session_info', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (db.Index('ix_quiz_sessions_started_created_at', 'started', 'created_at'),
+                      db.Index('ix_quiz_sessions_started_at_id', 'started_at', 'id'))
+
     @property
     def is_team_mode(self):
         """
@@ -56,4 +60,7 @@ class SessionParticipant(db.Model):
 
     # user = db.relationship('User', backref='session_participations') # Wordt gedefinieerd in app.py
 
-    __table_args__ = (db.UniqueConstraint('session_id', 'user_id', name='_session_user_uc'),)
+    __table_args__ = (db.UniqueConstraint('session_id', 'user_id', name='_session_user_uc'),
+                      db.Index('ix_session_participants_user_id_session_id', 'user_id', 'session_id'),
+                      # Join order within a session: first/newest joiners and the paged roster
+                      db.Index('ix_session_participants_session_id_id', 'session_id', 'id'))
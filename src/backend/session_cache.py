@@ -0,0 +1,148 @@
+# src/backend/session_cache.py
+"""
+Micro-cache for the session reads that every lobby member polls.
+
+``GET /sessions/<code>``, ``/participants`` and ``/results`` return the same
+body to everyone in a session, and each client repeats them every few seconds.
+A lobby of 200 therefore ran the same three-way join 40 times a second. Each
+worker now keeps the rendered responses per session code for
+``SESSION_READ_CACHE_TTL`` seconds:
+
+* Single flight: when an entry is missing, the first request loads it and
+  concurrent requests for the same code and view wait for that result. They do
+  not run the query themselves.
+* Invalidation: joins, team switches, starts and submitted scores already
+  publish session events (events.py). Every worker subscribes to its event hub
+  and drops the code's entries when one arrives. The writing worker does so
+  right after its commit. A load that was running during the invalidation still
+  answers its waiters, but its result is not stored.
+* Requests pinned to the primary for read-your-writes (routing.py) bypass the
+  cache, so a player still sees their own join on the next poll.
+
+Misses (unknown codes) are not cached. Other workers only hear of events while
+their event listener runs, so the cache starts it. Without it, the TTL still
+bounds how stale an entry can be.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from . import events, routing
+
+INVALIDATED_BY = frozenset({'participant_joined', 'participant_switched_team', 'session_started', 'score_submitted'})
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'loaded', 'stale')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.loaded = False
+        self.stale = False
+
+
+class SessionReadCache:
+    """
+    Thread-safe LRU of rendered session reads keyed by session code and view.
+
+    Args:
+        ttl (float): Seconds an entry may be served.
+        max_entries (int): Upper bound on cached sessions; the least recently used go first.
+        wait_timeout (float): Most seconds a request waits for another request's load.
+    """
+
+    def __init__(self, ttl=2.0, max_entries=2000, wait_timeout=5.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()  # code -> {view: (value, expires_at)}
+        self._flights = {}  # (code, view) -> _Flight
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get_or_load(self, code, view, loader):
+        """
+        Returns the cached value of a view, or loads it once for all concurrent callers.
+
+        Args:
+            code (str): The session code.
+            view (str): Which read ('details', 'participants', ...).
+            loader (callable): Returns the value, or None for "not found" (not cached).
+        """
+        key = (code, view)
+        with self._lock:
+            entry = self._entries.get(code, {}).get(view)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(code)
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.loaded:
+                return flight.value
+            return loader()  # The load failed or is taking too long
+
+        try:
+            value = loader()
+            flight.value, flight.loaded = value, True
+            with self._lock:
+                self.loads += 1
+                if value is not None and not flight.stale:
+                    self._entries.setdefault(code, {})[view] = (value, time.monotonic() + self.ttl)
+                    self._entries.move_to_end(code)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, code):
+        with self._lock:
+            self._entries.pop(code, None)
+            for (flight_code, _), flight in self._flights.items():
+                if flight_code == code:
+                    flight.stale = True
+
+    def on_events(self, batch):
+        """
+        EventHub subscriber: drops the sessions whose participants, start or scores changed.
+        """
+        for ev in batch:
+            kind, _, code = ev.topic.partition(':')
+            if kind == 'session' and ev.kind in INVALIDATED_BY:
+                self.invalidate(code)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def cached(code, view, loader):
+    """
+    Serves a session read through this worker's cache (see ``SessionReadCache.get_or_load``).
+    """
+    cache = current_app.extensions['session_read_cache']
+    if cache.ttl <= 0 or routing.pinned_to_primary():
+        return loader()
+    events.ensure_listening()
+    return cache.get_or_load(code, view, loader)
+
+
+def init_app(app):
+    """
+    Installs the cache and subscribes it to the event hub. Must run after ``events.init_app``.
+    """
+    cache = SessionReadCache(
+        ttl=app.config.get('SESSION_READ_CACHE_TTL', 2.0),
+        max_entries=app.config.get('SESSION_READ_CACHE_SIZE', 2000),
+    )
+    app.extensions['session_read_cache'] = cache
+    app.extensions['event_hub'].subscribe(cache.on_events)
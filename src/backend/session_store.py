@@ -0,0 +1,288 @@
+# src/backend/session_store.py
+"""
+Server-side session store backed by a SQL table with an in-worker LRU front.
+
+Session data lives in the ``web_sessions`` table, so every gunicorn worker and every
+node sees the same sessions. The browser only carries a signed session id. Each worker
+keeps recently used sessions in an LRU, and a read within ``SESSION_CACHE_TTL``
+seconds of the last fetch is answered from memory without touching the database or
+the filesystem. Writes go straight through to the table. A logout or a change made in
+another worker is therefore visible everywhere after at most ``SESSION_CACHE_TTL``
+seconds.
+
+Storage stays bounded in three ways:
+    * every row has an ``expires_at`` (non-permanent sessions get SESSION_IDLE_LIFETIME),
+    * expired rows are swept in small batches from time to time (and by ``flask sessions sweep``),
+    * payloads larger than SESSION_MAX_BYTES are refused.
+"""
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from werkzeug.datastructures import CallbackDict
+
+from .init_flask import db
+
+
+class WebSession(db.Model):
+    """
+    One server-side session.
+
+    Attributes:
+        sid (str): Random session id (the cookie carries it signed).
+        user_id (int, optional): Logged-in user, kept so all sessions of a user can be revoked.
+        data (str): JSON encoded session contents.
+        expires_at (datetime): After this moment the row is ignored and swept.
+    """
+    __tablename__ = 'web_sessions'
+    sid = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True, index=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session dictionary that remembers its id and whether it was changed.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.previous_sid = None
+
+    def regenerate(self):
+        """
+        Moves the session to a fresh id (used on login against session fixation).
+        """
+        if not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class SqlSessionInterface(SessionInterface):
+    """
+    Flask session interface storing sessions in ``web_sessions``.
+
+    Args:
+        cache_ttl (float): Seconds a cached session may be served without a database read.
+        cache_size (int): Maximum sessions kept in the per-worker LRU.
+        idle_lifetime (timedelta): Server-side lifetime of non-permanent sessions.
+        max_bytes (int): Largest accepted serialized session.
+        sweep_interval (float): Minimum seconds between opportunistic sweeps per worker.
+        sweep_batch (int): Maximum expired rows deleted per sweep.
+    """
+
+    def __init__(self, cache_ttl=5.0, cache_size=20000, idle_lifetime=timedelta(days=1), max_bytes=4096,
+                 sweep_interval=60.0, sweep_batch=1000):
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.idle_lifetime = idle_lifetime
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._cache = OrderedDict()   # sid -> (data dict, expires_at, fetched_monotonic)
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    # --- per-worker LRU ---
+    def _cache_get(self, sid):
+        with self._lock:
+            entry = self._cache.get(sid)
+            if entry is None:
+                return None
+            data, expires_at, fetched = entry
+            if time.monotonic() - fetched > self.cache_ttl:
+                del self._cache[sid]
+                return None
+            self._cache.move_to_end(sid)
+            return data, expires_at
+
+    def _cache_put(self, sid, data, expires_at):
+        with self._lock:
+            self._cache[sid] = (dict(data), expires_at, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_drop(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    # --- cookie signing ---
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='aquimemni-session', key_derivation='hmac')
+
+    def _unsign(self, app, value):
+        try:
+            return self._signer(app).unsign(value).decode()
+        except BadSignature:
+            return None
+
+    def _expiry(self, app, session):
+        if session.permanent:
+            return datetime.utcnow() + app.permanent_session_lifetime
+        return datetime.utcnow() + self.idle_lifetime
+
+    # --- SessionInterface ---
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        sid = self._unsign(app, cookie) if cookie else None
+        if not sid:
+            return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+        cached = self._cache_get(sid)
+        if cached is not None:
+            data, expires_at = cached
+            if expires_at > datetime.utcnow():
+                return ServerSession(data, sid=sid, expires_at=expires_at)
+            self._cache_drop(sid)
+            return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(WebSession.data, WebSession.expires_at).where(
+                    WebSession.sid == sid, WebSession.expires_at > datetime.utcnow())
+            ).first()
+        if row is None:
+            return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+        data = json.loads(row.data)
+        self._cache_put(sid, data, row.expires_at)
+        return ServerSession(data, sid=sid, expires_at=row.expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self._delete(session.previous_sid)
+
+        if not session:
+            if session.modified and not session.new:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        expires_at = self._expiry(app, session)
+        # Unchanged sessions are only written back to extend an expiry that is past half-time.
+        now = datetime.utcnow()
+        needs_refresh = session.expires_at is None or (session.expires_at - now) < (expires_at - now) / 2
+        if session.modified or session.new or needs_refresh:
+            payload = json.dumps(dict(session), separators=(',', ':'))
+            if len(payload) > self.max_bytes:
+                app.logger.error(f"Session {session.sid[:8]}... exceeds {self.max_bytes} bytes; not stored")
+                return
+            self._upsert(session.sid, session.get('user_id'), payload, expires_at)
+            self._cache_put(session.sid, dict(session), expires_at)
+            self._maybe_sweep()
+
+        if session.modified or session.new or session.previous_sid:
+            response.set_cookie(
+                name, self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session), httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path, secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+    # --- storage ---
+    def _upsert(self, sid, user_id, payload, expires_at):
+        stmt = pg_insert(WebSession).values(sid=sid, user_id=user_id, data=payload, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WebSession.sid],
+            set_={'user_id': stmt.excluded.user_id, 'data': stmt.excluded.data, 'expires_at': stmt.excluded.expires_at},
+        )
+        with db.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _delete(self, sid):
+        self._cache_drop(sid)
+        with db.engine.begin() as conn:
+            conn.execute(delete(WebSession).where(WebSession.sid == sid))
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        sweep_expired(self.sweep_batch)
+
+    def revoke_user(self, user_id, keep_sid=None):
+        """
+        Deletes every stored session of a user, optionally keeping one.
+
+        Args:
+            user_id (int): The user whose sessions are revoked.
+            keep_sid (str, optional): Session id to keep (the caller's own session).
+        """
+        stmt = delete(WebSession).where(WebSession.user_id == user_id)
+        if keep_sid:
+            stmt = stmt.where(WebSession.sid != keep_sid)
+        with db.engine.begin() as conn:
+            conn.execute(stmt)
+        with self._lock:
+            for sid in [sid for sid, entry in self._cache.items() if entry[0].get('user_id') == user_id]:
+                if sid != keep_sid:
+                    del self._cache[sid]
+
+
+def sweep_expired(batch_size=1000):
+    """
+    Deletes up to ``batch_size`` expired sessions.
+
+    Returns:
+        int: Number of deleted rows.
+    """
+    expired = select(WebSession.sid).where(WebSession.expires_at <= datetime.utcnow()).limit(batch_size)
+    with db.engine.begin() as conn:
+        return conn.execute(delete(WebSession).where(WebSession.sid.in_(expired.scalar_subquery()))).rowcount
+
+
+def init_app(app):
+    """
+    Installs the SQL session interface built from the app config.
+    """
+    config = app.config
+    app.session_interface = SqlSessionInterface(
+        cache_ttl=config.get('SESSION_CACHE_TTL', 5.0),
+        cache_size=config.get('SESSION_CACHE_SIZE', 20000),
+        idle_lifetime=config.get('SESSION_IDLE_LIFETIME', timedelta(days=1)),
+        max_bytes=config.get('SESSION_MAX_BYTES', 4096),
+        sweep_interval=config.get('SESSION_SWEEP_INTERVAL', 60.0),
+        sweep_batch=config.get('SESSION_SWEEP_BATCH', 1000),
+    )
+    app.cli.add_command(sessions_cli)
+
+
+@click.group('sessions')
+def sessions_cli():
+    """Manage server-side sessions."""
+
+
+@sessions_cli.command('sweep')
+@click.option('--batch-size', default=10000, show_default=True)
+@with_appcontext
+def sweep_command(batch_size):
+    """Delete all expired sessions, in batches."""
+    total = 0
+    while True:
+        deleted = sweep_expired(batch_size)
+        total += deleted
+        if deleted < batch_size:
+            break
+    click.echo(f"Deleted {total} expired sessions")
@@ -0,0 +1,309 @@
+# src/backend/sharding.py
+"""
+Session-affine routing when the app runs on more than one node.
+
+A live session's state (live_sessions.py) and its long-polling clients
+(events.py) are cheapest when they all sit on one node. Each session code
+therefore has one owner node:
+
+    slot   the first two characters of the code (codes are random A-Z0-9, so
+           1296 equally likely slots)
+    ring   a consistent-hash ring with CLUSTER_VNODES points per node; a slot
+           belongs to the first node point clockwise of its hash
+
+A node joining or leaving moves only about 1/N of the slots. The member list
+lives in the single-row ``cluster_ring`` table. It changes through
+``flask cluster join|leave``, and every change bumps ``epoch``. Each worker
+re-reads the row when its copy is older than CLUSTER_RING_TTL seconds.
+
+Three mechanisms keep requests with their owner:
+
+* nginx routes ``/sessions/<code>/...`` to the owner from an exact-match map on
+  the slot, rendered by ``flask cluster nginx-config``.
+* A worker that does not own a code answers 421 with the owner's address in
+  ``X-Session-Node``, plus Retry-After. The generated nginx config retries it
+  there once. This covers the moments after a rebalance, before nginx is
+  reloaded.
+* Checkpoints of live sessions record the ring epoch they were written under.
+  A node still holding an older ring cannot advance a session that the new
+  owner already wrote (``StaleOwner``, also a 421).
+
+Handoff needs no copying. The live state is checkpointed on every host action,
+so a node that gains a slot loads its sessions from the checkpoints on first
+use. On an epoch change a worker drops its in-memory live states. Clients that
+move get ``resync`` from the event hub and refetch.
+
+With NODE_ID unset, or with a ring of one node, all of this is off.
+"""
+import bisect
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app, jsonify, request
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+
+from .init_flask import db
+
+SLOT_CHARS = 2
+
+
+class ClusterRing(db.Model):
+    """
+    The cluster's members (a single row).
+
+    Attributes:
+        epoch (int): Incremented on every membership change.
+        nodes (dict): Node id -> address (host:port) nginx and peers use to reach it.
+    """
+    __tablename__ = 'cluster_ring'
+    id = db.Column(db.Integer, primary_key=True)
+    epoch = db.Column(db.Integer, nullable=False)
+    nodes = db.Column(JSONB, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+class StaleOwner(Exception):
+    """
+    Raised when this node acts on a session under an older ring than the session's last writer.
+    """
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+def slot_of(code):
+    return code[:SLOT_CHARS].upper()
+
+
+class HashRing:
+    """
+    Consistent-hash ring of nodes.
+
+    Args:
+        nodes (dict): Node id -> address.
+        epoch (int): Ring version.
+        vnodes (int): Points per node on the ring.
+    """
+
+    def __init__(self, nodes, epoch=0, vnodes=128):
+        self.nodes = dict(nodes)
+        self.epoch = epoch
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+        self.fetched_at = time.monotonic()
+
+    def owner(self, code):
+        """
+        Returns the id of the node owning a session code (None for an empty ring).
+        """
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(slot_of(code))) % len(self._hashes)
+        return self._owners[index]
+
+    def slots(self):
+        """
+        Returns every slot with its owner, in slot order.
+        """
+        chars = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        return {a + b: self.owner(a + b) for a in chars for b in chars}
+
+
+def _load_ring():
+    row = db.session.get(ClusterRing, 1)
+    vnodes = current_app.config.get('CLUSTER_VNODES', 128)
+    return HashRing(row.nodes, row.epoch, vnodes) if row else HashRing({}, 0, vnodes)
+
+
+class RingHolder:
+    """
+    A worker's copy of the ring, re-read every ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self.ring = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        ring = self.ring
+        if ring is None or time.monotonic() - ring.fetched_at >= self.ttl:
+            fresh = _load_ring()
+            with self._lock:
+                previous, self.ring = self.ring, fresh
+            if previous is not None and previous.epoch != fresh.epoch:
+                # Slots may have moved; owned sessions reload from their checkpoints
+                current_app.extensions['live_state_cache'].clear()
+            ring = fresh
+        return ring
+
+
+def enabled():
+    return bool(current_app.config.get('NODE_ID'))
+
+
+def current_ring():
+    return current_app.extensions['cluster_ring'].get()
+
+
+def owner_of(code):
+    """
+    Returns the owning node id of a session code, or None when clustering is off.
+    """
+    if not enabled():
+        return None
+    ring = current_ring()
+    return ring.owner(code) if len(ring.nodes) > 1 else None
+
+
+def current_epoch():
+    return current_ring().epoch if enabled() else 0
+
+
+def owns(code):
+    owner = owner_of(code)
+    return owner is None or owner == current_app.config['NODE_ID']
+
+
+def check_epoch(checkpoint_epoch):
+    """
+    Rejects a write when the session was last written under a newer ring than ours.
+
+    Raises:
+        StaleOwner: If ``checkpoint_epoch`` is newer than this worker's ring.
+    """
+    if enabled() and checkpoint_epoch is not None and checkpoint_epoch > current_epoch():
+        current_app.extensions['cluster_ring'].ring = None  # Re-read on the next check
+        raise StaleOwner(f"Session was handed off under ring epoch {checkpoint_epoch}")
+
+
+def misdirected(code):
+    """
+    The 421 response sent instead of serving a session this node does not own.
+    """
+    owner = owner_of(code)
+    response = jsonify({"error": "Session is served by another node", "node": owner})
+    response.headers['X-Session-Node'] = current_ring().nodes.get(owner, '') if owner else ''
+    response.headers['Retry-After'] = '1'
+    return response, 421
+
+
+def check_ownership():
+    """
+    before_request hook: sends requests for sessions owned elsewhere to their node.
+    """
+    code = (request.view_args or {}).get('session_code_param')
+    if code is not None and not owns(code):
+        return misdirected(code)
+    return None
+
+
+def nginx_config(ring, default_upstream='webapp'):
+    """
+    Renders the nginx upstreams and slot map for a ring.
+    """
+    lines = [f"# Generated by `flask cluster nginx-config` for ring epoch {ring.epoch}; do not edit", ""]
+    for node, address in sorted(ring.nodes.items()):
+        lines += [f"upstream node_{node} {{", f"    server {address};", "    keepalive 64;", "}", ""]
+    lines += ["map $uri $session_slot {", "    ~^/sessions/(?<slot>[A-Za-z0-9]{%d}) $slot;" % SLOT_CHARS,
+              '    default "";', "}", "",
+              "map $session_slot $session_upstream {", f"    default {default_upstream};"]
+    if len(ring.nodes) > 1:
+        lines += [f"    {slot} node_{node};" for slot, node in ring.slots().items()]
+    lines += ["}", "",
+              "# Use in the server block:",
+              "#   location /sessions/ {",
+              "#       include proxy_params;",
+              "#       proxy_pass http://$session_upstream;",
+              "#       proxy_http_version 1.1;",
+              '#       proxy_set_header Connection "";',
+              "#       proxy_intercept_errors on;",
+              "#       error_page 421 = @session_owner;  # Ring changed before nginx was reloaded",
+              "#   }",
+              "#   location @session_owner {",
+              "#       include proxy_params;",
+              "#       proxy_pass http://$upstream_http_x_session_node;",
+              "#   }", ""]
+    return "\n".join(lines)
+
+
+def _update_ring(change):
+    db.session.execute(pg_insert(ClusterRing).values(
+        id=1, epoch=0, nodes={}, updated_at=datetime.utcnow()).on_conflict_do_nothing())
+    row = db.session.execute(select(ClusterRing).where(ClusterRing.id == 1)
+                             .with_for_update().execution_options(populate_existing=True)).scalar_one()
+    vnodes = current_app.config.get('CLUSTER_VNODES', 128)
+    before = HashRing(row.nodes, row.epoch, vnodes)
+    nodes = dict(row.nodes)
+    change(nodes)
+    row.nodes, row.epoch, row.updated_at = nodes, row.epoch + 1, datetime.utcnow()
+    after = HashRing(nodes, row.epoch, vnodes)
+    old_slots, new_slots = before.slots(), after.slots()
+    moved = sum(1 for slot in new_slots if old_slots[slot] != new_slots[slot])
+    return after, moved
+
+
+def join(node_id, address):
+    """
+    Adds (or re-addresses) a node and bumps the epoch. The caller commits.
+
+    Returns:
+        tuple: (new HashRing, number of slots that changed owner).
+    """
+    return _update_ring(lambda nodes: nodes.__setitem__(node_id, address))
+
+
+def leave(node_id):
+    """
+    Removes a node and bumps the epoch. The caller commits.
+    """
+    return _update_ring(lambda nodes: nodes.pop(node_id, None))
+
+
+def init_app(app):
+    app.extensions['cluster_ring'] = RingHolder(ttl=app.config.get('CLUSTER_RING_TTL', 2.0))
+    app.before_request(check_ownership)
+    app.cli.add_command(cluster_cli)
+
+
+@click.group('cluster')
+def cluster_cli():
+    """Manage the nodes that share live sessions."""
+
+
+@cluster_cli.command('join')
+@click.argument('node_id')
+@click.argument('address')
+@with_appcontext
+def join_command(node_id, address):
+    """Add NODE_ID, reachable at ADDRESS (host:port), to the ring."""
+    ring, moved = join(node_id, address)
+    db.session.commit()
+    click.echo(f"Ring epoch {ring.epoch}: {len(ring.nodes)} nodes, {moved} slots moved; "
+               f"regenerate the nginx map with `flask cluster nginx-config`")
+
+
+@cluster_cli.command('leave')
+@click.argument('node_id')
+@with_appcontext
+def leave_command(node_id):
+    """Remove NODE_ID from the ring; its sessions move to the remaining nodes."""
+    ring, moved = leave(node_id)
+    db.session.commit()
+    click.echo(f"Ring epoch {ring.epoch}: {len(ring.nodes)} nodes, {moved} slots moved; "
+               f"regenerate the nginx map with `flask cluster nginx-config`")
+
+
+@cluster_cli.command('nginx-config')
+@click.option('--default-upstream', default='webapp', help='Upstream for requests without a session code')
+@with_appcontext
+def nginx_config_command(default_upstream):
+    """Print the nginx upstreams and slot map for the current ring."""
+    click.echo(nginx_config(_load_ring(), default_upstream))
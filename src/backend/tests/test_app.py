@@ -2,10 +2,15 @@ import pytest
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta, timezone
 
-from src.backend.app import User, Quiz, Question, QuizSession, SessionParticipant, Notification, create_app
+from src.backend.app import User, Quiz, Question, QuizSession, Notification, create_app
+from src.backend.session import SessionParticipant
 from src.backend.init_flask import db
 from src.backend.Questions import TextInputQuestion, MultipleChoiceQuestion, MultipleChoiceOption, SliderQuestion
 from src.backend.config import TestConfig
+from src.backend.question_reads import QuestionRead
+from src.backend import activity
+from src.backend import feed
+from src.backend.feed import FeedEntry
 
 
 @pytest.fixture(scope='module')
@@ -23,6 +28,11 @@ def app(app_instance):
     with app_instance.app_context():
         db.drop_all()
         db.create_all()
+    # Ids are reused after the reset, so cached principals from earlier tests must go
+    app_instance.extensions['principal_cache'].clear()
+    app_instance.extensions['live_state_cache'].clear()
+    app_instance.extensions['session_read_cache'].clear()
+    app_instance.extensions['cluster_ring'].ring = None
     return app_instance
 
 
@@ -504,4 +514,1144 @@ def test_get_quiz_session_results(create_authenticated_client, create_quiz_facto
     data = results_resp.get_json()
     assert len(data) == 1
     assert data[0]['username'] == p1_data['username']
-    assert data[0]['score'] == 100.5  # This was failing
\ No newline at end of file
+    assert data[0]['score'] == 100.5  # This was failing
+
+# --- Seeder Tests ---
+def test_seed_command_populates_inheritance_tables(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['seed', '--users', '50', '--avg-follows', '3', '--quizzes', '5',
+                                 '--questions-per-quiz', '6', '--sessions', '4', '--participants-per-session', '5',
+                                 '--answer-ratio', '1.0', '--notifications', '20', '--seed', '7'])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert User.query.count() == 50
+        assert Question.query.count() == 30
+        # Every base question row has exactly one matching subtype row.
+        assert (TextInputQuestion.query.count() + MultipleChoiceQuestion.query.count()
+                + SliderQuestion.query.count()) == 30
+        assert MultipleChoiceOption.query.count() == 10 * 4
+        assert QuestionRead.query.count() == 30
+        assert QuizSession.query.count() == 4
+        assert Notification.query.count() == 20
+        # Sequences were moved past the copied ids, so the ORM can keep inserting.
+        quiz = Quiz(user_id=User.query.first().id, name="After seed")
+        db.session.add(quiz)
+        db.session.commit()
+        assert quiz.id == 6
+
+
+# --- Password Hashing Tests ---
+def test_login_rehashes_password_when_method_changes(client, new_user_factory, app):
+    user_data = new_user_factory(username='rehashuser', password='pw')
+    hasher = app.extensions['password_hasher']
+    with app.app_context():
+        old_hash = db.session.get(User, user_data['id']).password_hash
+    assert old_hash.startswith('pbkdf2:sha256:1000$')
+
+    original_method, hasher.method, hasher._method_prefix = hasher.method, 'pbkdf2:sha256:2000', None
+    try:
+        response = client.post('/login', json={'username': 'rehashuser', 'password': 'pw'})
+        assert response.status_code == 200
+        with app.app_context():
+            new_hash = db.session.get(User, user_data['id']).password_hash
+        assert new_hash.startswith('pbkdf2:sha256:2000$')
+    finally:
+        hasher.method, hasher._method_prefix = original_method, None
+
+
+def test_login_rejected_with_503_when_hashing_saturated(client, new_user_factory, app):
+    new_user_factory(username='busyuser', password='pw')
+    hasher = app.extensions['password_hasher']
+    for _ in range(hasher.queue_limit):
+        hasher._slots.acquire()
+    try:
+        response = client.post('/login', json={'username': 'busyuser', 'password': 'pw'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        for _ in range(hasher.queue_limit):
+            hasher._slots.release()
+    assert client.post('/login', json={'username': 'busyuser', 'password': 'pw'}).status_code == 200
+
+
+
+def test_concurrent_logins_beyond_the_hash_limit_get_503(new_user_factory, app):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from src.backend.passwords import PasswordHasher
+    new_user_factory(username='burstuser', password='pw')
+    gate = threading.Event()
+
+    class GatedExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            return super().submit(lambda: gate.wait(5) and fn(*args))
+
+    # As in a gthread worker: several request threads share one hasher
+    original = app.extensions['password_hasher']
+    app.extensions['password_hasher'] = PasswordHasher(method=original.method, workers=2, queue_limit=2, timeout=5,
+                                                       executor_factory=lambda n: GatedExecutor(max_workers=n))
+    statuses = []
+
+    def login():
+        statuses.append(app.test_client().post('/login', json={'username': 'burstuser', 'password': 'pw'}).status_code)
+
+    threads = [threading.Thread(target=login) for _ in range(5)]
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while len(statuses) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        gate.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        app.extensions['password_hasher'].shutdown()
+        app.extensions['password_hasher'] = original
+    assert sorted(statuses) == [200, 200, 503, 503, 503]
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from src.backend.passwords import HashingBusy, PasswordHasher
+    hasher = PasswordHasher(workers=1, queue_limit=1, timeout=0.05,
+                            executor_factory=lambda n: ThreadPoolExecutor(max_workers=n))
+    release = threading.Event()
+    with pytest.raises(HashingBusy, match='timed out'):
+        hasher._run(release.wait, 5)
+    # Still running, so it still counts against the limit
+    with pytest.raises(HashingBusy, match='exhausted'):
+        hasher._run(len, 'x')
+    release.set()
+    hasher._executor.shutdown(wait=True)
+    hasher._executor = None
+    assert hasher._run(len, 'abc') == 3
+    hasher.shutdown()
+
+# --- Principal Cache Tests ---
+def test_authenticated_request_skips_users_lookup(create_authenticated_client, app):
+    from sqlalchemy import event
+    authed_client, _ = create_authenticated_client(username="cacheduser", password="pw")
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        assert authed_client.get('/home').status_code == 200
+        assert authed_client.get('/notifications/count').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+    assert not any('FROM users' in stmt for stmt in statements)
+
+
+def test_password_change_revokes_other_sessions(create_authenticated_client, app):
+    client_a, user_data = create_authenticated_client(username="twodevices", password="oldpassword")
+    client_b = app.test_client()
+    assert client_b.post('/login', json={'username': 'twodevices', 'password': 'oldpassword'}).status_code == 200
+
+    response = client_a.post('/change-password', json={'currentPassword': 'oldpassword', 'newPassword': 'newpassword',
+                                                       'confirmPassword': 'newpassword'})
+    assert response.status_code == 200
+    assert client_a.get('/home').status_code == 200
+    assert client_b.get('/home').status_code == 401
+
+
+def test_deleted_account_session_rejected(create_authenticated_client, app):
+    client_a, _ = create_authenticated_client(username="goneuser", password="pw")
+    client_b = app.test_client()
+    assert client_b.post('/login', json={'username': 'goneuser', 'password': 'pw'}).status_code == 200
+    assert client_a.delete('/delete-account', json={'password': 'pw'}).status_code == 200
+    assert client_b.get('/quizzes').status_code == 401
+
+
+# --- Server-side Session Store Tests ---
+def test_sessions_are_stored_server_side(create_authenticated_client, app):
+    from src.backend.session_store import WebSession
+    authed_client, user_data = create_authenticated_client(username="storeduser", password="pw")
+    with app.app_context():
+        rows = WebSession.query.filter_by(user_id=user_data['id']).all()
+        assert len(rows) == 1
+    assert authed_client.post('/logout').status_code == 200
+    with app.app_context():
+        assert WebSession.query.filter_by(user_id=user_data['id']).count() == 0
+
+
+def test_session_reads_served_from_worker_cache(create_authenticated_client, app):
+    from sqlalchemy import event
+    authed_client, _ = create_authenticated_client(username="lruuser", password="pw")
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        for _ in range(3):
+            assert authed_client.get('/home').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+    assert not any('web_sessions' in stmt for stmt in statements)
+
+
+def test_expired_sessions_are_swept(app):
+    from src.backend.session_store import WebSession
+    with app.app_context():
+        db.session.add(WebSession(sid='old', data='{}', expires_at=datetime.utcnow() - timedelta(minutes=1)))
+        db.session.add(WebSession(sid='live', data='{}', expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['sessions', 'sweep'])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert [s.sid for s in WebSession.query.all()] == ['live']
+
+
+# --- Cooperative Serving Mode Tests ---
+def test_gevent_mode_sizes_pool_and_hashes_on_threadpool():
+    pytest.importorskip('gevent')
+    from werkzeug.security import check_password_hash
+
+    class GeventConfig(TestConfig):
+        WORKER_MODE = 'gevent'
+        COOPERATIVE_DB_POOL_SIZE = 7
+
+    gevent_app = create_app(GeventConfig)
+    assert gevent_app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 7
+    hasher = gevent_app.extensions['password_hasher']
+    with gevent_app.app_context():
+        password_hash = hasher.hash('secret')
+        assert check_password_hash(password_hash, 'secret')
+        assert hasher.verify(password_hash, 'secret')
+    hasher.shutdown()
+
+
+# --- Connection Pool Profile Tests ---
+def test_direct_profile_sets_pool_and_statement_timeout(app):
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == app.config['DB_POOL_RECYCLE']
+    with app.app_context():
+        timeout = db.session.execute(db.text('SHOW statement_timeout')).scalar()
+    assert timeout == f"{app.config['DB_STATEMENT_TIMEOUT_MS'] // 1000}s"
+
+
+def test_pgbouncer_profile_uses_transaction_scoped_settings():
+    from src.backend.pooling import engine_options
+
+    class BouncerConfig(TestConfig):
+        DB_POOL_PROFILE = 'pgbouncer'
+        DB_STATEMENT_TIMEOUT_MS = 2000
+
+    config = {key: getattr(BouncerConfig, key) for key in dir(BouncerConfig) if key.isupper()}
+    options = engine_options(dict(config, SQLALCHEMY_DATABASE_URI='postgresql+psycopg://app@localhost:6432/mydb'))
+    assert options['connect_args']['prepare_threshold'] is None
+    assert 'options' not in options['connect_args']
+
+    bouncer_app = create_app(BouncerConfig)
+    with bouncer_app.app_context():
+        assert db.session.execute(db.text('SHOW statement_timeout')).scalar() == '2s'
+        db.session.rollback()
+
+
+# --- Read Replica Routing Tests ---
+def test_get_requests_read_from_replica_unless_sticky(app, new_user_factory, create_quiz_factory):
+    from sqlalchemy import event
+
+    class ReplicaConfig(TestConfig):
+        DB_REPLICA_URIS = [TestConfig.SQLALCHEMY_DATABASE_URI]  # Single-database fallback
+
+    replica_app = create_app(ReplicaConfig)
+    user = new_user_factory(username='reader', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=user['id'])
+    replica_client = replica_app.test_client()
+    assert replica_client.post('/login', json={'username': 'reader', 'password': 'pw'}).status_code == 200
+
+    with replica_app.app_context():
+        replica_engine = db.engines['replica_0']
+    replica_statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        replica_statements.append(statement)
+
+    event.listen(replica_engine, 'before_cursor_execute', _record)
+    try:
+        create_resp = replica_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1})
+        assert create_resp.status_code == 201
+        assert replica_client.get_cookie('db_primary_until') is not None
+        assert replica_statements == []
+
+        # Right after the write the creator still reads from the primary
+        code = create_resp.get_json()['code']
+        assert replica_client.get(f'/sessions/{code}').status_code == 200
+        assert replica_statements == []
+
+        replica_client.delete_cookie('db_primary_until')
+        assert replica_client.get(f'/sessions/{code}').status_code == 200
+        assert any('quiz_sessions' in stmt for stmt in replica_statements)
+    finally:
+        event.remove(replica_engine, 'before_cursor_execute', _record)
+
+    # Raw SQL only reaches a replica when it is a plain query
+    from sqlalchemy import text
+    from src.backend.routing import _is_write
+    assert not _is_write(text("SELECT id FROM users WHERE username = :name"))
+    assert not _is_write(text("WITH t AS (SELECT 1) SELECT * FROM t"))
+    for statement in ("SELECT pg_notify('c', 'x')", "SELECT * FROM users FOR UPDATE", "SET LOCAL statement_timeout = 0",
+                      "WITH d AS (DELETE FROM users RETURNING id) SELECT count(*) FROM d",
+                      "INSERT INTO users (username) VALUES ('x') ON CONFLICT DO NOTHING"):
+        assert _is_write(text(statement)), statement
+
+
+# --- Response Encoding Tests ---
+def test_json_provider_matches_hand_built_datetimes(app):
+    from src.backend.responses import FastJSONProvider
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    payload = {'b': [1, 2.5, None], 'a': created_at, 'nested': {'y': 'two', 'x': 'é'}}
+
+    fast = FastJSONProvider(app)
+    plain = FastJSONProvider(app)
+    plain.use_orjson = False
+    assert app.json.loads(fast.dumps(payload)) == app.json.loads(plain.dumps(payload))
+    assert app.json.loads(fast.dumps(payload))['a'] == created_at.replace(tzinfo=timezone.utc).isoformat()
+
+
+def test_large_responses_are_compressed_when_accepted(create_authenticated_client, create_quiz_factory):
+    import gzip
+    client, user_data = create_authenticated_client(username='bigquizzer', password='pw')
+    questions = [{'type': 'text_input', 'text': f'Question number {i}?', 'correct_answer': str(i)} for i in range(40)]
+    create_quiz_factory(user_id=user_data['id'], questions_data=questions)
+
+    plain = client.get('/quizzes')
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get('/quizzes', headers={'Accept-Encoding': 'br;q=0, gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert len(compressed.data) < len(plain.data)
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+# --- Field Selection Tests ---
+def test_quiz_list_summary_runs_single_aggregate_query(create_authenticated_client, create_quiz_factory, app):
+    from sqlalchemy import event
+    client, user_data = create_authenticated_client(username='summaryuser', password='pw')
+    create_quiz_factory(user_id=user_data['id'], quiz_name='Mixed', questions_data=[
+        {'type': 'text_input', 'text': 'Q1?', 'correct_answer': 'a'},
+        {'type': 'multiple_choice', 'text': 'Q2?', 'options': [{'text': 'x', 'isCorrect': True}]},
+    ])
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get('/quizzes?view=summary')
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 200
+    [quiz] = response.get_json()
+    assert set(quiz) == {'id', 'name', 'created_at', 'questions_count'}
+    assert quiz['name'] == 'Mixed' and quiz['questions_count'] == 2
+    quiz_queries = [stmt for stmt in statements if 'quizzes' in stmt]
+    assert len(quiz_queries) == 1 and 'count(' in quiz_queries[0]
+    assert not any('multiple_choice_options' in stmt or 'text_input_questions' in stmt for stmt in statements)
+
+
+def test_field_selection_on_detail_and_profile(create_authenticated_client, create_quiz_factory):
+    client, user_data = create_authenticated_client(username='fieldsuser', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=user_data['id'])
+
+    detail = client.get(f"/quizzes/{quiz_info['id']}?view=summary").get_json()
+    assert detail['creator'] == 'fieldsuser' and detail['questions_count'] == 1 and 'questions' not in detail
+    assert client.get(f"/quizzes/{quiz_info['id']}?fields=name").get_json() == {'id': quiz_info['id'], 'name': quiz_info['name']}
+    assert client.get('/quizzes/9999?view=summary').status_code == 404
+
+    profile = client.get(f"/users/{user_data['id']}/profile?view=summary").get_json()
+    assert profile['username'] == 'fieldsuser' and 'quizzes' not in profile
+    full_profile = client.get(f"/users/{user_data['id']}/profile").get_json()
+    assert full_profile['quizzes'][0]['questions_count'] == 1
+
+    assert client.get('/quizzes?fields=name,questions').get_json()[0]['questions'][0]['text'] == 'What is 1+1?'
+    assert client.get('/quizzes?view=summary&fields=questions').status_code == 400
+    assert client.get('/quizzes?view=compact').status_code == 400
+
+
+# --- Read Model Tests ---
+def test_read_models_match_orm_serialization(create_authenticated_client, create_quiz_factory, new_user_factory, app):
+    host_client, host_data = create_authenticated_client(username='rm_host', password='pw')
+    fan_client, fan_data = create_authenticated_client(username='rm_fan', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'], quiz_name='Read Models')
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    assert fan_client.post(f"/follow/{host_data['id']}").status_code == 200
+    assert host_client.post(f'/sessions/{code}/invite', json={'recipient_id': fan_data['id']}).status_code in (200, 201)
+
+    with app.app_context():
+        expected = [n.to_dict() for n in Notification.query.filter_by(recipient_id=fan_data['id'])
+                    .order_by(Notification.created_at.desc()).all()]
+    assert expected and fan_client.get('/notifications').get_json() == expected
+
+    assert host_client.get('/followers').get_json() == [
+        {'id': fan_data['id'], 'username': 'rm_fan', 'avatar': 1, 'is_following': False}]
+    assert fan_client.get('/following').get_json() == [{'id': host_data['id'], 'username': 'rm_host', 'avatar': 1}]
+    assert {u['username']: u['is_following'] for u in fan_client.get('/users/all').get_json()} == {'rm_host': True}
+
+    assert host_client.get(f'/sessions/{code}/participants').get_json() == []
+    assert host_client.get('/sessions/NOPE123/participants').status_code == 404
+
+
+# --- Quiz Document Tests ---
+def test_quiz_documents_match_orm_serializers(create_authenticated_client, create_quiz_factory, app):
+    client, user_data = create_authenticated_client(username='docuser', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=user_data['id'], quiz_name='Parity', questions_data=[
+        {'type': 'text_input', 'text': 'Capital of France?', 'correct_answer': 'Paris', 'max_length': 20},
+        {'type': 'multiple_choice', 'text': 'Pick one', 'options': [
+            {'text': 'A', 'isCorrect': False}, {'text': 'B', 'isCorrect': True}, {'text': 'C', 'isCorrect': True}]},
+        {'type': 'multiple_choice', 'text': 'No options yet', 'options': []},
+        {'type': 'slider', 'text': 'How many?', 'min': 0, 'max': 100, 'step': 5, 'correct_value': 35},
+    ])
+    empty_quiz, _ = create_quiz_factory(user_id=user_data['id'], quiz_name='Empty', questions_data=[])
+    paths = [f"/quizzes/{quiz_info['id']}", f"/simulate/{quiz_info['id']}",
+             f"/quizzes/{empty_quiz['id']}", f"/simulate/{empty_quiz['id']}", '/quizzes/9999', '/simulate/9999']
+
+    app.config['QUIZ_DOCUMENT_SQL'] = False
+    try:
+        expected = [(r.status_code, r.get_json()) for r in map(client.get, paths)]
+    finally:
+        app.config['QUIZ_DOCUMENT_SQL'] = True
+    actual = [(r.status_code, r.get_json()) for r in map(client.get, paths)]
+
+    assert expected[0][1]['questions'][1]['options'][1]['is_correct'] is True
+    assert expected[1][1]['questions'][1]['correct_answer_text'] == 'B'
+    assert actual == expected
+
+
+def test_question_reads_follow_quiz_writes(create_authenticated_client, create_quiz_factory, app):
+    client, user_data = create_authenticated_client(username='flatuser', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=user_data['id'], quiz_name='Flat', questions_data=[
+        {'type': 'multiple_choice', 'text': 'Pick', 'options': [
+            {'text': 'A', 'isCorrect': True}, {'text': 'B', 'isCorrect': False}]},
+        {'type': 'slider', 'text': 'How many?', 'min': 0, 'max': 10, 'step': 1, 'correct_value': 3},
+    ])
+    with app.app_context():
+        rows = QuestionRead.query.filter_by(quiz_id=quiz_info['id']).order_by(QuestionRead.id).all()
+        assert [r.question_type for r in rows] == ['multiple_choice', 'slider']
+        assert [o['text'] for o in rows[0].options] == ['A', 'B'] and rows[0].correct_answer_text == 'A'
+        mc_id = rows[0].id
+
+    # Switch the correct option and replace the slider by a text question
+    response = client.put(f"/quizzes/{quiz_info['id']}", json={'name': 'Flat', 'questions': [
+        {'id': mc_id, 'type': 'multiple_choice', 'text': 'Pick again', 'options': [
+            {'text': 'A', 'isCorrect': False}, {'text': 'B', 'isCorrect': True}]},
+        {'type': 'text_input', 'text': 'Say hi', 'correct_answer': 'Hi', 'max_length': 10},
+    ]})
+    assert response.status_code == 200
+    with app.app_context():
+        rows = QuestionRead.query.filter_by(quiz_id=quiz_info['id']).order_by(QuestionRead.id).all()
+        assert [(r.question_type, r.question_text) for r in rows] == [
+            ('multiple_choice', 'Pick again'), ('text_input', 'Say hi')]
+        assert rows[0].correct_answer_text == 'B'
+        assert rows[0].correct_option_id == rows[0].options[1]['id']
+    assert client.get('/quizzes?view=summary').get_json()[0]['questions_count'] == 2
+
+    assert client.delete(f"/quizzes/{quiz_info['id']}").status_code == 200
+    with app.app_context():
+        assert QuestionRead.query.count() == 0
+
+
+def test_submit_score_grades_answers_on_the_server(create_authenticated_client, create_quiz_factory, app):
+    host_client, host_data = create_authenticated_client(username='gradehost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'], questions_data=[
+        {'type': 'text_input', 'text': 'Capital of France?', 'correct_answer': 'Paris', 'max_length': 20},
+        {'type': 'multiple_choice', 'text': 'Pick', 'options': [
+            {'text': 'A', 'isCorrect': False}, {'text': 'B', 'isCorrect': True}]},
+        {'type': 'slider', 'text': 'How many?', 'min': 0, 'max': 100, 'step': 5, 'correct_value': 35},
+    ])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    player_client, _ = create_authenticated_client(username='gradeplayer', password='pw')
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+    assert host_client.post(f'/sessions/{code}/start').status_code == 200
+
+    questions = player_client.get(f"/simulate/{quiz_info['id']}").get_json()['questions']
+    text_q, mc_q, slider_q = questions
+    answers = {str(text_q['id']): '  paris ', str(mc_q['id']): mc_q['options'][0]['id'], str(slider_q['id']): 35}
+    response = player_client.post(f'/sessions/{code}/submit-score', json={'answers': answers, 'score': 99})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['score'] == 2.0
+    assert body['correct'] == {str(text_q['id']): True, str(mc_q['id']): False, str(slider_q['id']): True}
+    assert host_client.get(f'/sessions/{code}/results').get_json()[0]['score'] == 2.0
+
+    response = player_client.post(f'/sessions/{code}/submit-score', json={'answers': {'999999': 1}})
+    assert response.status_code == 400
+
+
+def test_batch_runs_reads_in_one_request(create_authenticated_client, create_quiz_factory, app):
+    from sqlalchemy import event
+    client, user_data = create_authenticated_client(username='batcher', password='pw')
+    create_quiz_factory(user_id=user_data['id'], quiz_name='Batched')
+    checkouts = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda *args: checkouts.append(1)
+    event.listen(engine, 'checkout', listener)
+    try:
+        response = client.post('/batch', json={'requests': [
+            {'path': '/home'}, {'path': '/profile?fields=username'}, {'path': '/notifications/count'},
+            {'path': '/quizzes?view=summary'}, {'path': '/quizzes/999999'}]})
+    finally:
+        event.remove(engine, 'checkout', listener)
+    assert response.status_code == 200
+    items = response.get_json()['responses']
+    assert [item['status'] for item in items] == [200, 200, 200, 200, 404]
+    assert items[1]['body']['username'] == 'batcher'
+    assert items[3]['body'][0]['name'] == 'Batched'
+    assert len(checkouts) == 1  # Every sub-request shares the batch's connection
+
+    anonymous = app.test_client().post('/batch', json={'requests': [{'path': '/home'}]})
+    assert anonymous.get_json()['responses'][0]['status'] == 401
+
+    too_many = client.post('/batch', json={'requests': [{'path': '/home'}] * (app.config['BATCH_MAX_REQUESTS'] + 1)})
+    assert too_many.status_code == 400
+    assert client.post('/batch', json={'requests': [{'method': 'POST', 'path': '/logout'}]}).status_code == 400
+    assert client.post('/batch', json={'requests': [{'path': '/batch'}]}).status_code == 400
+
+
+
+def test_batch_items_get_their_own_globals_and_cookies(app):
+    from flask import g, jsonify, request as flask_request
+    probe_app = create_app(TestConfig)
+
+    @probe_app.route('/probe/set')
+    def probe_set():
+        g.marker = 'set'
+        response = jsonify({'replica': g.get('db_replica', 'unset')})
+        response.set_cookie('probe', 'one')
+        return response
+
+    @probe_app.route('/probe/read')
+    def probe_read():
+        return jsonify({'marker': g.get('marker'), 'probe': flask_request.cookies.get('probe')})
+
+    client = probe_app.test_client()
+    response = client.post('/batch', json={'requests': [{'path': '/probe/set'}, {'path': '/probe/read'}]})
+    items = response.get_json()['responses']
+    assert items[0]['body'] == {'replica': 'unset'}  # Not the outer POST's primary choice
+    assert items[1]['body'] == {'marker': None, 'probe': 'one'}
+    assert client.get_cookie('probe').value == 'one'
+
+# --- Query plan regression tests ---
+HOT_QUERY_INDEXES = [
+    # (route, index its main query must use)
+    ('/recently-played-quizzes', 'ix_user_activity_user_id_occurred_at_id'),
+    ('/quizzes?view=summary', 'ix_quizzes_user_id_created_at'),
+    ('/notifications', 'ix_notifications_recipient_id_created_at'),
+    ('/notifications/count', 'ix_notifications_recipient_id_is_read'),
+    ('/followers', 'ix_followers_followed_id_follower_id'),
+    (lambda quiz_id: f'/quizzes/{quiz_id}', 'ix_question_reads_quiz_id_id'),
+]
+
+
+def test_hot_queries_use_their_indexes(app):
+    """
+    Replays the SQL that hot routes run on seeded data through EXPLAIN.
+
+    Sequential scans are disabled for the EXPLAIN, so the planner only falls back
+    to one when no usable index exists; the small test tables would otherwise make
+    a seq scan the cheapest plan anyway.
+    """
+    from sqlalchemy import event
+    result = app.test_cli_runner().invoke(args=[
+        'seed', '--users', '500', '--avg-follows', '8', '--quizzes', '60', '--questions-per-quiz', '4',
+        '--sessions', '60', '--participants-per-session', '10', '--notifications', '2000', '--seed', '11'])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        username = User.query.order_by(User.id).first().username
+        quiz_id = Quiz.query.order_by(Quiz.id).first().id
+        engine = db.engine
+    client = app.test_client()
+    assert client.post('/login', json={'username': username, 'password': 'password'}).status_code == 200
+
+    captured = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute("ANALYZE")
+        raw_conn.commit()
+        for route, index_name in HOT_QUERY_INDEXES:
+            path = route(quiz_id) if callable(route) else route
+            captured.clear()
+            event.listen(engine, 'before_cursor_execute', _record)
+            try:
+                assert client.get(path).status_code == 200
+            finally:
+                event.remove(engine, 'before_cursor_execute', _record)
+
+            plans = []
+            for statement, parameters in captured:
+                if not statement.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+                raw_conn.rollback()
+            using = [plan for plan in plans if index_name in plan]
+            assert using, f"{path}: no query uses {index_name}:\n" + '\n\n'.join(plans)
+            assert all('Seq Scan' not in plan for plan in using), f"{path}:\n" + '\n\n'.join(using)
+
+        # Lookups that no GET route isolates: latest started sessions, and a user's participations
+        with app.app_context():
+            user_id = User.query.filter_by(username=username).first().id
+            lookups = [
+                (QuizSession.query.filter(QuizSession.started == True).order_by(QuizSession.created_at.desc())
+                 .limit(10), 'ix_quiz_sessions_started_created_at'),
+                (SessionParticipant.query.filter_by(user_id=user_id), 'ix_session_participants_user_id_session_id'),
+            ]
+            lookups = [(str(query.statement.compile(engine, compile_kwargs={'literal_binds': True})), index_name)
+                       for query, index_name in lookups]
+        for statement, index_name in lookups:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {statement}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            raw_conn.rollback()
+            assert index_name in plan and 'Seq Scan' not in plan, plan
+    finally:
+        raw_conn.close()
+
+
+def test_recently_played_reads_activity_timeline(create_authenticated_client, create_quiz_factory, app):
+    host_client, host_data = create_authenticated_client(username='timelinehost', password='pw')
+    player_client, _ = create_authenticated_client(username='timelineplayer', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'], quiz_name='Timeline')
+
+    codes = []
+    for num_teams in (1, 2, 1):
+        code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': num_teams}).get_json()['code']
+        assert player_client.post(f'/sessions/{code}/join', json={'team_number': num_teams}).status_code == 200
+        codes.append(code)
+    assert player_client.post(f'/sessions/{codes[1]}/join', json={'team_number': 1}).status_code == 200  # switch team
+    for code in codes[:2]:  # the third session never starts
+        assert host_client.post(f'/sessions/{code}/start').status_code == 200
+    assert player_client.post(f'/sessions/{codes[0]}/submit-score', json={'score': 7}).status_code == 200
+
+    first = player_client.get('/recently-played-quizzes?limit=1')
+    assert first.status_code == 200
+    assert [(e['session_code'], e['role'], e['team_number']) for e in first.get_json()] == [(codes[1], 'played', 1)]
+    second = player_client.get(f"/recently-played-quizzes?limit=1&before={first.headers['X-Next-Cursor']}")
+    assert [(e['session_code'], e['score'], e['quiz_name']) for e in second.get_json()] == [(codes[0], 7.0, 'Timeline')]
+    assert 'X-Next-Cursor' not in second.headers
+
+    hosted = host_client.get('/recently-played-quizzes').get_json()
+    assert [(e['session_code'], e['role'], e['score']) for e in hosted] == [(codes[1], 'hosted', None),
+                                                                            (codes[0], 'hosted', None)]
+    assert player_client.get('/recently-played-quizzes?before=garbage').status_code == 400
+
+    # The backfill produces the same timeline as the writes from the routes
+    with app.app_context():
+        before_rebuild = activity.recent_for(host_data['id'], 10)[0]
+        activity.rebuild()
+        db.session.commit()
+        assert activity.recent_for(host_data['id'], 10)[0] == before_rebuild
+
+
+def test_follow_feed_mixes_fanned_out_and_pulled_quizzes(create_authenticated_client, new_user_factory, app):
+    reader_client, reader = create_authenticated_client(username='feedreader', password='pw')
+    other_client, other = create_authenticated_client(username='feedother', password='pw')
+    creator_client, creator = create_authenticated_client(username='feedcreator', password='pw')
+    star_client, star = create_authenticated_client(username='feedstar', password='pw')
+    fanout = app.extensions['feed_fanout']
+    fanout.max_followers = 1  # feedstar (2 followers) is read on demand
+    quiz_body = lambda name: {'name': name, 'questions': [
+        {'type': 'text_input', 'text': 'Q?', 'correct_answer': 'A', 'max_length': 5}]}
+    try:
+        for client in (reader_client, other_client):
+            assert client.post(f"/follow/{star['id']}").status_code == 200
+        assert reader_client.post(f"/follow/{creator['id']}").status_code == 200
+        for i in range(4):
+            assert creator_client.post('/quiz', json=quiz_body(f'Creator {i}')).status_code == 201
+        assert star_client.post('/quiz', json=quiz_body('Star 0')).status_code == 201
+    finally:
+        fanout.max_followers = 10000
+
+    with app.app_context():
+        # Only the creator's quizzes were copied; trimming keeps the newest three
+        assert FeedEntry.query.filter_by(user_id=reader['id']).count() == 4
+        assert feed.trim(3) == 1
+        db.session.commit()
+        assert FeedEntry.query.filter_by(user_id=reader['id']).count() == 3
+        assert FeedEntry.query.filter_by(creator_id=star['id']).count() == 0
+
+    first = reader_client.get('/feed?limit=2')
+    assert [q['name'] for q in first.get_json()] == ['Star 0', 'Creator 3']
+    second = reader_client.get(f"/feed?limit=2&before={first.headers['X-Next-Cursor']}")
+    assert [q['name'] for q in second.get_json()] == ['Creator 2', 'Creator 1']
+    assert second.get_json()[0]['creator'] == 'feedcreator' and second.get_json()[0]['questions_count'] == 1
+    assert [q['name'] for q in other_client.get('/feed').get_json()] == ['Star 0']
+
+    assert reader_client.post(f"/unfollow/{creator['id']}").status_code == 200
+    assert [q['name'] for q in reader_client.get('/feed').get_json()] == ['Star 0']
+    # Following again copies the creator's newest quizzes back in
+    assert reader_client.post(f"/follow/{creator['id']}").status_code == 200
+    assert len(reader_client.get('/feed').get_json()) == 5
+
+
+def test_quiz_stats_refresh_counts_new_sessions_only(create_authenticated_client, new_user_factory, app):
+    from src.backend import quiz_stats
+    host_client, host = create_authenticated_client(username='statshost', password='pw')
+    players = [new_user_factory(f'statsplayer{i}', 'pw') for i in range(3)]
+    quiz_body = lambda name: {'name': name, 'questions': [
+        {'type': 'text_input', 'text': 'Q?', 'correct_answer': 'A', 'max_length': 5}]}
+    quiz_ids = [host_client.post('/quiz', json=quiz_body(name)).get_json()['quiz_id']
+                for name in ('Stats old', 'Stats new')]
+    now = datetime.utcnow()
+
+    def add_session(quiz_id, code, age, scores, created_age=None):
+        with app.app_context():
+            quiz_session = QuizSession(quiz_id=quiz_id, host_id=host['id'], code=code, started=True,
+                                       created_at=now - (created_age or age), started_at=now - age)
+            db.session.add(quiz_session)
+            db.session.flush()
+            for player, score in zip(players, scores):
+                db.session.add(SessionParticipant(session_id=quiz_session.id, user_id=player['id'], score=score))
+            db.session.commit()
+
+    def refresh():
+        with app.app_context():
+            changed = quiz_stats.refresh(settle_minutes=60, now=now)
+            db.session.commit()
+            return changed
+
+    add_session(quiz_ids[0], 'STAT01', timedelta(days=10), [1.0, 3.0, 2.0])
+    add_session(quiz_ids[0], 'STAT02', timedelta(days=9), [4.0, 2.0])
+    assert refresh() == 1
+    assert refresh() == 0  # Nothing new since the watermark
+
+    add_session(quiz_ids[1], 'STAT03', timedelta(hours=3), [5.0, 5.0])
+    add_session(quiz_ids[0], 'STAT04', timedelta(minutes=5), [1.0])  # Not settled yet
+    assert refresh() == 1
+    with app.app_context():
+        old = db.session.get(quiz_stats.QuizStats, quiz_ids[0])
+        assert (old.play_count, old.unique_players, old.score_sum) == (5, 3, 12.0)
+
+    # Created before STAT03 but started after it was counted: the watermark follows start times
+    add_session(quiz_ids[1], 'STAT05', timedelta(hours=2), [1.0], created_age=timedelta(hours=5))
+    assert refresh() == 1
+    with app.app_context():
+        new = db.session.get(quiz_stats.QuizStats, quiz_ids[1])
+        assert (new.play_count, new.score_sum) == (3, 11.0)
+
+    search_client, _ = create_authenticated_client(username='statsreader', password='pw')
+    found = search_client.get('/quizzes/search?q=Stats').get_json()
+    # Ordered by unique players; the old quiz trends less despite more plays
+    assert [q['name'] for q in found] == ['Stats old', 'Stats new']
+    assert found[0]['play_count'] == 5 and found[0]['avg_score'] == 2.4
+    trending = search_client.get('/quizzes/trending').get_json()
+    assert [q['name'] for q in trending] == ['Stats new', 'Stats old']
+    assert trending[0]['trending_score'] > trending[1]['trending_score'] > 0
+    assert trending[0]['questions_count'] == 1
+
+    with app.app_context():
+        # A rebuild recounts everything from scratch, here including the unsettled session
+        assert quiz_stats.rebuild(settle_minutes=0) == 2
+        db.session.commit()
+        old = db.session.get(quiz_stats.QuizStats, quiz_ids[0])
+        assert (old.play_count, old.unique_players, old.score_sum) == (6, 3, 13.0)
+        assert db.session.get(quiz_stats.QuizStats, quiz_ids[1]).play_count == 3
+
+
+def test_question_analytics_roll_up_answers(create_authenticated_client, create_quiz_factory, new_user_factory, app):
+    from src.backend import question_stats
+    from src.backend.Answers import TextInputAnswer, MultipleChoiceAnswer, SliderAnswer
+    creator_client, creator = create_authenticated_client(username='analyticscreator', password='pw')
+    other_client, _ = create_authenticated_client(username='analyticsother', password='pw')
+    player = new_user_factory('analyticsplayer', 'pw')
+    quiz, questions = create_quiz_factory(user_id=creator['id'], quiz_name='Analytics', questions_data=[
+        {'type': 'multiple_choice', 'text': 'Pick', 'options': [{'text': 'right', 'isCorrect': True},
+                                                                 {'text': 'wrong', 'isCorrect': False}]},
+        {'type': 'slider', 'text': 'Slide', 'min': 0, 'max': 99, 'step': 1, 'correct_value': 50},
+        {'type': 'text_input', 'text': 'Type', 'correct_answer': 'Paris'},
+        {'type': 'slider', 'text': 'Empty range', 'min': 10, 'max': 5, 'step': 1, 'correct_value': 7},
+    ])
+    mc_id, slider_id, text_id, empty_id = (q['id'] for q in questions)
+    now = datetime.utcnow()
+    with app.app_context():
+        right, wrong = (o.id for o in MultipleChoiceOption.query.filter_by(question_id=mc_id)
+                        .order_by(MultipleChoiceOption.id))
+        old = now - timedelta(minutes=5)
+        answers = [MultipleChoiceAnswer(question_id=mc_id, option_id=option, answered_at=old)
+                   for option in (right, wrong, wrong)]
+        answers += [SliderAnswer(question_id=slider_id, value=value, answered_at=old) for value in (50, 3, 99)]
+        answers += [TextInputAnswer(question_id=text_id, text=given, answered_at=old)
+                    for given in (' paris ', 'Lyon', '\tParis\n')]
+        answers.append(SliderAnswer(question_id=empty_id, value=7, answered_at=old))
+        answers.append(TextInputAnswer(question_id=text_id, text='Paris', answered_at=now))  # Not settled yet
+        for answer in answers:
+            answer.user_id = player['id']
+        db.session.add_all(answers)
+        db.session.commit()
+        assert question_stats.refresh(settle_seconds=60, now=now) == 4
+        db.session.commit()
+
+    assert other_client.get(f"/quizzes/{quiz['id']}/analytics").status_code == 403
+    assert creator_client.get('/quizzes/999999/analytics').status_code == 404
+    response = creator_client.get(f"/quizzes/{quiz['id']}/analytics")
+    assert response.status_code == 200
+    mc, slider, typed, empty = response.get_json()['questions']
+    assert (mc['answer_count'], mc['correct_count']) == (3, 1)
+    assert [(o['text'], o['count']) for o in mc['options']] == [('right', 1), ('wrong', 2)]
+    assert slider['correct_rate'] == round(1 / 3, 4) and len(slider['histogram']) == 20
+    assert slider['histogram'][0] == {'from': 0, 'to': 4, 'count': 1}
+    assert slider['histogram'][10]['count'] == 1 and slider['histogram'][19] == {'from': 95, 'to': 99, 'count': 1}
+    assert (typed['answer_count'], typed['correct_count']) == (3, 2)
+    assert (empty['answer_count'], empty['correct_count']) == (1, 1) and 'histogram' not in empty
+
+    with app.app_context():
+        # The next run picks up only the answer that has settled since
+        assert question_stats.refresh(settle_seconds=60, now=now + timedelta(minutes=2)) == 1
+        db.session.commit()
+    typed = creator_client.get(f"/quizzes/{quiz['id']}/analytics").get_json()['questions'][2]
+    assert (typed['answer_count'], typed['correct_count']) == (4, 3)
+
+
+def test_session_answers_are_written_in_batches(create_authenticated_client, create_quiz_factory, app):
+    from src.backend.answer_buffer import AnswerBuffer, AnswerBufferFull
+    from src.backend.Answers import Answer, MultipleChoiceAnswer, SliderAnswer
+    host_client, host_data = create_authenticated_client(username='answerhost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'], questions_data=[
+        {'type': 'multiple_choice', 'text': 'Pick', 'options': [
+            {'text': 'A', 'isCorrect': False}, {'text': 'B', 'isCorrect': True}]},
+        {'type': 'slider', 'text': 'How many?', 'min': 0, 'max': 100, 'step': 5, 'correct_value': 35},
+    ])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    player_client, player_data = create_authenticated_client(username='answerplayer', password='pw')
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+    mc_q, slider_q = player_client.get(f"/simulate/{quiz_info['id']}").get_json()['questions']
+    answer = {'question_id': mc_q['id'], 'answer': mc_q['options'][1]['id']}
+    assert player_client.post(f'/sessions/{code}/answers', json=answer).status_code == 403  # Not started
+    assert host_client.post(f'/sessions/{code}/start').status_code == 200
+
+    response = player_client.post(f'/sessions/{code}/answers', json=answer)
+    assert response.status_code == 201
+    assert response.get_json() == {'stored': True, 'correct': {str(mc_q['id']): True}}
+    response = player_client.post(f'/sessions/{code}/answers', json={'answers': {str(slider_q['id']): 30}})
+    assert response.get_json()['correct'] == {str(slider_q['id']): False}
+    assert player_client.post(f'/sessions/{code}/answers', json={'question_id': mc_q['id'], 'answer': 999999}).status_code == 400
+    assert player_client.post(f'/sessions/{code}/answers', json={'question_id': 999999, 'answer': 1}).status_code == 400
+    for bad_value in ('1e999', 'inf', 'nan', 10 ** 12, -5, 100.5):
+        response = player_client.post(f'/sessions/{code}/answers', json={'question_id': slider_q['id'], 'answer': bad_value})
+        assert response.status_code == 400, bad_value
+
+    with app.app_context():
+        assert MultipleChoiceAnswer.query.filter_by(question_id=mc_q['id']).one().option_id == mc_q['options'][1]['id']
+        assert SliderAnswer.query.filter_by(question_id=slider_q['id']).one().value == 30
+
+        # A burst of single answers goes out as a handful of multi-row transactions
+        buffer = AnswerBuffer(app, batch_rows=100, flush_interval=0.05)
+        now = datetime.utcnow()
+        tickets = [buffer.submit([(player_data['id'], slider_q['id'], 'slider', value, now)]) for value in range(250)]
+        assert all(ticket.wait(5) for ticket in tickets)
+        assert buffer.rows_written == 250 and buffer.batches_written <= 5
+        assert buffer.shutdown() == 0
+        assert Answer.query.filter_by(question_id=slider_q['id']).count() == 251
+
+        with pytest.raises(AnswerBufferFull):
+            AnswerBuffer(app, batch_rows=1, flush_interval=0.05, max_pending=1).submit(
+                [(player_data['id'], slider_q['id'], 'slider', value, now) for value in (1, 2)])
+
+        # An answer to a deleted option is dropped on its own; the rest of its batch and later batches go through
+        buffer = AnswerBuffer(app, batch_rows=100, flush_interval=0.05)
+        bad = buffer.submit([(player_data['id'], mc_q['id'], 'multiple_choice', 999999, now),
+                             (player_data['id'], mc_q['id'], 'multiple_choice', mc_q['options'][0]['id'], now)])
+        good = buffer.submit([(player_data['id'], slider_q['id'], 'slider', 7, now)] * 5)
+        assert bad.wait(5) and good.wait(5)
+        assert (bad.rejected, good.rejected) == (1, 0)
+        assert buffer.shutdown() == 0 and (buffer.rows_written, buffer.rows_rejected) == (6, 1)
+        assert MultipleChoiceAnswer.query.filter_by(question_id=mc_q['id']).count() == 2
+        assert Answer.query.filter_by(question_id=mc_q['id']).count() == 2
+
+
+def test_live_session_is_driven_by_the_host(create_authenticated_client, create_quiz_factory, app):
+    from src.backend import live_sessions
+    host_client, host_data = create_authenticated_client(username='livehost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'], questions_data=[
+        {'type': 'multiple_choice', 'text': 'Pick', 'options': [
+            {'text': 'A', 'isCorrect': False}, {'text': 'B', 'isCorrect': True}]},
+        {'type': 'text_input', 'text': 'Capital?', 'correct_answer': 'Paris'},
+    ])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    player_client, _ = create_authenticated_client(username='liveplayer', password='pw')
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+
+    lobby = player_client.get(f'/sessions/{code}/live').get_json()
+    assert (lobby['phase'], lobby['version'], lobby['question_count'], lobby['question']) == ('lobby', 0, 2, None)
+    assert player_client.post(f'/sessions/{code}/live/advance').status_code == 403
+
+    opened = host_client.post(f'/sessions/{code}/live/advance', json={'duration': 30}).get_json()
+    assert (opened['phase'], opened['question_index'], opened['version']) == ('question', 0, 1)
+    assert 'is_correct' not in opened['question']['options'][0] and 29 < opened['seconds_left'] <= 30
+    assert host_client.get(f'/sessions/{code}').get_json()['started'] is True
+    mc_id, option_id = opened['question']['id'], opened['question']['options'][1]['id']
+
+    # Polls with the current version are empty, and only the open question takes answers
+    assert player_client.get(f'/sessions/{code}/live?version=1').status_code == 304
+    assert player_client.post(f'/sessions/{code}/answers', json={'question_id': mc_id, 'answer': option_id}).status_code == 201
+    revealed = host_client.post(f'/sessions/{code}/live/advance').get_json()
+    assert (revealed['phase'], revealed['version'], revealed['question']['correct_option_id']) == ('reveal', 2, option_id)
+    assert player_client.post(f'/sessions/{code}/answers', json={'question_id': mc_id, 'answer': option_id}).status_code == 409
+
+    # The timer closes a question without anyone writing the state
+    opened = host_client.post(f'/sessions/{code}/live/advance', json={'duration': 5}).get_json()
+    assert (opened['phase'], opened['question']['type']) == ('question', 'text_input')
+    with app.test_request_context():
+        state = live_sessions.get_state(code, now=datetime.utcnow() + timedelta(seconds=6))
+        assert (state.phase, state.version) == ('reveal', 4)
+        checkpoint = db.session.get(live_sessions.LiveSessionCheckpoint, state.session_id)
+        assert (checkpoint.phase, checkpoint.version) == ('question', 3)
+        app.extensions['live_state_cache'].clear()
+        state = live_sessions.get_state(code, now=datetime.utcnow() + timedelta(seconds=6))
+        # An advance that is rolled back leaves the cached state alone
+        live_sessions.advance(state, 20, now=datetime.utcnow() + timedelta(seconds=6))
+        db.session.rollback()
+        cached = app.extensions['live_state_cache'].get(code)
+        assert (cached.phase, cached.version) == ('question', 3)
+        state = live_sessions.get_state(code, now=datetime.utcnow() + timedelta(seconds=6))
+        new_state = live_sessions.advance(state, 20, now=datetime.utcnow() + timedelta(seconds=6))
+        db.session.commit()
+        live_sessions.remember(new_state)
+        assert app.extensions['live_state_cache'].get(code).version == 5
+    app.extensions['live_state_cache'].clear()
+    finished = player_client.get(f'/sessions/{code}/live').get_json()
+    assert (finished['phase'], finished['version'], finished['question']) == ('finished', 5, None)
+    assert host_client.post(f'/sessions/{code}/live/advance').status_code == 400
+
+
+def test_session_events_are_published_on_commit_and_coalesced(create_authenticated_client, create_quiz_factory, app):
+    import threading
+    import time
+    from src.backend import events
+    host_client, host_data = create_authenticated_client(username='eventhost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    first = host_client.get(f'/sessions/{code}/events?wait=0').get_json()
+    assert first['resync'] is True and first['updates'] == []
+
+    player_client, player_data = create_authenticated_client(username='eventplayer', password='pw')
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+    body = host_client.get(f"/sessions/{code}/events?cursor={first['cursor']}&wait=2").get_json()
+    assert body['resync'] is False
+    assert body['updates'] == [{'kind': 'participant_joined', 'count': 1,
+                                'data': {'user_id': player_data['id'], 'team_number': None}}]
+    assert host_client.get(f"/sessions/{code}/events?cursor={body['cursor']}&wait=0").get_json()['updates'] == []
+    assert host_client.get(f'/sessions/{code}/events?cursor=elsewhere-3&wait=0').get_json()['resync'] is True
+
+    # A cursor from another worker waits for the next flush instead of answering at once
+    foreign_hub = events.EventHub(coalesce_seconds=0)
+    threading.Timer(0.2, foreign_hub.deliver, [[events.Event('session:moved', 'session_started', {})]]).start()
+    started = time.monotonic()
+    moved = foreign_hub.wait('session:moved', 'elsewhere-3', 2)
+    assert 0.15 < time.monotonic() - started < 2
+    assert moved['resync'] is True and [u['kind'] for u in moved['updates']] == ['session_started']
+    assert foreign_hub.wait('session:moved', moved['cursor'], 0)['resync'] is False
+
+    with app.app_context():
+        # Rolled back changes publish nothing
+        events.publish(db.session, events.session_topic(code), 'session_started')
+        db.session.rollback()
+    assert host_client.get(f"/sessions/{code}/events?cursor={body['cursor']}&wait=0.3").get_json()['updates'] == []
+
+    # A burst of 200 joins reaches a waiting client as a handful of updates
+    hub = events.EventHub(coalesce_seconds=0.1)
+    responses, stop = [], threading.Event()
+
+    def client():
+        cursor = hub.wait('session:burst', None, 0)['cursor']
+        while not stop.is_set():
+            body = hub.wait('session:burst', cursor, 0.5)
+            cursor = body['cursor']
+            if body['updates']:
+                responses.append(body['updates'])
+
+    waiter = threading.Thread(target=client)
+    waiter.start()
+    time.sleep(0.05)
+    for user_id in range(200):
+        hub.deliver([events.Event('session:burst', 'participant_joined', {'user_id': user_id})])
+        time.sleep(0.002)
+    time.sleep(0.3)
+    stop.set()
+    waiter.join()
+    assert sum(update['count'] for batch in responses for update in batch) == 200
+    assert len(responses) <= 10 and responses[-1][-1]['data'] == {'user_id': 199}
+
+
+def test_postgres_event_broker_delivers_through_listen_notify(app):
+    from src.backend import events
+    hub = events.EventHub(coalesce_seconds=0)
+    broker = events.PostgresBroker(hub, app.config['SQLALCHEMY_DATABASE_URI'], 'aquimemni_events_test')
+    broker.ensure_listening()
+    previous = app.extensions['event_broker']
+    app.extensions['event_broker'] = broker
+    try:
+        cursor = hub.wait('user:1', None, 0)['cursor']
+        deadline = datetime.utcnow() + timedelta(seconds=5)
+        body = {'updates': []}
+        while not body['updates'] and datetime.utcnow() < deadline:
+            # The listener connects in the background; publish until it hears one
+            with app.app_context():
+                events.publish(db.session, events.user_topic(1), 'notification', type='new_follower')
+                db.session.commit()
+            body = hub.wait('user:1', cursor, 0.5)
+        assert body['updates'][0]['kind'] == 'notification'
+        assert body['updates'][0]['data'] == {'type': 'new_follower'}
+    finally:
+        app.extensions['event_broker'] = previous
+        broker.shutdown()
+
+
+def test_sessions_are_owned_by_one_node_of_the_ring(create_authenticated_client, create_quiz_factory, app):
+    from src.backend import sharding
+    from src.backend.live_sessions import LiveSessionCheckpoint
+    ring = sharding.HashRing({'a': '10.0.0.1:5000', 'b': '10.0.0.2:5000', 'c': '10.0.0.3:5000'}, vnodes=128)
+    slots = ring.slots()
+    assert len(slots) == 1296 and min(list(slots.values()).count(node) for node in 'abc') > 300
+    grown = sharding.HashRing({**ring.nodes, 'd': '10.0.0.4:5000'}, vnodes=128).slots()
+    # Only slots that go to the new node move
+    assert all(grown[slot] in (owner, 'd') for slot, owner in slots.items())
+    assert 200 < sum(1 for slot in slots if grown[slot] != slots[slot]) < 450
+    config = sharding.nginx_config(sharding.HashRing(ring.nodes, epoch=7))
+    assert 'upstream node_b {' in config and f"    00 node_{slots['00']};" in config
+
+    host_client, host_data = create_authenticated_client(username='shardhost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'])
+    player_client, _ = create_authenticated_client(username='shardplayer', password='pw')
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+    with app.app_context():
+        sharding.join('a', '10.0.0.1:5000')
+        sharding.join('b', '10.0.0.2:5000')
+        db.session.commit()
+        owner = sharding.HashRing({'a': '', 'b': ''}).owner(code)
+        other = 'b' if owner == 'a' else 'a'
+    app.config['NODE_ID'] = other
+    try:
+        response = host_client.get(f'/sessions/{code}/live')
+        assert response.status_code == 421
+        assert response.headers['X-Session-Node'] == {'a': '10.0.0.1:5000', 'b': '10.0.0.2:5000'}[owner]
+        assert host_client.get('/notifications/count').status_code == 200  # Not session bound
+
+        app.config['NODE_ID'] = owner
+        assert host_client.post(f'/sessions/{code}/live/advance').status_code == 200
+        with app.app_context():
+            checkpoint = LiveSessionCheckpoint.query.one()
+            assert checkpoint.ring_epoch == 2
+            # A rebalance elsewhere wrote the session under a newer ring than this worker has seen
+            checkpoint.ring_epoch = 3
+            db.session.commit()
+        response = host_client.post(f'/sessions/{code}/live/advance')
+        assert response.status_code == 421 and 'X-Session-Node' in response.headers
+    finally:
+        app.config['NODE_ID'] = None
+
+
+def test_large_sessions_return_a_sampled_participant_list(create_authenticated_client, create_quiz_factory, app):
+    host_client, host_data = create_authenticated_client(username='largehost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 2}).get_json()['code']
+    players = []
+    for i in range(6):
+        player_client, player_data = create_authenticated_client(username=f'largeplayer{i}', password='pw')
+        assert player_client.post(f'/sessions/{code}/join', json={'team_number': i % 2 + 1}).status_code == 200
+        players.append((player_client, player_data))
+
+    full = host_client.get(f'/sessions/{code}/participants').get_json()
+    assert [p['username'] for p in full] == [f'largeplayer{i}' for i in range(6)]
+
+    app.config.update(SESSION_LARGE_THRESHOLD=3, SESSION_PARTICIPANT_SAMPLE=2)
+    app.extensions['session_read_cache'].clear()
+    try:
+        body = players[3][0].get(f'/sessions/{code}/participants').get_json()
+        assert body['mode'] == 'sampled' and body['total'] == 6
+        assert body['teams'] == [{'team_number': 1, 'count': 3}, {'team_number': 2, 'count': 3}]
+        assert [p['username'] for p in body['first']] == ['largeplayer0', 'largeplayer1']
+        assert [p['username'] for p in body['newest']] == ['largeplayer5', 'largeplayer4']
+        assert body['me'] == full[3]
+        assert host_client.get(f'/sessions/{code}/participants').get_json()['me'] is None
+    finally:
+        app.config.update(SESSION_LARGE_THRESHOLD=100, SESSION_PARTICIPANT_SAMPLE=20)
+        app.extensions['session_read_cache'].clear()
+
+    pages, cursor = [], ''
+    while cursor is not None:
+        response = host_client.get(f'/sessions/{code}/participants/roster?limit=4&after={cursor}')
+        assert response.status_code == 200
+        pages.append(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+    assert [len(page) for page in pages] == [4, 2] and pages[0] + pages[1] == full
+    assert host_client.get(f'/sessions/{code}/participants/roster?after=abc').status_code == 400
+    assert host_client.get('/sessions/NOPE123/participants/roster').status_code == 404
+
+
+def test_session_reads_are_cached_and_invalidated_by_events(create_authenticated_client, create_quiz_factory, app):
+    import threading
+    import time
+    from src.backend.session_cache import SessionReadCache
+    host_client, host_data = create_authenticated_client(username='cachehost', password='pw')
+    quiz_info, _ = create_quiz_factory(user_id=host_data['id'])
+    code = host_client.post('/sessions', json={'quiz_id': quiz_info['id'], 'num_teams': 1}).get_json()['code']
+    cache = app.extensions['session_read_cache']
+    # The read cache and the server-side session store are configured separately
+    assert (cache.ttl, cache.max_entries) == (app.config['SESSION_READ_CACHE_TTL'], app.config['SESSION_READ_CACHE_SIZE'])
+    assert (app.session_interface.cache_ttl, app.session_interface.cache_size) == \
+        (app.config['SESSION_CACHE_TTL'], app.config['SESSION_CACHE_SIZE']) == (5.0, 20000)
+    loads = cache.loads
+    for _ in range(3):
+        assert host_client.get(f'/sessions/{code}').get_json()['started'] is False
+        assert host_client.get(f'/sessions/{code}/participants').get_json() == []
+    assert cache.loads == loads + 2
+    assert host_client.get('/sessions/NOPE123').status_code == 404
+
+    player_client, player_data = create_authenticated_client(username='cacheplayer', password='pw')
+    assert player_client.post(f'/sessions/{code}/join', json={}).status_code == 200
+    assert [p['user_id'] for p in host_client.get(f'/sessions/{code}/participants').get_json()] == [player_data['id']]
+    assert host_client.post(f'/sessions/{code}/start').status_code == 200
+    assert host_client.get(f'/sessions/{code}').get_json()['started'] is True
+    assert host_client.get(f'/sessions/{code}/results').get_json()[0]['score'] == 0
+    assert player_client.post(f'/sessions/{code}/submit-score', json={'score': 3}).status_code == 200
+    assert host_client.get(f'/sessions/{code}/results').get_json()[0]['score'] == 3
+
+    # Concurrent misses share one load; a load overtaken by an invalidation is not stored
+    local = SessionReadCache(ttl=60)
+    started, release, calls, results = threading.Event(), threading.Event(), [], []
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'body'
+
+    threads = [threading.Thread(target=lambda: results.append(local.get_or_load('ABC', 'details', slow_loader)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.1)
+    local.invalidate('ABC')
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results == ['body'] * 8
+    assert local.get_or_load('ABC', 'details', lambda: 'fresh') == 'fresh'
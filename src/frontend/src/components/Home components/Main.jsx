@@ -521,7 +521,7 @@ export const ActivitySection = () => {
                         <ul className="list-group list-group-flush">
                             {recentlyPlayedQuizzes.map(quiz => (
                                 <li
-                                    key={quiz.session_id}
+                                    key={`${quiz.role}-${quiz.session_id}`}
                                     className="list-group-item d-flex justify-content-between align-items-center border-0 px-0 py-2"
                                     style={{ cursor: 'pointer' }}
                                     onClick={() => handlePlayedQuizClick(quiz)}
@@ -533,7 +533,7 @@ export const ActivitySection = () => {
                                         <div>
                                             <div className="fw-medium">{quiz.quiz_name}</div>
                                             <small className="text-muted">
-                                                Score: {quiz.score} {quiz.is_team_mode && quiz.team_number && `• Team ${quiz.team_number}`}
+                                                {quiz.role === 'hosted' ? 'Hosted' : <>Score: {quiz.score} {quiz.is_team_mode && quiz.team_number && `• Team ${quiz.team_number}`}</>}
                                             </small>
                                         </div>
                                     </div>
@@ -13,6 +13,20 @@ import QuizSimulator from './QuizSimulator';
 import 'bootstrap-icons/font/bootstrap-icons.css';
 import Select from 'react-select'; // Voor de team selectie
 
+/**
+ * Builds the list shown for a sampled participant summary.
+ *
+ * Combines the first and newest joiners with the current user's own entry, without duplicates.
+ *
+ * @param {Object} summary - The sampled response of the participants endpoint
+ * @returns {Array<Object>} The participants to display
+ */
+const samplePreview = (summary) => {
+    const byId = new Map();
+    [...summary.first, ...summary.newest, ...(summary.me ? [summary.me] : [])].forEach(p => byId.set(p.user_id, p));
+    return Array.from(byId.values());
+};
+
 /**
  * QuizSession component for managing quiz participation.
  * 
@@ -27,6 +41,7 @@ function QuizSession() {
     const navigate = useNavigate();
     const [sessionInfo, setSessionInfo] = useState(null);
     const [participants, setParticipants] = useState([]);
+    const [participantTotal, setParticipantTotal] = useState(0);
     const [currentUser, setCurrentUser] = useState(null);
     const [selectedTeam, setSelectedTeam] = useState('');
     const [isLoading, setIsLoading] = useState(true);
@@ -118,11 +133,15 @@ function QuizSession() {
             if (!isMountedRef.current) return;
 
             if (participantsRes.ok) {
-                const participantsData = await participantsRes.json();
+                const participantsBody = await participantsRes.json();
                 if (isMountedRef.current) {
+                    // Large sessions send a summary ({mode: 'sampled', total, teams, first, newest, me}) instead of the full list
+                    const isSampled = !Array.isArray(participantsBody);
+                    const participantsData = isSampled ? samplePreview(participantsBody) : participantsBody;
                     setParticipants(prev => JSON.stringify(prev) !== JSON.stringify(participantsData) ? participantsData : prev);
+                    setParticipantTotal(isSampled ? participantsBody.total : participantsData.length);
 
-                    const currentUserParticipant = participantsData.find(p => p.user_id === userForFetch.id);
+                    const currentUserParticipant = isSampled ? participantsBody.me : participantsData.find(p => p.user_id === userForFetch.id);
                     const newIsJoinedServer = !!currentUserParticipant;
 
                     setIsJoined(prevIsJoined => prevIsJoined !== newIsJoinedServer ? newIsJoinedServer : prevIsJoined);
@@ -166,6 +185,7 @@ function QuizSession() {
         setError('');
         setSessionInfo(null);
         setParticipants([]);
+        setParticipantTotal(0);
         setSelectedTeam('');
         setIsJoined(false);
         setInvitedUserIds(new Set());
@@ -453,14 +473,14 @@ function QuizSession() {
                                 {isCurrentUserHost && (
                                     <div className="mt-4 border-top pt-3 d-grid gap-2">
                                          <button className="btn btn-outline-primary btn-lg" onClick={openInviteModal} disabled={isStarting}><i className="bi bi-person-plus-fill me-2"></i> Invite Participants</button>
-                                        <button className="btn btn-warning btn-lg" onClick={handleStartQuiz} disabled={isStarting || participants.length === 0} style={{color: '#212529'}} title={participants.length === 0 ? "Waiting for participants" : "Start quiz"}>
+                                        <button className="btn btn-warning btn-lg" onClick={handleStartQuiz} disabled={isStarting || participantTotal === 0} style={{color: '#212529'}} title={participantTotal === 0 ? "Waiting for participants" : "Start quiz"}>
                                             {isStarting ? <><span className="spinner-border spinner-border-sm me-2"></span> Starting...</> : 'Start Quiz!' }</button>
-                                        {participants.length === 0 && !isStarting && <p className="text-danger mt-1 small fst-italic">Waiting for participants.</p>}
+                                        {participantTotal === 0 && !isStarting && <p className="text-danger mt-1 small fst-italic">Waiting for participants.</p>}
                                         {startError && <div className="alert alert-danger mt-3 p-2 small">{startError}</div>}</div>)}
                             </div>
                         </div>
                         <div className="card shadow-sm border-0 rounded-4">
-                            <div className="card-header bg-light-subtle p-3"><h5 className="mb-0 fw-medium">Participants ({participants.length})</h5></div>
+                            <div className="card-header bg-light-subtle p-3"><h5 className="mb-0 fw-medium">Participants ({participantTotal})</h5></div>
                             <ul className="list-group list-group-flush" style={{ maxHeight: '300px', overflowY: 'auto' }}>
                                 {participants.length === 0 ? (<li className="list-group-item text-muted text-center fst-italic py-3">No one has joined yet...</li>) : (
                                     participants.sort((a,b) => a.user_id === sessionInfo.host_id ? -1 : b.user_id === sessionInfo.host_id ? 1 : a.username.localeCompare(b.username))
@@ -471,7 +491,8 @@ function QuizSession() {
                                                 <span className={`fw-medium ${p.user_id === currentUser?.id ? 'text-primary' : ''}`}>{p.username}
                                                     {p.user_id === sessionInfo.host_id && <span className="badge bg-dark-subtle text-dark-emphasis rounded-pill ms-2 small py-1 px-2">Host</span>}
                                                     {p.user_id === currentUser?.id && !isCurrentUserHost && <span className="text-muted ms-1 small">(You)</span>}</span></div>
-                                            {sessionInfo.is_team_mode && p.team_number && (<span className="badge bg-info-subtle text-info-emphasis rounded-pill fs-6 py-1 px-2">Team {p.team_number}</span>)}</li>)))}</ul>
+                                            {sessionInfo.is_team_mode && p.team_number && (<span className="badge bg-info-subtle text-info-emphasis rounded-pill fs-6 py-1 px-2">Team {p.team_number}</span>)}</li>)))}
+                                {participantTotal > participants.length && (<li className="list-group-item text-muted text-center fst-italic py-2">...and {participantTotal - participants.length} more</li>)}</ul>
                         </div>
                         <div className="text-center mt-4 mb-3"><button className="btn btn-outline-secondary" onClick={() => navigate('/home')}><i className="bi bi-house-door-fill me-1"></i> Back to Home</button></div>
                     </div>